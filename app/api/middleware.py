@@ -2,7 +2,7 @@ from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 import time
 import structlog
-from core.config import settings
+from app.core.config import settings
 
 logger = structlog.get_logger(__name__)
 
@@ -52,18 +52,26 @@ class TaskCleanupMiddleware(BaseHTTPMiddleware):
     
     async def _cleanup_old_tasks(self):
         """Remove tasks older than 24 hours"""
-        from app.api.routes import tasks_storage
+        from app.core.task_store import task_store
         
         current_time = time.time()
         cutoff_time = current_time - (24 * 3600)  # 24 hours
         
+        tasks = await task_store.list_tasks()
         tasks_to_remove = []
-        for task_id, task_data in tasks_storage.items():
+        for task_id, task_data in tasks.items():
             # Assume task creation time is stored or use current logic
             # For simplicity, remove completed/failed tasks older than cutoff
             if task_data.get("status") in ["completed", "failed"]:
                 tasks_to_remove.append(task_id)
+
+        # Coalesced tasks only point at their leader; they go with it
+        removed_leaders = set(tasks_to_remove)
+        for task_id, task_data in tasks.items():
+            leader_id = task_data.get("coalesced_with")
+            if leader_id and (leader_id in removed_leaders or leader_id not in tasks):
+                tasks_to_remove.append(task_id)
         
         for task_id in tasks_to_remove:
-            del tasks_storage[task_id]
+            await task_store.delete(task_id)
             logger.info("Cleaned up old task", task_id=task_id)
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
 from fastapi.exceptions import RequestValidationError
 import json
 import csv
+import hmac
 import io
 import uuid
 import asyncio
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
 from app.models.schemas import (
@@ -18,10 +19,24 @@ from app.models.schemas import (
     HealthResponse
 )
 from app.clients.apify_client import apify_client
+from app.clients.apify_pool import apify_pool
+from app.clients.apify_token_pool import apify_token_pool
+from app.clients.lead_normalizer import render_csv_rows
+from app.clients.normalization_pool import normalization_pool
+from app.clients.scrape_cache import scrape_cache
+from app.clients.lead_allocator import LeadAllocator
+from app.clients.shard_planner import lead_key
+from app.core.checkpoints import TaskCheckpoint, checkpoint_store
+from app.core.job_queue import scrape_job_queue
+from app.core.scheduler import scrape_scheduler
+from app.core.task_store import INSTANCE_ID, lease_fields, owner_alive, task_store
+from app.clients.apify_transport import WEBHOOK_SECRET_HEADER
+from app.clients.run_watcher import TERMINAL_RUN_STATUSES, dispatch_run_event
 from app.clients.sheets_client import sheets_client
 from app.clients.notion_client import notion_client
 from app.core.security import generate_csrf_token, verify_csrf_token
 from app.core.config import settings
+from app.core.exceptions import TaskStoreError
 from app.utils.logging_config import setup_logging
 
 # Setup logging
@@ -35,8 +50,73 @@ async def test_route():
     """Test route to verify API router is working"""
     return {"message": "API router is working", "status": "success"}
 
-# In-memory task storage (in production, use Redis or similar)
-tasks_storage: Dict[str, Dict[str, Any]] = {}
+# Task state lives in task_store (app.core.task_store); with the sqlite
+# backend it is shared by every uvicorn worker. The registries below are per
+# process: coalescing only joins jobs of the same worker.
+
+# Scrape jobs currently running, keyed by canonical query -> id of the task doing the work
+inflight_scrapes: Dict[str, str] = {}
+
+# Coroutine of every running scrape job, so it can be cancelled
+running_scrapes: Dict[str, asyncio.Task] = {}
+
+# Pending retry of checkpointed tasks whose lease was still held at startup
+resume_retry: Optional[asyncio.Task] = None
+
+# Task statuses after which nothing changes anymore
+FINAL_TASK_STATUSES = ("completed", "failed", "cancelled")
+
+# Seconds a URL may take to wind down on its own once the task's target is met
+URL_STOP_GRACE_SECONDS = 1
+
+def _new_task_entry(total_urls: int, coalesce_key: str) -> Dict[str, Any]:
+    """Initial storage entry of a scrape task"""
+    return {
+        "status": "pending",
+        "progress": 0,
+        "message": "Task initiated",
+        "data": None,
+        "total_count": 0,
+        "current_url": None,
+        "scraped_count": 0,
+        "urls_processed": 0,
+        "total_urls": total_urls,
+        "start_time": None,
+        "estimated_time": "--:--",
+        "processing_rate": 0,
+        "error_count": 0,
+        "total_attempts": 0,
+        "cache_hit": False,
+        "coalesce_key": coalesce_key,
+        "subscribers": 1,
+        **lease_fields()
+    }
+
+def _worker_mode() -> bool:
+    """Whether scrape jobs run in separate worker processes (python -m app.worker)"""
+    return settings.scrape_execution_mode == "worker"
+
+async def _queue_info(job_id: str):
+    """Queue position and queue wait time of a job, wherever it is queued"""
+    if _worker_mode():
+        return await scrape_job_queue.position(job_id), await scrape_job_queue.wait_time(job_id)
+    return scrape_scheduler.queue_position(job_id), scrape_scheduler.wait_time(job_id)
+
+async def _prune_inflight_scrapes():
+    """Drop the in-flight entries of jobs that are over or gone"""
+    # In worker mode a worker process runs the job and cannot clear this
+    # process's registry, so finished leaders are swept here instead
+    for coalesce_key, leader_id in list(inflight_scrapes.items()):
+        leader = await task_store.get(leader_id, include_data=False)
+        if (leader is None or leader["status"] in FINAL_TASK_STATUSES) and inflight_scrapes.get(coalesce_key) == leader_id:
+            del inflight_scrapes[coalesce_key]
+
+async def _get_task(task_id: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+    """Look up a task; coalesced tasks resolve to the task whose run they share (None once it is gone)"""
+    task = await task_store.get(task_id, include_data=include_data)
+    if task and task.get("coalesced_with"):
+        return await task_store.get(task["coalesced_with"], include_data=include_data)
+    return task
 
 @router.get("/csrf-token")
 async def get_csrf_token():
@@ -45,52 +125,68 @@ async def get_csrf_token():
     return {"csrf_token": token}
 
 @router.post("/scrape", response_model=ScrapeResponse)
-async def scrape_apollo_leads(
-    request: ScrapeRequest,
-    background_tasks: BackgroundTasks
-):
-    """Start Apollo.io lead scraping task"""
+async def scrape_apollo_leads(request: ScrapeRequest):
+    """Queue an Apollo.io lead scraping task with the scrape scheduler"""
     try:
         # Debug logging to help diagnose 422 error
         logger.info(f"Successfully received scraping request: urls={request.urls}, lead_count={request.lead_count}, fields={request.fields}, apify_token={'***' if request.apify_token else 'None'}")
 
         # Generate task ID
         task_id = str(uuid.uuid4())
+        fields = [field.value for field in request.fields]
+
+        # Singleflight: an identical job already in flight is shared instead
+        # of starting the same actor runs again
+        coalesce_key = scrape_cache.make_key(request.urls, fields, request.lead_count)
+        if _worker_mode():
+            await _prune_inflight_scrapes()
+        leader_id = inflight_scrapes.get(coalesce_key)
+        leader = await task_store.get(leader_id, include_data=False) if leader_id else None
+        if leader and leader["status"] in ("pending", "running"):
+            await task_store.create(task_id, {"coalesced_with": leader_id, "status": "coalesced", "created_at": time.time()})
+            subscribers = await task_store.increment(leader_id, "subscribers")
+            logger.info(f"Scraping task {task_id} coalesced with in-flight task {leader_id} ({subscribers} subscribers)")
+
+            return ScrapeResponse(
+                task_id=task_id,
+                status="started",
+                message=f"Attached to identical in-flight task {leader_id}"
+            )
 
         # Initialize task in storage
-        tasks_storage[task_id] = {
-            "status": "pending",
-            "progress": 0,
-            "message": "Task initiated",
-            "data": None,
-            "total_count": 0,
-            "current_url": None,
-            "scraped_count": 0,
-            "urls_processed": 0,
-            "total_urls": len(request.urls),
-            "start_time": None,
-            "estimated_time": "--:--",
-            "processing_rate": 0,
-            "error_count": 0,
-            "total_attempts": 0
-        }
-
-        # Start background scraping task
-        background_tasks.add_task(
-            scrape_leads_background,
-            task_id,
-            request.urls,
-            request.lead_count,
-            [field.value for field in request.fields],
-            request.apify_token
-        )
-
-        logger.info(f"Scraping task started - task_id: {task_id}, urls: {request.urls}")
+        await task_store.create(task_id, _new_task_entry(len(request.urls), coalesce_key))
+        inflight_scrapes[coalesce_key] = task_id
+
+        if _worker_mode():
+            # A worker process claims the job from the durable queue
+            await scrape_job_queue.enqueue(task_id, {
+                "urls": request.urls,
+                "lead_count": request.lead_count,
+                "fields": fields,
+                "apify_token": request.apify_token,
+                "use_token_pool": request.use_token_pool,
+                "priority": request.priority.value
+            }, priority=request.priority.value)
+        else:
+            # Admission control: the scheduler starts the job once a global slot
+            # and a slot for this Apify token are free
+            scrape_scheduler.submit(
+                task_id,
+                request.apify_token,
+                lambda: scrape_leads_background(
+                    task_id, request.urls, request.lead_count, fields, request.apify_token,
+                    use_token_pool=request.use_token_pool
+                ),
+                priority=request.priority.value
+            )
+
+        queue_position, _ = await _queue_info(task_id)
+        logger.info(f"Scraping task submitted - task_id: {task_id}, urls: {request.urls}, queue_position: {queue_position}")
 
         return ScrapeResponse(
             task_id=task_id,
-            status="started",
-            message="Scraping task initiated successfully"
+            status="started" if queue_position is None else "queued",
+            message="Scraping task initiated successfully" if queue_position is None else f"Scraping task queued at position {queue_position}"
         )
 
     except Exception as e:
@@ -100,20 +196,153 @@ async def scrape_apollo_leads(
 @router.get("/scrape/{task_id}")
 async def get_scrape_status(task_id: str):
     """Get scraping task status and results"""
-    if task_id not in tasks_storage:
+    entry = await task_store.get(task_id, include_data=False)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Task not found")
-
-    task = tasks_storage[task_id]
+    job_id = entry.get("coalesced_with") or task_id
+    task = await _get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=410, detail="The task this one was attached to has been removed")
+    queue_position, wait_time = await _queue_info(job_id)
 
     return {
         "task_id": task_id,
+        "coalesced_with": entry.get("coalesced_with"),
         "status": task["status"],
         "progress": task["progress"],
         "message": task["message"],
         "data": task["data"],
-        "total_count": task["total_count"]
+        "total_count": task["total_count"],
+        "lead_accounting": task.get("lead_accounting"),
+        "cache_hit": task.get("cache_hit", False),
+        "queue_position": queue_position,
+        "wait_time": wait_time
+    }
+
+# Apify webhook event types mapped to the run status they report
+WEBHOOK_EVENT_STATUSES = {
+    "ACTOR.RUN.SUCCEEDED": "SUCCEEDED",
+    "ACTOR.RUN.FAILED": "FAILED",
+    "ACTOR.RUN.ABORTED": "ABORTED",
+    "ACTOR.RUN.TIMED_OUT": "TIMED-OUT",
+}
+
+async def _cancel_job(task_id: str):
+    """Cancel the scrape job of task_id and wait briefly for it to wind down"""
+    task = await task_store.get(task_id, include_data=False)
+    await task_store.update(task_id, {"cancel_requested": True})
+    job = running_scrapes.get(task_id)
+    if job is not None:
+        job.cancel()
+        await asyncio.wait({job}, timeout=10)
+        return
+
+    owner = task.get("worker_id")
+    if task["status"] == "running" and owner != INSTANCE_ID and owner_alive(owner, task.get("lease_expires")):
+        # Running in another worker, which polls the store for cancel_requested
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+            task = await task_store.get(task_id, include_data=False)
+            if task["status"] in FINAL_TASK_STATUSES:
+                break
+        return
+
+    # Still queued (here, in another process or in the job queue) or orphaned: it will never start now
+    scrape_scheduler.cancel(task_id)
+    if _worker_mode():
+        await scrape_job_queue.cancel(task_id)
+    await task_store.update(task_id, {"status": "cancelled", "message": "Scraping cancelled before it started"})
+    coalesce_key = task.get("coalesce_key")
+    if coalesce_key and inflight_scrapes.get(coalesce_key) == task_id:
+        del inflight_scrapes[coalesce_key]
+
+@router.delete("/scrape/{task_id}")
+async def cancel_scrape(task_id: str):
+    """
+    Cancel a scraping task, abort its Apify runs and keep the partial results
+
+    Coalesced tasks share one job; each cancel drops one subscriber and the
+    job itself is only cancelled when no subscriber is left. Cancelling the
+    same task again is refused.
+    """
+    entry = await task_store.get(task_id, include_data=False)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    job_id = entry.get("coalesced_with") or task_id
+    job_task = await task_store.get(job_id, include_data=False)
+    if job_task is None or job_task["status"] in FINAL_TASK_STATUSES:
+        raise HTTPException(status_code=409, detail="Task has already finished")
+    # Each caller detaches once; a repeated cancel must not drop another subscriber
+    if await task_store.increment(task_id, "cancel_calls") > 1:
+        raise HTTPException(status_code=409, detail="Task was already cancelled")
+
+    subscribers = max(0, await task_store.increment(job_id, "subscribers", -1))
+    if subscribers == 0:
+        logger.info(f"Cancelling scraping job {job_id} (requested via task {task_id})")
+        await _cancel_job(job_id)
+    else:
+        logger.info(f"Task {task_id} detached from job {job_id}; {subscribers} subscribers remain")
+
+    if job_id != task_id:
+        # Keep what the shared job had ingested so far for this subscriber
+        job_task = await task_store.get(job_id)
+        data = job_task.get("data") or []
+        await task_store.create(task_id, {
+            **{key: value for key, value in job_task.items() if key not in ("coalesce_key", "subscribers")},
+            "status": "cancelled",
+            "message": f"Scraping cancelled - kept {len(data)} leads",
+            "data": data,
+            "total_count": len(data),
+            "scraped_count": len(data)
+        })
+
+    task = await _get_task(task_id, include_data=False)
+    detached = task["status"] not in FINAL_TASK_STATUSES
+    return {
+        "task_id": task_id,
+        "status": "detached" if detached else task["status"],
+        "message": f"Job continues for {subscribers} other subscribers" if detached else task["message"],
+        "scraped_count": task["data_length"]
     }
 
+@router.post("/webhooks/apify")
+async def apify_run_webhook(request: Request):
+    """
+    Receive Apify run-finished webhooks and wake the task waiting on that run
+
+    Only served in webhook mode, and only for events carrying the shared
+    secret. The event must reach the process watching the run; with several
+    uvicorn workers it may land elsewhere, and that run then finishes at its
+    next safety poll.
+    """
+    if not settings.apify_webhook_base_url:
+        raise HTTPException(status_code=404, detail="Apify webhooks are not enabled")
+    received_secret = request.headers.get(WEBHOOK_SECRET_HEADER, "")
+    if not settings.apify_webhook_secret or not hmac.compare_digest(received_secret, settings.apify_webhook_secret):
+        logger.warning("Rejected Apify webhook with invalid secret")
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    event_type = payload.get("eventType")
+    run = dict(payload.get("resource") or {})
+    run_id = (payload.get("eventData") or {}).get("actorRunId") or run.get("id")
+    if not run_id:
+        raise HTTPException(status_code=400, detail="Webhook payload has no run id")
+
+    run["id"] = run_id
+    if event_type in WEBHOOK_EVENT_STATUSES and run.get("status") not in TERMINAL_RUN_STATUSES:
+        run["status"] = WEBHOOK_EVENT_STATUSES[event_type]
+
+    resolved = dispatch_run_event(run_id, run)
+    logger.info(f"Apify webhook {event_type} for run {run_id} - resolved waiting task: {resolved}")
+    return {"status": "ok", "run_id": run_id, "resolved": resolved}
+
 @router.post("/export/sheets")
 async def export_to_sheets(request: SheetsRequest):
     """Export data to Google Sheets"""
@@ -168,23 +397,21 @@ async def export_to_notion(request: NotionRequest):
 @router.get("/export/csv/{task_id}")
 async def export_csv(task_id: str):
     """Export task results as CSV with proper formatting"""
-    if task_id not in tasks_storage:
+    task = await _get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = tasks_storage[task_id]
     if not task["data"]:
         raise HTTPException(status_code=400, detail="No data available for export")
 
     try:
-        # Create CSV content with cleaned data
+        # Create CSV content
         output = io.StringIO()
         if task["data"]:
-            # Clean and validate data before export
-            cleaned_data = _clean_export_data(task["data"])
-            if cleaned_data:
-                writer = csv.DictWriter(output, fieldnames=cleaned_data[0].keys())
-                writer.writeheader()
-                writer.writerows(cleaned_data)
+            # Leads are stored canonical; CSV only renders phones as text
+            writer = csv.DictWriter(output, fieldnames=task["data"][0].keys())
+            writer.writeheader()
+            writer.writerows(render_csv_rows(task["data"]))
 
         csv_content = output.getvalue()
         output.close()
@@ -206,10 +433,10 @@ async def export_csv(task_id: str):
 @router.get("/export/json/{task_id}")
 async def export_json(task_id: str):
     """Export task results as JSON"""
-    if task_id not in tasks_storage:
+    task = await _get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = tasks_storage[task_id]
     if not task["data"]:
         raise HTTPException(status_code=400, detail="No data available for export")
 
@@ -318,14 +545,13 @@ async def test_notion_connection(notion_token: str = None):
 async def debug_last_task(task_id: str):
     """Debug endpoint to get the complete task storage data"""
     try:
-        if task_id not in tasks_storage:
+        task_data = await _get_task(task_id)
+        if task_data is None:
             return {
                 "error": f"Task {task_id} not found",
-                "available_tasks": list(tasks_storage.keys())
+                "available_tasks": list(await task_store.list_tasks())
             }
 
-        task_data = tasks_storage[task_id]
-
         # Create a safe copy for debugging
         debug_data = {
             "task_id": task_id,
@@ -354,18 +580,20 @@ async def debug_last_task(task_id: str):
 async def debug_all_tasks():
     """Debug endpoint to see all task IDs and their basic info"""
     try:
+        tasks = await task_store.list_tasks()
         tasks_info = {}
-        for task_id, task_data in tasks_storage.items():
+        for task_id, task_data in tasks.items():
+            task_data = tasks.get(task_data.get("coalesced_with"), task_data)
             tasks_info[task_id] = {
                 "status": task_data.get("status"),
                 "progress": task_data.get("progress"),
                 "total_count": task_data.get("total_count", 0),
-                "data_length": len(task_data.get("data", [])),
-                "has_data": bool(task_data.get("data"))
+                "data_length": task_data.get("data_length", 0),
+                "has_data": bool(task_data.get("data_length"))
             }
 
         return {
-            "total_tasks": len(tasks_storage),
+            "total_tasks": len(tasks),
             "tasks": tasks_info
         }
 
@@ -373,6 +601,33 @@ async def debug_all_tasks():
         logger.error(f"Debug all tasks endpoint error: {str(e)}", exc_info=True)
         return {"error": str(e)}
 
+@router.get("/debug/apify-pool")
+async def debug_apify_pool():
+    """Debug endpoint showing pooled Apify clients and connection reuse"""
+    return apify_pool.metrics()
+
+@router.get("/debug/apify-token-pool")
+async def debug_apify_token_pool():
+    """Debug endpoint showing leases, quota and usage per pooled Apify token"""
+    return apify_token_pool.stats()
+
+@router.get("/debug/normalization-pool")
+async def debug_normalization_pool():
+    """Debug endpoint showing rows normalized in worker processes and inline"""
+    return normalization_pool.stats()
+
+@router.get("/debug/scrape-cache")
+async def debug_scrape_cache():
+    """Debug endpoint showing scrape result cache statistics"""
+    return scrape_cache.stats()
+
+@router.get("/debug/scheduler")
+async def debug_scheduler():
+    """Debug endpoint showing the scrape job queue and running jobs"""
+    if _worker_mode():
+        return {"execution_mode": "worker", "job_queue": await scrape_job_queue.stats()}
+    return scrape_scheduler.stats()
+
 @router.get("/sse/progress/{task_id}")
 async def sse_progress(task_id: str, request: Request):
     """
@@ -394,8 +649,8 @@ async def sse_progress(task_id: str, request: Request):
                     logger.info(f"SSE client disconnected for task {task_id}")
                     break
 
-                # Get task from storage
-                task = tasks_storage.get(task_id)
+                # Get task from storage (status fields only, the leads are not streamed)
+                task = await _get_task(task_id, include_data=False)
                 if not task:
                     # Send an error event and close
                     yield f"data: {json.dumps({'error': 'Task not found', 'detail': 'Task not found'})}\n\n"
@@ -443,7 +698,7 @@ async def sse_progress(task_id: str, request: Request):
                     logger.debug(f"SSE update sent for task {task_id}: {pct}% - {msg}")
 
                 # If task completed or failed, send final update and close
-                if status in ["completed", "failed"] or pct >= 100:
+                if status in FINAL_TASK_STATUSES or pct >= 100:
                     # Send final completion event
                     final_payload = {
                         "percentage": 100 if status == "completed" else pct,
@@ -480,123 +735,84 @@ async def sse_progress(task_id: str, request: Request):
         }
     )
 
-def _clean_export_data(data: List[Dict]) -> List[Dict]:
-    """Clean and validate data before export with proper phone formatting"""
-    cleaned_data = []
-
-    for item in data:
-        cleaned_item = {}
-        for key, value in item.items():
-            if value is None:
-                cleaned_item[key] = ""
-            elif key.lower() == 'phone' and isinstance(value, str):
-                # Format phone numbers to prevent scientific notation
-                # Add apostrophe prefix to force text interpretation in Excel/Google Sheets
-                formatted_phone = _format_phone_for_export(value)
-                cleaned_item[key] = formatted_phone
-            elif isinstance(value, str):
-                # Remove problematic characters for CSV/cloud export
-                cleaned_value = value.replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
-                cleaned_value = ' '.join(cleaned_value.split())  # Remove extra whitespace
-                cleaned_item[key] = cleaned_value
-            else:
-                cleaned_item[key] = str(value)
-
-        # Only include items with at least one non-empty field
-        if any(val.strip() for val in cleaned_item.values() if isinstance(val, str)):
-            cleaned_data.append(cleaned_item)
-
-    return cleaned_data
-
-def _format_phone_for_export(phone: str) -> str:
-    """Format phone number for CSV/Excel export to prevent scientific notation"""
-    if not phone or not isinstance(phone, str):
-        return ""
-
-    phone = phone.strip()
-    if not phone:
-        return ""
-
-    # Validate phone format first
-    if not _validate_phone_format(phone):
-        logger.debug(f"Invalid phone format rejected for export: '{phone}'")
-        return f"'{phone}" if phone else ""  # Still prefix with apostrophe for safety
-
-    # Format to international standard if possible
-    formatted_phone = _format_international_phone(phone)
-
-    # Add apostrophe prefix to force text interpretation in Excel/Google Sheets
-    return f"'{formatted_phone}"
-
-def _validate_phone_format(phone: str) -> bool:
-    """Validate phone number format"""
-    if not phone or not isinstance(phone, str):
-        return False
-
-    # Remove formatting to get digits only
-    import re
-    digits_only = ''.join(filter(str.isdigit, phone))
-
-    # Should have between 7-15 digits for valid international numbers
-    # 7 digits minimum for local numbers, 15 maximum per ITU-T E.164
-    return 7 <= len(digits_only) <= 15
-
-def _format_international_phone(phone: str, default_country_code: str = "+1") -> str:
-    """Format phone to international standard"""
-    if not phone:
-        return ""
-
-    import re
-
-    # Clean the phone number but preserve + sign
-    phone = phone.strip().replace(" ", "").replace("-", "").replace("(", "").replace(")", "").replace(".", "")
-
-    # Already in international format with +
-    if phone.startswith("+"):
-        return phone
-
-    # European format with 00 prefix (e.g. 00441625505300)
-    elif phone.startswith("00"):
-        return f"+{phone[2:]}"
-
-    # US/Canada format with leading 1 (e.g. 14155551234)
-    elif len(phone) == 11 and phone.startswith("1"):
-        return f"+{phone}"
-
-    # Standard US/Canada format without country code (e.g. 4155551234)
-    elif len(phone) == 10:
-        return f"{default_country_code}{phone}"
-
-    # For other formats, try to determine if it needs a country code
-    elif len(phone) >= 7:
-        # If it looks like it might need a country code (7-10 digits), add default
-        if len(phone) <= 10:
-            return f"{default_country_code}{phone}"
-        else:
-            # Assume it already includes country code, just add +
-            return f"+{phone}"
-
-    # Return as-is if we can't determine format
-    return phone
+async def _abort_live_runs(apify_client, runs: List[Dict[str, Any]]):
+    """Abort the recorded Apify runs that have not finished; returns (aborted, live) counts"""
+    live_runs = [run for run in runs if run.get("status") not in TERMINAL_RUN_STATUSES]
+    aborted = await asyncio.gather(*(apify_client.abort_run(run["run_id"], run.get("token_id")) for run in live_runs))
+    for run, was_aborted in zip(live_runs, aborted):
+        if was_aborted:
+            run["status"] = "ABORTED"
+    return sum(aborted), len(live_runs)
+
+async def _watch_shared_task(task_id: str, job: asyncio.Task):
+    """Renew this process's lease on the task and cancel job once a worker sharing the task store has requested it"""
+    renew_at = time.monotonic() + settings.task_lease_seconds / 3
+    while not job.done():
+        await asyncio.sleep(settings.task_store_cancel_poll_interval)
+        try:
+            if time.monotonic() >= renew_at:
+                await task_store.update(task_id, lease_fields())
+                renew_at = time.monotonic() + settings.task_lease_seconds / 3
+            task = await task_store.get(task_id, include_data=False)
+        except TaskStoreError as e:
+            logger.warning(f"Cancel check for task {task_id} failed: {str(e)}")
+            continue
+        if task and task.get("cancel_requested"):
+            logger.info(f"Scraping task {task_id} cancelled from another worker")
+            job.cancel()
+            return
 
 async def scrape_leads_background(
     task_id: str, 
     urls: list, 
     lead_count: int, 
     fields: list,
-    apify_token: str
+    apify_token: str,
+    resume_from: Optional[Dict[str, Any]] = None,
+    use_token_pool: bool = False
 ):
-    """Enhanced background task with real-time Apify log integration"""
+    """
+    Enhanced background task with real-time Apify log integration
+
+    Run ids, dataset offsets and ingested leads are checkpointed as the task
+    progresses. With resume_from (a checkpoint loaded after a restart) the
+    recorded leads are restored, runs that were still being ingested are
+    re-attached at their dataset offsets and finished URLs are skipped.
+    """
     import time
     import asyncio
 
+    initial_task = await task_store.get(task_id, include_data=False)
+    coalesce_key = initial_task.get("coalesce_key")
+    if initial_task.get("cancel_requested"):
+        logger.info(f"Scraping task {task_id} was cancelled before it started")
+        if coalesce_key and inflight_scrapes.get(coalesce_key) == task_id:
+            del inflight_scrapes[coalesce_key]
+        return
+
+    running_scrapes[task_id] = asyncio.current_task()
+    task_watcher = None
+    if task_store.shared:
+        # A DELETE may land on another worker; it can only reach this job through
+        # the store. Other workers also take the task over unless its lease is renewed
+        task_watcher = asyncio.create_task(_watch_shared_task(task_id, asyncio.current_task()))
     start_time = time.time()
     total_urls = len(urls)
+    checkpoint = TaskCheckpoint(
+        checkpoint_store,
+        task_id,
+        {"urls": urls, "lead_count": lead_count, "fields": fields, "apify_token": apify_token,
+         "use_token_pool": use_token_pool, "started_at": start_time},
+        enabled=settings.scrape_checkpoints_enabled,
+        runs=resume_from.get("runs") if resume_from else None,
+        urls_done=resume_from.get("urls_done") if resume_from else None
+    )
 
     try:
         # Initialize task with enhanced progress tracking
-        tasks_storage[task_id].update({
+        await task_store.update(task_id, {
             "status": "running",
+            **lease_fields(),
             "progress": 5,
             "message": "Initializing Apollo.io scraper...",
             "current_url": None,
@@ -609,19 +825,17 @@ async def scrape_leads_background(
             "error_count": 0,
             "total_attempts": 0,
             "apify_run_id": None,
-            "apify_log_url": None
+            "apify_log_url": None,
+            "data": []
         })
 
-        # Brief pause for UI to register the initial state
-        await asyncio.sleep(1)
-
         # Create progress callback for real-time updates
         async def progress_callback(progress_data):
             """Callback to update task storage with real-time Apify progress"""
             if not progress_data:
                 return
                 
-            current_task = tasks_storage.get(task_id, {})
+            current_task = await task_store.get(task_id, include_data=False) or {}
             
             # Update with Apify progress data
             updates = {}
@@ -650,8 +864,7 @@ async def scrape_leads_background(
                 updates['error_count'] = current_task.get('error_count', 0) + 1
             
             # Update task storage
-            current_task.update(updates)
-            tasks_storage[task_id] = current_task
+            await task_store.update(task_id, updates)
             
             logger.debug(f"Real-time progress update for task {task_id}: {updates}")
 
@@ -659,172 +872,363 @@ async def scrape_leads_background(
         from app.clients.apify_client import ApifyApolloClient
 
         # Pass the token directly to the constructor
-        user_apify_client = ApifyApolloClient(apify_token=apify_token)
+        user_apify_client = ApifyApolloClient(apify_token=apify_token, use_token_pool=use_token_pool)
 
         # Update progress - Starting scraping
-        tasks_storage[task_id].update({
+        await task_store.update(task_id, {
             "progress": 10,
             "message": "Connecting to Apollo.io..."
         })
-        await asyncio.sleep(0.5)
 
-        all_scraped_data = []
-        total_scraped = 0
-
-        # Process each URL with detailed progress tracking
-        for url_index, url in enumerate(urls):
-            try:
-                # Update current URL being processed
-                current_progress = 10 + (url_index / total_urls) * 80
-                elapsed_time = time.time() - start_time
+        # Leads restored from a checkpoint; a resumed run may deliver some of them again
+        restored_keys = set()
+        restored_count = 0
+        if resume_from:
+            restored_leads = []
+            for lead in resume_from.get("leads", []):
+                key = lead_key(lead)
+                if key is not None:
+                    if key in restored_keys:
+                        continue
+                    restored_keys.add(key)
+                restored_leads.append(lead)
+            del restored_leads[lead_count:]
+            restored_count = len(restored_leads)
+            await task_store.update(task_id, {
+                "data": restored_leads,
+                "scraped_count": restored_count,
+                "message": f"Resumed after restart with {restored_count} leads"
+            })
+            logger.info(f"Resuming task {task_id}: {restored_count} leads restored, {len(checkpoint.runs)} runs recorded")
+
+        # Unique leads across all URLs; sizes each URL's request and signals
+        # when the de-duplicated target is met. URLs finished or re-attached
+        # after a restart are not planned again
+        resumed_urls = set(checkpoint.state["urls_done"]) | {run["url_index"] for run in checkpoint.runs.values()}
+        allocator = LeadAllocator(
+            lead_count,
+            margin=settings.scrape_allocation_margin,
+            known_keys=restored_keys,
+            kept=restored_count,
+            urls=total_urls - len(resumed_urls),
+            # Counters carry on from the checkpoint; older checkpoints only know their runs
+            accounting=resume_from.get("lead_accounting") or {
+                "requested": sum(run.get("records", 0) for run in checkpoint.runs.values())
+            } if resume_from else None
+        )
+        checkpoint.state["lead_accounting"] = allocator.stats()
+        await checkpoint.flush()
+
+        # Per-URL actor runs execute concurrently, bounded by the semaphore.
+        # Pages are de-duplicated across URLs as they land; once the target
+        # is met, runs still going are stopped and aborted.
+        url_semaphore = asyncio.Semaphore(max(1, settings.scrape_url_concurrency))
+
+        async def scrape_url(url_index: int, url: str):
+            if url_index in checkpoint.state["urls_done"]:
+                # Finished before the restart
+                return url_index, url, None, 0
+
+            async with url_semaphore:
+                # Runs started before a restart are re-attached instead of re-scraped
+                recorded_runs = [run for run in checkpoint.runs.values() if run["url_index"] == url_index]
+
+                # This URL's share of the leads still missing
+                reservation = None if recorded_runs else await allocator.reserve()
+                if reservation is None and not recorded_runs:
+                    logger.info(f"Target lead count {lead_count} already reached. Skipping URL {url_index + 1}.")
+                    return url_index, url, None, 0
+
+                url_lead_count = reservation["request"] if reservation else 0
+
+                await task_store.increment(task_id, "total_attempts")
+                await task_store.update(task_id, {
+                    "message": f"Extracting leads from {url[:50]}...",
+                    "current_url": url
+                })
 
-                # Calculate ETA
-                if url_index > 0:
-                    avg_time_per_url = elapsed_time / url_index
-                    remaining_urls = total_urls - url_index
-                    eta_seconds = remaining_urls * avg_time_per_url
-                    eta_minutes = int(eta_seconds // 60)
-                    eta_seconds = int(eta_seconds % 60)
-                    estimated_time = f"{eta_minutes:02d}:{eta_seconds:02d}"
+                logger.info(f"Scraping URL {url_index + 1}/{total_urls}: {url[:100]} - requesting {url_lead_count} leads with fields: {fields}")
+
+                url_added = 0
+
+                async def store_page(leads: List[Dict]) -> bool:
+                    """Keep the new leads of one canonical page and say whether to read on"""
+                    # Leads are held only by the task store, appended page by page
+                    nonlocal url_added
+                    new_leads = allocator.admit(leads, reservation)
+                    checkpoint.add_leads(new_leads)
+                    checkpoint.state["lead_accounting"] = allocator.stats()
+                    url_added += len(new_leads)
+                    await task_store.append_data(task_id, new_leads, {
+                        "scraped_count": allocator.kept,
+                        "lead_accounting": allocator.stats()
+                    })
+                    return not allocator.satisfied.is_set()
+
+                async def record_run(run_state: Dict[str, Any]):
+                    await checkpoint.record_run(run_state, url_index)
+
+                async def run_url() -> Dict[str, Any]:
+                    if recorded_runs:
+                        await asyncio.gather(*(
+                            user_apify_client.resume_run(run, fields, store_page, on_run=record_run)
+                            for run in recorded_runs if not run["ingested"]
+                        ))
+                        return {"status": "success", "data": [], "message": f"Resumed {len(recorded_runs)} Apify runs"}
+                    return await user_apify_client.scrape_apollo_leads(
+                        urls=[url],
+                        lead_count=url_lead_count,
+                        fields=fields,
+                        on_page=store_page,
+                        on_run=record_run
+                    )
+
+                # Stop this URL once the task's target is met. A URL in the
+                # middle of a page gets a moment to return on its own (and
+                # cache what it read); runs idle between dataset pages are
+                # cancelled
+                url_run = asyncio.create_task(run_url())
+                target_met = asyncio.create_task(allocator.satisfied.wait())
+                try:
+                    await asyncio.wait({url_run, target_met}, return_when=asyncio.FIRST_COMPLETED)
+                    if not url_run.done():
+                        await asyncio.wait({url_run}, timeout=URL_STOP_GRACE_SECONDS)
+                finally:
+                    target_met.cancel()
+                    if not url_run.done():
+                        url_run.cancel()
+                await asyncio.gather(url_run, return_exceptions=True)
+                # Whatever this URL fell short by goes to the URLs after it
+                await allocator.release(reservation)
+
+                if url_run.cancelled():
+                    url_runs = [run for run in checkpoint.runs.values() if run["url_index"] == url_index]
+                    aborted, live = await _abort_live_runs(user_apify_client, url_runs)
+                    logger.info(f"Target lead count {lead_count} reached - stopped URL {url_index + 1}, aborted {aborted}/{live} Apify runs")
+                    result = {"status": "success", "data": [], "message": "Stopped once the target was reached"}
+                elif url_run.exception() is not None:
+                    url_error = url_run.exception()
+                    logger.error(f"Error processing URL {url}: {str(url_error)}", exc_info=url_error)
+                    result = {"status": "error", "data": [], "message": str(url_error)}
                 else:
-                    estimated_time = "--:--"
-
-                tasks_storage[task_id].update({
-                    "progress": int(current_progress),
-                    "message": f"Scraping URL {url_index + 1} of {total_urls}...",
-                    "current_url": url,
-                    "urls_processed": url_index,
-                    "estimated_time": estimated_time,
-                    "total_attempts": tasks_storage[task_id]["total_attempts"] + 1
-                })
+                    result = url_run.result()
 
-                # Calculate how many leads we need from this URL
-                remaining_leads = lead_count - total_scraped
-                if remaining_leads <= 0:
-                    logger.info(f"Target lead count {lead_count} already reached. Skipping remaining URLs.")
-                    break
+                return url_index, url, result, url_added
+
+        url_jobs = [
+            asyncio.create_task(scrape_url(url_index, url))
+            for url_index, url in enumerate(urls)
+        ]
+        urls_processed = 0
+        urls_scraped = 0
+        cache_hits = 0
 
-                # Perform scraping for this URL - limit to remaining needed
-                url_lead_count = min(remaining_leads, lead_count // total_urls + 100)
+        try:
+            for finished in asyncio.as_completed(url_jobs):
+                url_index, url, result, url_added = await finished
+                urls_processed += 1
+                elapsed_time = time.time() - start_time
 
-                # Update message for active scraping
-                tasks_storage[task_id]["message"] = f"Extracting leads from {url[:50]}..."
+                # Calculate ETA from completed runs
+                if urls_processed < total_urls:
+                    avg_time_per_url = elapsed_time / urls_processed
+                    eta_seconds = (total_urls - urls_processed) * avg_time_per_url
+                    estimated_time = f"{int(eta_seconds // 60):02d}:{int(eta_seconds % 60):02d}"
+                else:
+                    estimated_time = "00:00"
 
-                # DEBUG: Log the scraping attempt
-                logger.info(f"DEBUG: Attempting to scrape URL {url_index + 1}: {url[:100]}...")
-                logger.info(f"DEBUG: Requesting {url_lead_count} leads with fields: {fields}")
+                await task_store.update(task_id, {
+                    "progress": int(10 + (urls_processed / total_urls) * 80),
+                    "urls_processed": urls_processed,
+                    "estimated_time": estimated_time
+                })
 
-                result = await user_apify_client.scrape_apollo_leads(
-                    urls=[url],
-                    lead_count=url_lead_count,
-                    fields=fields
-                )
+                await checkpoint.mark_url_done(url_index)
 
-                # DEBUG: Log the raw result from Apify
-                logger.info(f"DEBUG: Apify result status: {result.get('status')}")
-                logger.info(f"DEBUG: Apify result data length: {len(result.get('data', []))}")
-                if result.get('data') and len(result['data']) > 0:
-                    logger.info(f"DEBUG: Sample Apify lead: {result['data'][0]}")
+                if result is None:
+                    continue
 
-                if result["status"] == "success" and result["data"]:
-                    # Clean and add data
-                    cleaned_data = _clean_export_data(result["data"])
+                urls_scraped += 1
+                if result.get("cache_hit"):
+                    cache_hits += 1
 
-                    # DEBUG: Log the cleaning process
-                    logger.info(f"DEBUG: Before cleaning: {len(result['data'])} items")
-                    logger.info(f"DEBUG: After cleaning: {len(cleaned_data)} items")
-                    if cleaned_data:
-                        logger.info(f"DEBUG: Sample cleaned lead: {cleaned_data[0]}")
+                logger.info(f"Apify result for URL {url_index + 1}: status={result.get('status')}, leads added={url_added}, cache_hit={bool(result.get('cache_hit'))}")
 
-                    all_scraped_data.extend(cleaned_data)
-                    total_scraped += len(cleaned_data)
+                if result["status"] == "success" and url_added:
+                    total_scraped = allocator.kept
 
-                    # Update scraped count with current totals
-                    tasks_storage[task_id].update({
+                    await task_store.update(task_id, {
                         "scraped_count": total_scraped,
-                        "urls_processed": url_index + 1,
-                        "message": f"Found {len(cleaned_data)} leads from URL {url_index + 1}. Total: {total_scraped} leads"
+                        "message": f"Found {url_added} leads from URL {url_index + 1}. Total: {total_scraped} leads"
                     })
 
                     # Calculate processing rate
                     if elapsed_time > 0:
                         processing_rate = round((total_scraped / elapsed_time) * 60)  # leads per minute
-                        tasks_storage[task_id]["processing_rate"] = processing_rate
+                        await task_store.update(task_id, {"processing_rate": processing_rate})
                 else:
                     # Handle URL with no results
-                    logger.warning(f"DEBUG: No results from URL {url_index + 1}: {result.get('message', 'Unknown error')}")
-                    tasks_storage[task_id].update({
-                        "urls_processed": url_index + 1,
-                        "error_count": tasks_storage[task_id]["error_count"] + 1,
-                        "message": f"No leads found from URL {url_index + 1}. Total: {total_scraped} leads"
+                    logger.warning(f"No results from URL {url_index + 1}: {result.get('message', 'Unknown error')}")
+                    await task_store.increment(task_id, "error_count")
+                    await task_store.update(task_id, {
+                        "message": f"No leads found from URL {url_index + 1}. Total: {allocator.kept} leads"
                     })
 
-                # Brief pause to allow UI updates
-                await asyncio.sleep(0.3)
-
                 # Check if we've reached our target
-                if total_scraped >= lead_count:
+                if allocator.satisfied.is_set():
                     logger.info(f"Target lead count {lead_count} reached. Stopping URL processing.")
                     break
-
-            except Exception as url_error:
-                logger.error(f"Error processing URL {url}: {str(url_error)}", exc_info=True)
-                tasks_storage[task_id].update({
-                    "error_count": tasks_storage[task_id]["error_count"] + 1,
-                    "message": f"Error with URL {url_index + 1}, continuing with next..."
-                })
-                await asyncio.sleep(0.5)
+        finally:
+            # Once the target is met the remaining URL jobs stop (and abort
+            # their runs) on their own; otherwise they are no longer needed
+            if not allocator.satisfied.is_set():
+                for job in url_jobs:
+                    if not job.done():
+                        job.cancel()
+            await asyncio.gather(*url_jobs, return_exceptions=True)
+            await user_apify_client.close()
 
         # Final processing and completion
-        tasks_storage[task_id].update({
+        await task_store.update(task_id, {
             "progress": 95,
             "message": "Finalizing results and cleaning data..."
         })
-        await asyncio.sleep(1)
 
-        # Final data processing
-        final_data = all_scraped_data[:lead_count]  # Limit to requested count
-        final_count = len(final_data)
+        # Final data processing - pages were capped at lead_count as they arrived
+        final_count = allocator.kept
 
         # DEBUG: Log the final data before storing
         logger.info(f"DEBUG: Final processing complete")
-        logger.info(f"DEBUG: Total scraped data: {len(all_scraped_data)} items")
-        logger.info(f"DEBUG: Final data (after limit): {final_count} items")
-        logger.info(f"DEBUG: Final data sample: {final_data[0] if final_data else 'No data'}")
+        logger.info(f"DEBUG: Final data: {final_count} items")
 
         # Calculate final metrics
         total_elapsed = time.time() - start_time
         final_rate = round((final_count / total_elapsed) * 60) if total_elapsed > 0 else 0
 
-        # Complete the task
-        tasks_storage[task_id].update({
+        # The task counts as a cache hit when every URL was served from cache
+        cache_hit = cache_hits > 0 and cache_hits == urls_scraped
+
+        lead_accounting = allocator.stats()
+        logger.info(f"Lead accounting for task {task_id}: {lead_accounting}")
+
+        # Complete the task; the leads themselves were stored page by page
+        await task_store.update(task_id, {
             "status": "completed",
             "progress": 100,
-            "message": f"Scraping completed! Successfully extracted {final_count} leads",
-            "data": final_data,
+            "cache_hit": cache_hit,
+            "message": f"Scraping completed! Successfully extracted {final_count} leads" + (" (from cache)" if cache_hit else ""),
             "total_count": final_count,
             "scraped_count": final_count,
             "urls_processed": total_urls,
             "processing_rate": final_rate,
-            "estimated_time": "00:00"
+            "estimated_time": "00:00",
+            "lead_accounting": lead_accounting
         })
+        await checkpoint.delete()
 
         # FINAL DEBUG: Log the complete task storage entry
         logger.info(f"DEBUG: Task {task_id} completed successfully")
-        logger.info(f"DEBUG: Stored data length: {len(tasks_storage[task_id].get('data', []))}")
-        logger.info(f"DEBUG: Task status: {tasks_storage[task_id]['status']}")
+        stored_task = await task_store.get(task_id, include_data=False)
+        logger.info(f"DEBUG: Stored data length: {stored_task['data_length']}")
+        logger.info(f"DEBUG: Task status: {stored_task['status']}")
 
         logger.info(f"Enhanced background scraping task completed - task_id: {task_id}, total_scraped: {final_count}, elapsed_time: {total_elapsed}")
 
+    except asyncio.CancelledError:
+        if not (await task_store.get(task_id, include_data=False)).get("cancel_requested"):
+            # Server shutdown - keep the checkpoint so the task resumes on restart
+            raise
+
+        # Stop the actor runs so they free concurrency slots and stop billing
+        from app.clients.apify_client import ApifyApolloClient
+        aborted, live = await _abort_live_runs(
+            ApifyApolloClient(apify_token=apify_token, use_token_pool=use_token_pool), list(checkpoint.runs.values())
+        )
+
+        kept = (await task_store.get(task_id, include_data=False))["data_length"]
+        await task_store.update(task_id, {
+            "status": "cancelled",
+            "message": f"Scraping cancelled - kept {kept} leads",
+            "total_count": kept,
+            "scraped_count": kept,
+            "estimated_time": "00:00"
+        })
+        await checkpoint.delete()
+        logger.info(f"Scraping task {task_id} cancelled - aborted {aborted}/{live} Apify runs, kept {kept} leads")
+
     except Exception as e:
         logger.error(f"Enhanced background scraping task failed - task_id: {task_id}, error: {str(e)}", exc_info=True)
 
-        tasks_storage[task_id].update({
+        await task_store.increment(task_id, "error_count")
+        await task_store.update(task_id, {
             "status": "failed",
             "progress": 0,
-            "message": f"Scraping failed: {str(e)}",
-            "error_count": tasks_storage[task_id].get("error_count", 0) + 1
+            "message": f"Scraping failed: {str(e)}"
         })
+        await checkpoint.delete()
+
+    finally:
+        running_scrapes.pop(task_id, None)
+        if task_watcher is not None:
+            task_watcher.cancel()
+        # Identical requests arriving from now on start a fresh job (or hit the cache)
+        if coalesce_key and inflight_scrapes.get(coalesce_key) == task_id:
+            del inflight_scrapes[coalesce_key]
+
+async def _resume_after(delay: float):
+    global resume_retry
+    await asyncio.sleep(delay)
+    resume_retry = None
+    await resume_checkpointed_scrapes()
+
+async def resume_checkpointed_scrapes() -> int:
+    """
+    Restart scrape tasks interrupted by a shutdown from their checkpoints
+
+    Tasks whose lease another process still holds are left to it; if that
+    process is gone (e.g. this server before a quick restart) the lease
+    runs out and they are tried again then.
+    """
+    global resume_retry
+    if not settings.scrape_checkpoints_enabled:
+        return 0
+
+    resumed = 0
+    retry_at = 0.0
+    for checkpoint in await checkpoint_store.load_all():
+        task_id = checkpoint["task_id"]
+        coalesce_key = scrape_cache.make_key(checkpoint["urls"], checkpoint["fields"], checkpoint["lead_count"])
+        # With a shared task store every worker sees the checkpoint; the
+        # first one to claim the task resumes it
+        if not await task_store.claim(task_id, {**_new_task_entry(len(checkpoint["urls"]), coalesce_key), "resumed": True}):
+            holder = await task_store.get(task_id, include_data=False)
+            if holder and holder.get("worker_id") != INSTANCE_ID:
+                retry_at = max(retry_at, holder.get("lease_expires") or 0)
+            continue
+        inflight_scrapes[coalesce_key] = task_id
+
+        # Resumed jobs have live Apify runs, so they go ahead of new work
+        scrape_scheduler.submit(
+            task_id,
+            checkpoint["apify_token"],
+            lambda checkpoint=checkpoint: scrape_leads_background(
+                checkpoint["task_id"],
+                checkpoint["urls"],
+                checkpoint["lead_count"],
+                checkpoint["fields"],
+                checkpoint["apify_token"],
+                resume_from=checkpoint,
+                use_token_pool=checkpoint.get("use_token_pool", False)
+            ),
+            priority="high"
+        )
+        resumed += 1
+
+    if resumed:
+        logger.info(f"Resumed {resumed} scrape tasks from checkpoints")
+    if retry_at and (resume_retry is None or resume_retry.done()):
+        resume_retry = asyncio.create_task(_resume_after(max(0.0, retry_at - time.time()) + 1))
+    return resumed
 
 @router.post("/debug/test-request")
 async def test_request(request: Request):
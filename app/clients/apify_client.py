@@ -1,35 +1,50 @@
 import asyncio
-import re
 import time
-from typing import List, Dict, Any, Optional
-from apify_client import ApifyClient
-from tenacity import retry, stop_after_attempt, wait_exponential
+from contextlib import aclosing, asynccontextmanager
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from app.core.config import settings
-import ast
-import json
-import os
-import logging
-import httpx
+from tenacity import retry_if_exception
+from app.clients.apify_logs import ApolloLogParser, LogTailer
+from app.clients.apify_pool import apify_pool
+from app.clients.apify_token_pool import apify_token_pool
+from app.clients.apify_transport import DatasetTail, apify_retrying, is_transient_error
+from app.clients.normalization_pool import normalization_pool
+from app.clients.scrape_cache import scrape_cache
+from app.core.exceptions import CircuitOpenError, ExternalAPIError
+from app.clients.shard_planner import plan_shards, lead_key
 from app.utils.logging_config import setup_logging
 
 # Setup logging
 logger = setup_logging()
 
+DEFAULT_FIELDS = [
+    "name", "email", "phone", "company", "title", "location",
+    "industry", "linkedin", "twitter", "instagram", "facebook", "website"
+]
+
 class ApolloClient:
     def __init__(self):
         self.api_key = settings.APIFY_API_KEY
-        self.base_url = "https://api.apify.com/v2"
         self.actor_id = settings.APIFY_ACTOR_ID
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.transport = apify_pool.get(self.api_key)
+        self.base_url = self.transport.base_url
         logger.info("ApolloClient initialized")
 
+    @property
+    def client(self):
+        """The pooled transport's HTTP client, reopened if the pool closed it while idle"""
+        return self.transport.http_client()
+
     async def scrape_apollo_leads(
         self,
         urls: List[str],
-        fields: List[str] = ["name", "email", "phone", "company", "title", "location", "industry", "linkedin", "twitter", "instagram", "facebook", "website"]
+        fields: List[str] = ["name", "email", "phone", "company", "title", "location", "industry", "linkedin", "twitter", "instagram", "facebook", "website"],
+        items_callback: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Scrape leads from Apollo.io using Apify actor
+
+        items_callback receives new dataset items while the run is still executing.
         """
         try:
             logger.debug(f"Starting Apollo lead scraping for {len(urls)} URLs")
@@ -62,7 +77,7 @@ class ApolloClient:
                 logger.info(f"Apify progress update: {progress_info}")
                 # This will be picked up by the task monitoring system
 
-            results = await self._wait_for_run_completion(run_id, log_progress_callback)
+            results = await self._wait_for_run_completion(run_id, log_progress_callback, items_callback)
             logger.info(f"Apify actor run completed. Retrieved {len(results)} results")
 
             return results
@@ -71,172 +86,99 @@ class ApolloClient:
             logger.error(f"Error in scrape_apollo_leads: {str(e)}", exc_info=True)
             raise
 
-    async def _wait_for_run_completion(self, run_id: str, progress_callback=None) -> List[Dict[str, Any]]:
+    async def _wait_for_run_completion(self, run_id: str, progress_callback=None, items_callback=None) -> List[Dict[str, Any]]:
         """
         Wait for the Apify actor run to complete and return the results with enhanced real-time monitoring
+
+        While the run executes its default dataset is polled by offset, and
+        every batch of new items is passed to items_callback as it lands.
+        Run completion comes from the transport's long-polling RunWatcher;
+        log and dataset polls back off while nothing new is arriving.
         """
+        finished = self.transport.run_watcher.watch(run_id)
         try:
-            log_url = f"{self.base_url}/actor-runs/{run_id}/log?token={self.api_key}"
-            last_log_position = 0
+            log_tailer = LogTailer(self.client, f"{self.base_url}/actor-runs/{run_id}/log?token={self.api_key}")
             start_time = time.time()
+            log_parser = ApolloLogParser(start_time)
+            results = []
+            dataset_id = None
+            interval = settings.apify_dataset_poll_interval
 
             while True:
-                # Get run status
-                status_response = await self.client.get(
-                    f"{self.base_url}/actor-runs/{run_id}?token={self.api_key}"
-                )
-                status_response.raise_for_status()
-                status_data = status_response.json()
+                # Read the status before polling so the last poll sees every item
+                run = finished.result() if finished.done() else None
+                if dataset_id is None:
+                    latest = run or self.transport.run_watcher.latest(run_id) or await self.transport.get_run(run_id)
+                    dataset_id = latest["defaultDatasetId"]
 
                 # Enhanced log monitoring with real-time streaming
                 if progress_callback:
                     try:
-                        last_log_position = await self._monitor_logs_realtime(
-                            log_url, last_log_position, progress_callback, start_time
-                        )
+                        await self._monitor_logs_realtime(log_tailer, log_parser, progress_callback)
                     except Exception as log_error:
                         logger.warning(f"Log monitoring error: {log_error}")
 
-                if status_data["data"]["status"] == "SUCCEEDED":
-                    logger.info("Apify actor run succeeded")
-                    # Get the results
-                    results_response = await self.client.get(
-                        f"{self.base_url}/actor-runs/{run_id}/dataset/items?token={self.api_key}"
-                    )
-                    results_response.raise_for_status()
-                    return results_response.json()
-
-                elif status_data["data"]["status"] in ["FAILED", "ABORTED", "TIMEOUT"]:
-                    error_msg = f"Apify actor run {status_data['data']['status']}"
+                # Pick up items written since the last poll
+                new_items = await self._fetch_new_items(dataset_id, len(results))
+                if new_items:
+                    results.extend(new_items)
+                    if items_callback:
+                        await items_callback(new_items)
+
+                if run is not None:
+                    if run["status"] == "SUCCEEDED":
+                        logger.info(f"Apify actor run succeeded with {len(results)} items")
+                        return results
+                    error_msg = f"Apify actor run {run['status']}"
                     logger.error(error_msg)
                     raise Exception(error_msg)
 
-                logger.debug(f"Apify actor run status: {status_data['data']['status']}")
-                await asyncio.sleep(1)  # More frequent checks for real-time updates
+                # Poll again soon while items arrive, back off while idle
+                if new_items:
+                    interval = settings.apify_dataset_poll_interval
+                else:
+                    interval = min(settings.apify_dataset_max_poll_interval, interval * 2)
+                await asyncio.wait({finished}, timeout=interval)
 
         except Exception as e:
             logger.error(f"Error in _wait_for_run_completion: {str(e)}", exc_info=True)
             raise
-
-    async def _monitor_logs_realtime(self, log_url: str, last_position: int, progress_callback, start_time) -> int:
+        finally:
+            if not finished.done():
+                finished.cancel()
+
+    async def _fetch_new_items(self, dataset_id: str, offset: int) -> List[Dict[str, Any]]:
+        """Read every dataset item past offset"""
+        new_items = []
+        async for page in self.transport.iterate_pages(dataset_id, offset=offset):
+            new_items.extend(page)
+        return new_items
+
+    async def _monitor_logs_realtime(self, log_tailer: LogTailer, log_parser: ApolloLogParser, progress_callback) -> None:
         """
         Enhanced real-time log monitoring with Apollo.io specific parsing
+
+        Only the log bytes written since the previous poll are fetched, and
+        the parser keeps its running totals across polls.
         """
         try:
-            # Fetch logs with streaming capability
-            log_response = await self.client.get(log_url)
-            if log_response.status_code == 200:
-                log_content = log_response.text
-                new_logs = log_content[last_position:]
-
-                if new_logs:
-                    # Parse logs for Apollo.io specific progress indicators
-                    progress_info = self._parse_apollo_log_progress(new_logs, start_time)
-                    if progress_info:
-                        await progress_callback(progress_info)
-                    
-                    return len(log_content)  # Return new position
-                
-            return last_position
+            new_lines = await log_tailer.read_lines()
+            # Parse logs for Apollo.io specific progress indicators
+            progress_info = log_parser.feed(new_lines)
+            if progress_info:
+                await progress_callback(progress_info)
 
         except Exception as e:
             logger.debug(f"Real-time log monitoring error: {e}")
-            return last_position
-
-    def _parse_apollo_log_progress(self, log_content: str, start_time) -> dict:
-        """
-        Enhanced parsing for Apollo.io scraper logs with detailed progress calculation
-        """
-        import re
-        import time
-
-        progress_info = {}
-        elapsed_time = time.time() - start_time
-
-        # Apollo.io specific patterns
-        
-        # Look for page fetching patterns
-        page_matches = re.findall(r'Fetching page (\d+)', log_content, re.IGNORECASE)
-        if page_matches:
-            current_page = max(int(page) for page in page_matches)
-            progress_info['current_page'] = current_page
-            
-            # Estimate progress based on page (assuming ~5-10 pages total for typical scraping)
-            estimated_total_pages = 10  # Conservative estimate
-            percentage = min(95, (current_page / estimated_total_pages) * 100)
-            progress_info['percentage'] = int(percentage)
-
-        # Look for Apollo specific "Found X results" patterns
-        apollo_results = re.findall(r'Found (\d+) results?', log_content, re.IGNORECASE)
-        if apollo_results:
-            total_found = sum(int(count) for count in apollo_results)
-            progress_info['records_found'] = total_found
-            progress_info['scraped_count'] = total_found
-
-        # Look for URL processing patterns
-        url_matches = re.findall(r'Processing URL:?\s*(.+)', log_content, re.IGNORECASE)
-        if url_matches:
-            current_url = url_matches[-1].strip()  # Get the most recent URL
-            progress_info['current_url'] = current_url
-
-        # Look for Apollo login/initialization patterns
-        if 'logging into apollo' in log_content.lower() or 'initializing apollo' in log_content.lower():
-            progress_info['percentage'] = 10
-            progress_info['message'] = 'Connecting to Apollo.io...'
-
-        # Look for search execution patterns
-        if 'executing search' in log_content.lower() or 'running search' in log_content.lower():
-            progress_info['percentage'] = 30
-            progress_info['message'] = 'Executing Apollo.io search...'
-
-        # Look for data extraction patterns
-        if 'extracting data' in log_content.lower() or 'collecting leads' in log_content.lower():
-            progress_info['percentage'] = 60
-            progress_info['message'] = 'Extracting lead data...'
-
-        # Look for completion indicators
-        if any(phrase in log_content.lower() for phrase in ['scraping completed', 'finished', 'done', 'success']):
-            progress_info['status'] = 'completed'
-            progress_info['percentage'] = 100
-            progress_info['message'] = 'Scraping completed successfully'
-
-        # Look for error patterns
-        error_patterns = ['error', 'failed', 'timeout', 'blocked', 'unauthorized']
-        if any(pattern in log_content.lower() for pattern in error_patterns):
-            progress_info['has_errors'] = True
-            progress_info['error_count'] = progress_info.get('error_count', 0) + 1
-
-        # Calculate processing rate if we have data
-        if 'records_found' in progress_info and elapsed_time > 0:
-            rate = (progress_info['records_found'] / elapsed_time) * 60  # per minute
-            progress_info['processing_rate'] = round(rate)
-
-        # Estimate remaining time
-        if 'current_page' in progress_info and elapsed_time > 10:  # Only after some time has passed
-            avg_time_per_page = elapsed_time / progress_info['current_page']
-            remaining_pages = max(0, 10 - progress_info['current_page'])  # Estimate
-            eta_seconds = remaining_pages * avg_time_per_page
-            eta_minutes = int(eta_seconds // 60)
-            eta_seconds = int(eta_seconds % 60)
-            progress_info['estimated_time'] = f"{eta_minutes:02d}:{eta_seconds:02d}"
-
-        # Extract any explicit percentage indicators
-        percentage_matches = re.findall(r'(\d+)%', log_content)
-        if percentage_matches:
-            explicit_percentage = max(int(p) for p in percentage_matches)
-            progress_info['percentage'] = explicit_percentage
-
-        return progress_info if progress_info else None
 
     async def close(self):
         """
-        Close the HTTP client
+        Release the client; the pooled transport stays open for reuse
         """
-        await self.client.aclose()
         logger.info("ApolloClient closed")
 
 class ApifyApolloClient:
-    def __init__(self, apify_token: Optional[str] = None):
+    def __init__(self, apify_token: Optional[str] = None, use_token_pool: bool = False):
         # Use provided token or fall back to settings
         token_to_use = apify_token or settings.apify_api_token
 
@@ -244,20 +186,57 @@ class ApifyApolloClient:
             logger.warning("Apify API token not configured (neither request token nor settings token)")
             self.client = None
         else:
-            self.client = ApifyClient(token_to_use)
+            # Transports are pooled per token and shared by every task
+            self.client = apify_pool.get(token_to_use)
             if apify_token:
                 logger.info("Using Apify API token from request")
             else:
                 logger.info("Using Apify API token from settings")
 
+        # Only jobs that ask for it spread their actor runs over the pooled
+        # accounts; the others are billed to their own token
+        self.token_pool = apify_token_pool if use_token_pool and apify_token_pool.enabled else None
+        if self.token_pool:
+            logger.info(f"Spreading actor runs over {self.token_pool.size} pooled Apify tokens")
+        elif use_token_pool:
+            logger.warning("Token pool requested but APIFY_TOKEN_POOL is not set; using the job's own token")
+
         self.apollo_actor_id = "code_crafter/apollo-io-scraper"
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def close(self):
+        """Release the client; the pooled transport is closed by the pool once idle"""
+        pass
+
+    def _transport_for(self, token_id: Optional[str]):
+        """Transport of the account a run was started on"""
+        if token_id and self.token_pool:
+            transport = self.token_pool.transport(token_id)
+            if transport is not None:
+                return transport
+            logger.warning("Apify run was started with a token that is no longer in the token pool")
+        return self.client
+
+    @asynccontextmanager
+    async def _run_slot(self, run_state: Dict[str, Any]):
+        """
+        Yield the transport for one actor run and its pooled token id (None
+        without a token pool). A new run leases the best pooled token; a run
+        that has started stays on the account it was started on.
+        """
+        token_id = run_state.get("token_id")
+        if self.token_pool is None or (run_state and (token_id is None or self.token_pool.transport(token_id) is None)):
+            yield self._transport_for(token_id), None
+            return
+        async with self.token_pool.lease(token_id) as leased_id:
+            yield self.token_pool.transport(leased_id), leased_id
+
     async def scrape_apollo_leads(
         self, 
         urls: List[str], 
         lead_count: int = 100,
-        fields: List[str] = None
+        fields: List[str] = None,
+        on_page: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        on_run: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Scrape leads from Apollo.io URLs using Apify
@@ -266,8 +245,37 @@ class ApifyApolloClient:
         - https://app.apollo.io/#/people?finderViewId=...
         - https://app.apollo.io/#/people?...
         - Apollo search URLs with specific criteria
+
+        The run's dataset is tailed by offset while the actor is still
+        running, one page at a time, and each page is normalized before the
+        next one is fetched. When ``on_page`` is given, every normalized page
+        is handed to it as soon as it lands instead of being collected in the
+        returned ``data``, so callers see partial results within seconds and
+        memory use depends on the page size rather than the job size.
+
+        Requests above the actor's per-run record cap are split into disjoint
+        shards (see shard_planner) that run in parallel and are merged with
+        de-duplication.
+
+        ``on_run`` receives a run state dict (run_id, dataset_id, url, offset,
+        status, ingested) when a run starts and after each ingested page, so
+        callers can checkpoint runs and resume them with ``resume_run``.
+
+        Results are cached by canonical query (URLs, fields and lead_count);
+        a cache hit is served without starting any actor run and is reported
+        with ``cache_hit`` in the result. A scrape stopped early by ``on_page``
+        or by cancellation is cached as partial: a later hit hands those
+        leads to ``on_page`` and only scrapes afresh if it asks for more.
+
+        Failures are retried where they happen: Apify requests and dataset
+        pages by the transport, shard runs by _run_and_ingest. A URL that
+        still fails is reported in ``failed_urls`` while the other URLs go
+        on, unless the token's circuit breaker has opened.
+
+        With a token pool every shard run leases its own token, so the
+        shards of one URL run on several accounts at once.
         """
-        if not self.client:
+        if not self.client and not self.token_pool:
             return {
                 "status": "error",
                 "data": [],
@@ -275,6 +283,8 @@ class ApifyApolloClient:
                 "message": "Apify API token not configured. Please set APIFY_API_TOKEN environment variable."
             }
 
+        fields = fields or DEFAULT_FIELDS
+
         logger.info(f"Starting Apollo scraping for {len(urls)} URLs with {lead_count} leads requested")
         logger.info(f"Requested fields: {fields}")
 
@@ -291,121 +301,157 @@ class ApifyApolloClient:
                 logger.warning(f"  - {url}")
             logger.warning("Expected format: https://app.apollo.io/#/people?finderViewId=... or similar search URLs")
 
+        all_results = []
+        # Leads handed to on_page are kept aside only to fill the cache
+        cacheable_results = all_results if not on_page else []
+        # Leads of a partial cache entry already handed to on_page
+        served_count = 0
+        served_keys = set()
+
+        cache_key = None
+        if settings.scrape_cache_enabled:
+            cache_key = scrape_cache.make_key(urls, fields, lead_count)
+            cached = await scrape_cache.get(cache_key)
+            if cached is not None and not cached["partial"]:
+                logger.info(f"Cache hit: serving {len(cached['leads'])} cached leads for {len(urls)} URLs")
+                return await self._serve_cached(cached["leads"], on_page)
+            if cached is not None and on_page:
+                result = await self._serve_cached(cached["leads"], on_page)
+                if result["satisfied"]:
+                    logger.info(f"Partial cache hit: {result['total_scraped']} cached leads were enough for {len(urls)} URLs")
+                    return result
+                # Scrape afresh; the runs start from the top of the search, so
+                # they fetch the served leads again and skip them as duplicates
+                logger.info(f"Partial cache hit: {len(cached['leads'])} cached leads were not enough, scraping")
+                cacheable_results.extend(cached["leads"])
+                served_count = len(cached["leads"])
+                served_keys = {key for key in map(lead_key, cached["leads"]) if key is not None}
+
+        complete = True
+        stopped_early = False
+        total_added = 0
         try:
-            all_results = []
-            remaining_lead_count = lead_count
+            remaining_lead_count = lead_count - served_count
+            failed_urls = []
 
             for url in urls:
                 # Check if we already have enough leads
-                if len(all_results) >= lead_count:
+                if remaining_lead_count <= 0:
                     logger.info(f"Target lead count {lead_count} reached. Stopping processing.")
                     break
 
-                # Calculate how many leads we still need for this URL
-                leads_needed_for_url = min(remaining_lead_count, 1000)  # Apify actor limit
-
-                # Prepare Actor input with comprehensive field list
-                run_input = {
-                    "url": url,
-                    "totalRecords": leads_needed_for_url,  # This is the actual field that controls record count
-                    "fileName": "Apollo Prospects",
-                    "fields": fields or [
-                        "name",
-                        "email", 
-                        "phone",
-                        "company",
-                        "title",
-                        "location",
-                        "industry",
-                        "linkedin",
-                        "twitter",
-                        "instagram",
-                        "facebook",
-                        "website"
-                    ],
-                    # Enhanced Apify configuration to ensure all fields are extracted
-                    "includeContactInfo": True,
-                    "includeSocialProfiles": True,
-                    "includeCompanyDetails": True
-                }
-
-                logger.info(f"Running Apify actor for url: {url} with input: {run_input}")
-                logger.info(f"Requesting {leads_needed_for_url} leads (remaining: {remaining_lead_count})")
-
-                # Run the Actor and wait for completion
-                run = self.client.actor(self.apollo_actor_id).call(run_input=run_input)
-
-                # Fetch results
-                dataset_id = run["defaultDatasetId"]
-                items = list(self.client.dataset(dataset_id).iterate_items())
-
-                logger.info(f"Apify run completed - dataset_id: {dataset_id}, items_count: {len(items)}")
-
-                # Enhanced debugging for empty results
-                if len(items) == 0:
-                    logger.warning(f"No items found for URL: {url}")
-                    logger.warning(f"Run details - run_id: {run.get('id')}, status: {run.get('status')}")
-
-                    # Check if the run failed or had errors
-                    if run.get('status') != 'SUCCEEDED':
-                        logger.error(f"Apify run failed with status: {run.get('status')}")
-                        logger.error(f"Run stats: {run.get('stats', 'No stats available')}")
-
-                    # Log any error messages from the run
-                    if 'errorMessage' in run:
-                        logger.error(f"Apify run error: {run['errorMessage']}")
-
-                # LOG RAW DATA FOR DEBUGGING (first item only to avoid spam)
-                if items:
-                    logger.info(f"Sample raw item from Apify: {items[0]}")
-
-                    # Log available fields in raw data
-                    raw_fields = set()
-                    for item in items[:5]:  # Check first 5 items
-                        raw_fields.update(item.keys())
-                    logger.info(f"Available fields in raw Apify data: {sorted(raw_fields)}")
-                else:
-                    logger.warning(f"No raw items found for URL: {url}. This might indicate:")
-                    logger.warning("1. The URL is not a valid Apollo.io search URL")
-                    logger.warning("2. Apollo.io returned no results for the search criteria")
-                    logger.warning("3. Apollo.io blocked the scraping attempt")
-                    logger.warning("4. The Apify actor encountered an error")
-
-                # Process and clean data
-                processed_items = self._process_items(items, fields or [
-                    "name", "email", "phone", "company", "title", "location", 
-                    "industry", "linkedin", "twitter", "instagram", "facebook", "website"
-                ])
-
-                # Limit processed items to what we still need
-                leads_to_add = processed_items[:remaining_lead_count]
-                all_results.extend(leads_to_add)
-                remaining_lead_count -= len(leads_to_add)
+                # One run covers up to the actor's record cap; larger requests
+                # are split into disjoint shards that run in parallel. Leads
+                # already served come back first and are dropped, so they are
+                # requested on top of the ones still missing
+                shards = plan_shards(url, remaining_lead_count + served_count, settings.apify_max_records_per_run)
+                if len(shards) > 1:
+                    planned = sum(shard["records"] for shard in shards)
+                    logger.info(f"Splitting {url} into {len(shards)} shards for {planned} of {remaining_lead_count} leads")
+
+                url_added = 0
+                seen_keys = set(served_keys)
+                # Shard concurrency is per account, so a token pool multiplies it
+                shard_semaphore = asyncio.Semaphore(
+                    max(1, settings.apify_shard_concurrency) * (self.token_pool.size if self.token_pool else 1)
+                )
 
-                logger.info(f"Added {len(leads_to_add)} leads from this URL. Total: {len(all_results)}/{lead_count}")
+                async def accept(leads: List[Dict[str, Any]]) -> bool:
+                    """Merge one normalized page, dropping duplicates; False once the target is met"""
+                    nonlocal remaining_lead_count, url_added, stopped_early
+                    unique = []
+                    for lead in leads:
+                        key = lead_key(lead)
+                        if key is not None:
+                            if key in seen_keys:
+                                continue
+                            seen_keys.add(key)
+                        unique.append(lead)
+
+                    leads_to_add = unique[:max(remaining_lead_count, 0)]
+                    remaining_lead_count -= len(leads_to_add)
+                    url_added += len(leads_to_add)
+
+                    keep_reading = True
+                    if on_page:
+                        # on_page may return False to stop reading (e.g. the caller's own target is met)
+                        keep_reading = await on_page(leads_to_add) is not False
+                        if cache_key:
+                            cacheable_results.extend(leads_to_add)
+                        if not keep_reading and remaining_lead_count > 0:
+                            stopped_early = True
+                    else:
+                        all_results.extend(leads_to_add)
+
+                    return remaining_lead_count > 0 and keep_reading
+
+                async def run_shard(shard: Dict[str, Any]) -> int:
+                    async with shard_semaphore:
+                        if remaining_lead_count <= 0:
+                            return 0
+                        return await self._run_and_ingest(shard, fields, accept, on_run)
+
+                shard_results = await asyncio.gather(*(run_shard(shard) for shard in shards), return_exceptions=True)
+                shard_errors = [result for result in shard_results if isinstance(result, Exception)]
+                for shard_error in shard_errors:
+                    logger.error(f"Apify shard failed for URL {url}: {str(shard_error)}")
+                if shard_errors:
+                    complete = False
+                if shard_errors and len(shard_errors) == len(shards):
+                    failed_urls.append({"url": url, "error": str(shard_errors[0])})
+                    if any(isinstance(error, CircuitOpenError) for error in shard_errors):
+                        # The token is failing; starting more runs would only add load
+                        logger.error(f"Stopping after URL {url}: {str(shard_errors[0])}")
+                        break
+                    continue
+
+                total_added += url_added
+                logger.info(f"Added {url_added} leads from this URL. Total: {served_count + total_added}/{lead_count}")
 
                 # Stop if we have enough leads
-                if len(all_results) >= lead_count:
+                if remaining_lead_count <= 0:
                     logger.info(f"Target lead count {lead_count} reached. Stopping processing.")
                     break
 
                 # Respect rate limits
                 await asyncio.sleep(1)
 
-            # STRICT FINAL PROTECTION: Never exceed user's requested count
-            final_data = all_results[:lead_count]  # Limit to requested count
-            final_count = len(final_data)
+            # Leads of a partial cache hit count towards the result
+            total_scraped = served_count + total_added
 
             # Log credit usage for transparency
-            logger.info(f"CREDIT USAGE SUMMARY: User requested {lead_count} leads, we scraped {len(all_results)} total, returning {final_count}")
+            logger.info(f"CREDIT USAGE SUMMARY: User requested {lead_count} leads, returning {total_scraped}")
+
+            if failed_urls and not total_scraped:
+                return {
+                    "status": "error",
+                    "data": [],
+                    "total_scraped": 0,
+                    "failed_urls": failed_urls,
+                    "message": f"Scraping failed: {failed_urls[0]['error']}"
+                }
+
+            # Only results without failed shards, that added leads, are worth
+            # serving again; a result short of lead_count may have been cut
+            # off, so it is only ever cached as partial
+            if cache_key and complete and total_added:
+                await scrape_cache.set(cache_key, cacheable_results, partial=stopped_early or total_scraped < lead_count)
 
             return {
                 "status": "success",
-                "data": final_data,  # Limit to requested count
-                "total_scraped": len(all_results),
-                "message": f"Successfully scraped {len(all_results)} leads"
+                "data": all_results,  # Never exceeds the requested count
+                "total_scraped": total_scraped,
+                "cache_hit": False,
+                "failed_urls": failed_urls,
+                "message": f"Successfully scraped {total_scraped} leads" + (f" ({len(failed_urls)} URLs failed)" if failed_urls else "")
             }
 
+        except asyncio.CancelledError:
+            # Stopped by the caller, e.g. once its target was met while runs
+            # were idle: the leads accepted so far are still worth keeping
+            if cache_key and complete and len(cacheable_results) > served_count:
+                await scrape_cache.set(cache_key, cacheable_results, partial=True)
+            raise
         except Exception as e:
             logger.error(f"Apify scraping failed: {str(e)}", exc_info=True)
             return {
@@ -415,442 +461,239 @@ class ApifyApolloClient:
                 "message": f"Scraping failed: {str(e)}"
             }
 
-    def _safe_get_field(self, item: dict, field_name: str, default: str = "") -> str:
-        """Safely extract and clean field value from item"""
-        try:
-            value = item.get(field_name)
-            if value is None:
-                return default
-            # Convert to string and strip whitespace
-            return str(value).strip()
-        except (AttributeError, TypeError):
-            return default
-
-    def _extract_phone(self, item: dict) -> str:
-        """Extract phone number from various possible fields"""
-        # Try direct phone field first
-        phone = item.get("sanitized_phone") or item.get("phone")
-        if phone:
-            return self._format_phone(str(phone))
-
-        # Try phone_numbers array
-        phone_numbers = item.get("phone_numbers", [])
-        if phone_numbers and isinstance(phone_numbers, list) and len(phone_numbers) > 0:
-            first_phone = phone_numbers[0]
-            if isinstance(first_phone, dict):
-                phone_num = first_phone.get("sanitized_number") or first_phone.get("raw_number")
-                if phone_num:
-                    return self._format_phone(str(phone_num))
-
-        # Try organization phone as fallback
-        org = item.get("organization", {})
-        if org:
-            org_phone = org.get("phone") or org.get("sanitized_phone")
-            if org_phone:
-                return self._format_phone(str(org_phone))
-
-        return ""
-
-    def _process_items(self, items: List[Dict], requested_fields: List[str]) -> List[Dict]:
-        """Process and clean scraped items with robust error handling"""
-        processed = []
-        logger.info(f"Processing {len(items)} items with requested fields: {requested_fields}")
-
-        for i, item in enumerate(items):
-            try:
-                logger.debug(f"Processing raw item {i+1}: {item}")
-                proc_item = {}
-
-                # Get company data from organization field
-                company_data = item.get("organization", {}) or {}
-                logger.debug(f"Company data found: {company_data}")
-
-                for field in requested_fields:
-                    try:
-                        value = ""
-
-                        if field == "name":
-                            value = str(item.get("name") or "").strip()
-
-                        elif field == "email":
-                            value = str(item.get("email") or "").strip()
-
-                        elif field == "phone":
-                            value = self._extract_phone(item)
-
-                        elif field == "location":
-                            # Build location from available fields
-                            parts = []
-                            if item.get("city"):
-                                parts.append(str(item["city"]))
-                            if item.get("state"):
-                                parts.append(str(item["state"]))
-                            if item.get("country"):
-                                parts.append(str(item["country"]))
-
-                            # Also try present_raw_address if parts are empty
-                            if not parts and item.get("present_raw_address"):
-                                value = str(item["present_raw_address"]).strip()
-                            else:
-                                value = ", ".join(parts)
-
-                        elif field == "company":
-                            # Try organization.name first, then organization_name
-                            value = str(company_data.get("name") or item.get("organization_name") or "").strip()
-
-                        elif field == "title":
-                            value = str(item.get("title") or "").strip()
-
-                        elif field == "industry":
-                            # Try personal industry first, then company industry
-                            personal_industry = str(item.get("industry") or "").strip()
-                            company_industry = str(company_data.get("industry") or "").strip()
-                            value = personal_industry or company_industry
-
-                        elif field == "linkedin":
-                            linkedin_url = str(item.get("linkedin_url") or "").strip()
-                            if linkedin_url:
-                                value = self._format_url(linkedin_url, "linkedin")
-
-                        elif field == "twitter":
-                            # Try personal twitter first, then company twitter
-                            personal_twitter = str(item.get("twitter_url") or "").strip()
-                            if personal_twitter:
-                                value = self._format_url(personal_twitter, "twitter")
-                                logger.debug(f"Using personal twitter for {item.get('name', 'Unknown')}: {value}")
-                            else:
-                                company_twitter = str(company_data.get("twitter_url") or "").strip()
-                                if company_twitter:
-                                    value = self._format_url(company_twitter, "twitter")
-                                    logger.debug(f"Using company twitter for {item.get('name', 'Unknown')}: {value}")
-
-                        elif field == "instagram":
-                            # Try personal instagram first
-                            personal_instagram = str(item.get("instagram_url") or "").strip()
-                            if personal_instagram:
-                                value = self._format_url(personal_instagram, "instagram")
-                                logger.debug(f"Using personal instagram for {item.get('name', 'Unknown')}: {value}")
-                            # Instagram is rarely available in Apollo data, so often empty
-
-                        elif field == "facebook":
-                            # Try personal facebook first, then company facebook
-                            personal_facebook = str(item.get("facebook_url") or "").strip()
-                            if personal_facebook:
-                                value = self._format_url(personal_facebook, "facebook")
-                                logger.debug(f"Using personal facebook for {item.get('name', 'Unknown')}: {value}")
-                            else:
-                                company_facebook = str(company_data.get("facebook_url") or "").strip()
-                                if company_facebook:
-                                    value = self._format_url(company_facebook, "facebook")
-                                    logger.debug(f"Using company facebook for {item.get('name', 'Unknown')}: {value}")
-
-                        elif field == "website":
-                            # Try personal website first, then company website
-                            personal_website = str(item.get("website") or item.get("website_url") or "").strip()
-                            if personal_website:
-                                value = self._format_url(personal_website, "website")
-                                logger.debug(f"Using personal website for {item.get('name', 'Unknown')}: {value}")
-                            else:
-                                # Try multiple company website fields
-                                company_website = (str(company_data.get("website_url") or "").strip() or 
-                                                 str(company_data.get("primary_domain") or "").strip() or
-                                                 str(item.get("organization_website_url") or "").strip())
-                                if company_website:
-                                    if not company_website.startswith("http"):
-                                        company_website = "https://" + company_website
-                                    value = self._format_url(company_website, "website")
-                                    logger.debug(f"Using company website for {item.get('name', 'Unknown')}: {value}")
-
-                        # Add the processed value to the result
-                        proc_item[field] = value
-                        logger.debug(f"Processed {field}: '{value}'")
-
-                    except Exception as field_error:
-                        logger.warning(f"Error processing field '{field}' for item {i+1}: {str(field_error)}")
-                        proc_item[field] = ""  # Ensure field exists even if processing fails
-
-                processed.append(proc_item)
-                logger.debug(f"Processed lead {i+1}: {proc_item}")
-
-            except Exception as item_error:
-                logger.error(f"Error processing item {i+1}: {str(item_error)}")
-                logger.debug(f"Problematic item data: {item}")
-                # Continue processing other items instead of failing completely
-                continue
-
-        logger.info(f"Processing finished. {len(processed)} leads processed successfully")
-        return processed
-
-    def _format_field_value(self, field_type: str, raw_value) -> str:
-        """Format field values based on their type"""
-        if not raw_value:
-            return ""
-
-        value_str = str(raw_value).strip()
-        if not value_str:
-            return ""
-
-        # Email formatting
-        if field_type == "email":
-            return self._format_email(value_str)
-
-        # Phone number formatting
-        elif field_type == "phone":
-            return self._format_phone(value_str)
-
-        # URL formatting (linkedin, twitter, instagram, website)
-        elif field_type in ["linkedin", "twitter", "instagram", "website"]:
-            return self._format_url(value_str, field_type)
-
-        # Location/Address formatting
-        elif field_type == "location":
-            return self._format_location(value_str)
-
-        # Name formatting
-        elif field_type == "name":
-            return self._format_name(value_str)
-
-        # Company and title formatting
-        elif field_type in ["company", "title", "industry"]:
-            return self._format_text(value_str)
-
-        # Default string formatting
-        else:
-            return self._format_text(value_str)
-
-    def _format_email(self, email: str) -> str:
-        """Format and validate email addresses"""
-        import re
-
-        email = email.lower().strip()
-
-        # Basic email validation regex
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-
-        if re.match(email_pattern, email):
-            return email
-
-        # Try to extract email from text
-        email_match = re.search(r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', email)
-        if email_match:
-            return email_match.group().lower()
-
-        return ""
-
-    def _format_phone(self, phone: str) -> str:
-        """Format phone numbers with more lenient validation"""
-        if not phone or not str(phone).strip():
-            return ""
-
-        phone = str(phone).strip()
-        logger.debug(f"Formatting phone: '{phone}'")
+    async def _serve_cached(
+        self,
+        leads: List[Dict[str, Any]],
+        on_page: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Return cached leads in the same shape as a fresh scrape. Pages stop
+        once on_page returns False; "satisfied" says whether it did.
+        """
+        served = len(leads)
+        satisfied = False
+        if on_page:
+            page_size = max(1, settings.apify_dataset_page_size)
+            for start in range(0, len(leads), page_size):
+                if await on_page(leads[start:start + page_size]) is False:
+                    served = min(len(leads), start + page_size)
+                    satisfied = True
+                    break
 
-        # Remove common separators but keep digits and + at start
-        import re
-        original_phone = phone
+        return {
+            "status": "success",
+            "data": [] if on_page else list(leads),
+            "total_scraped": served,
+            "cache_hit": True,
+            "satisfied": satisfied,
+            "message": f"Served {served} leads from cache"
+        }
 
-        # First, try to extract any phone-like pattern
-        phone_pattern = re.search(r'[\+]?[\d\s\-\(\)\.]{7,}', phone)
-        if phone_pattern:
-            phone = phone_pattern.group()
+    async def _run_and_ingest(
+        self,
+        shard: Dict[str, Any],
+        fields: List[str],
+        accept: Callable[[List[Dict[str, Any]]], Awaitable[bool]],
+        on_run: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Run the actor for one shard and stream its normalized pages into accept.
+        Stops reading as soon as accept returns False. Returns the raw item count.
 
-        # Clean the phone number
-        cleaned = re.sub(r'[^\d+]', '', phone)
+        If the shard fails with a transient error after the transport's own
+        retries, it is retried with backoff: a run that already started is
+        re-attached at its dataset offset rather than started again.
+        """
+        url = shard["url"]
+
+        # Prepare Actor input with comprehensive field list
+        run_input = {
+            "url": url,
+            "totalRecords": shard["records"],  # This is the actual field that controls record count
+            "fileName": "Apollo Prospects",
+            "fields": fields,
+            # Enhanced Apify configuration to ensure all fields are extracted
+            "includeContactInfo": True,
+            "includeSocialProfiles": True,
+            "includeCompanyDetails": True
+        }
+
+        logger.info(f"Running Apify actor for url: {url} ({shard['label']}) with input: {run_input}")
+
+        run_state: Dict[str, Any] = {}
+        items_count = 0
+        # Before the run exists only failures that cannot have started it are retried
+        retrying = apify_retrying().copy(
+            retry=retry_if_exception(lambda error: is_transient_error(error, idempotent=bool(run_state)))
+        )
+        async for attempt in retrying:
+            # A failed start may pick another pooled token on the next attempt
+            with attempt:
+                async with self._run_slot(run_state) as (client, token_id):
+                    if not run_state:
+                        # Start the Actor and tail its dataset while it runs
+                        run = await client.start_run(self.apollo_actor_id, run_input)
+                        logger.info(f"Apify actor run started - run_id: {run['id']}, dataset_id: {run['defaultDatasetId']}")
+                        run_state = {
+                            "run_id": run["id"],
+                            "dataset_id": run["defaultDatasetId"],
+                            "url": url,
+                            "records": shard["records"],
+                            "offset": 0,
+                            "status": run.get("status"),
+                            "ingested": False
+                        }
+                        if token_id:
+                            run_state["token_id"] = token_id
+                            self.token_pool.record_run(token_id, shard["records"])
+                        if on_run:
+                            await on_run(run_state)
+                    else:
+                        run = await client.get_run(run_state["run_id"])
+                        logger.info(f"Re-attaching to Apify run {run['id']} at dataset offset {run_state['offset']} after a failure")
+
+                    offset_before = run_state["offset"]
+                    try:
+                        run, _ = await self._ingest_run(client, run, fields, accept, run_state, on_run)
+                    finally:
+                        items_count += run_state["offset"] - offset_before
 
-        if not cleaned:
-            logger.debug(f"No digits found in phone: '{original_phone}'")
-            return ""
+        dataset_id = run_state["dataset_id"]
+        logger.info(f"Apify run {run.get('status')} - dataset_id: {dataset_id}, items_count: {items_count}")
 
-        # Handle international format
-        if cleaned.startswith('+'):
-            digits = re.sub(r'[^\d]', '', cleaned[1:])
-            if len(digits) >= 7:  # More lenient minimum
-                if len(digits) == 11 and digits.startswith('1'):  # US number with country code
-                    formatted = f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
-                elif len(digits) == 10:  # US number without country code
-                    formatted = f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-                else:
-                    formatted = f"+{digits}"
-                logger.debug(f"Formatted international phone: '{original_phone}' -> '{formatted}'")
-                return formatted
-        else:
-            # Domestic format
-            digits = re.sub(r'[^\d]', '', cleaned)
-            if len(digits) == 10:  # Standard US format
-                formatted = f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-                logger.debug(f"Formatted US phone: '{original_phone}' -> '{formatted}'")
-                return formatted
-            elif len(digits) == 11 and digits.startswith('1'):  # US with leading 1
-                formatted = f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
-                logger.debug(f"Formatted US phone with leading 1: '{original_phone}' -> '{formatted}'")
-                return formatted
-            elif len(digits) >= 7:  # Accept any number with 7+ digits
-                formatted = digits
-                logger.debug(f"Formatted general phone: '{original_phone}' -> '{formatted}'")
-                return formatted
-
-        # If we can't format it nicely, return the cleaned version if it has enough digits
-        if len(cleaned.replace('+', '')) >= 7:
-            logger.debug(f"Returning cleaned phone: '{original_phone}' -> '{cleaned}'")
-            return cleaned
-
-        logger.debug(f"Phone rejected (too short): '{original_phone}'")
-        return ""
-
-    def _format_url(self, url: str, url_type: str) -> str:
-        """Format URLs for different platforms with more lenient validation"""
-        if not url or not str(url).strip():
-            return ""
-
-        url = str(url).strip()
-        logger.debug(f"Formatting URL '{url}' for type '{url_type}'")
-
-        # Basic URL cleaning
-        if url.lower().startswith(('www.', 'http://www.', 'https://www.www.')):
-            if not url.startswith('http'):
-                url = 'https://' + url
-        elif not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-
-        # Platform-specific validation - more lenient
-        if url_type == "linkedin":
-            # Accept linkedin.com URLs - don't require specific path patterns
-            if "linkedin.com" in url.lower():
-                logger.debug(f"LinkedIn URL accepted: {url}")
-                return url
-            else:
-                logger.debug(f"LinkedIn URL rejected (no linkedin.com): {url}")
-                return ""
-
-        elif url_type == "twitter":
-            # Accept twitter.com or x.com URLs
-            if any(domain in url.lower() for domain in ["twitter.com", "x.com"]):
-                logger.debug(f"Twitter/X URL accepted: {url}")
-                return url
-            else:
-                logger.debug(f"Twitter URL rejected (no twitter.com or x.com): {url}")
-                return ""
-
-        elif url_type == "instagram":
-            # Accept instagram.com URLs
-            if "instagram.com" in url.lower():
-                logger.debug(f"Instagram URL accepted: {url}")
-                return url
-            else:
-                logger.debug(f"Instagram URL rejected (no instagram.com): {url}")
-                return ""
-
-        elif url_type == "facebook":
-            # Accept facebook.com URLs (for company social)
-            if "facebook.com" in url.lower():
-                logger.debug(f"Facebook URL accepted: {url}")
-                return url
-            else:
-                logger.debug(f"Facebook URL rejected (no facebook.com): {url}")
-                return ""
-
-        elif url_type == "website":
-            # Very lenient website validation - just check it looks like a URL
-            import re
-            # Accept any URL that has a domain pattern
-            if re.search(r'https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', url) or \
-               re.search(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', url):
-                logger.debug(f"Website URL accepted: {url}")
-                return url
-            else:
-                logger.debug(f"Website URL rejected (invalid format): {url}")
-                return ""
-
-        # Default case - return the URL as-is if it looks like a URL
-        logger.debug(f"Default URL handling for {url_type}: {url}")
-        return url
-
-    def _format_location(self, location: str) -> str:
-        """Format location/address information"""
-        location = location.strip()
-
-        if not location:
-            return ""
-
-        # Capitalize each word properly
-        words = location.split()
-        formatted_words = []
-
-        for word in words:
-            # Handle common abbreviations
-            if word.upper() in ['USA', 'UK', 'UAE', 'NYC', 'LA', 'SF', 'DC']:
-                formatted_words.append(word.upper())
-            elif word.lower() in ['and', 'or', 'of', 'the', 'in', 'at']:
-                formatted_words.append(word.lower())
-            else:
-                formatted_words.append(word.capitalize())
+        # Enhanced debugging for empty results
+        if items_count == 0:
+            logger.warning(f"No items found for URL: {url}")
+            logger.warning(f"Run details - run_id: {run.get('id')}, status: {run.get('status')}")
 
-        return ' '.join(formatted_words)
+            # Check if the run failed or had errors
+            if run.get('status') != 'SUCCEEDED':
+                logger.error(f"Apify run failed with status: {run.get('status')}")
+                logger.error(f"Run stats: {run.get('stats', 'No stats available')}")
 
-    def _format_name(self, name: str) -> str:
-        """Format person names"""
-        name = name.strip()
+            # Log any error messages from the run
+            if 'errorMessage' in run:
+                logger.error(f"Apify run error: {run['errorMessage']}")
 
-        if not name:
-            return ""
+            logger.warning(f"No raw items found for URL: {url}. This might indicate:")
+            logger.warning("1. The URL is not a valid Apollo.io search URL")
+            logger.warning("2. Apollo.io returned no results for the search criteria")
+            logger.warning("3. Apollo.io blocked the scraping attempt")
+            logger.warning("4. The Apify actor encountered an error")
 
-        # Split and capitalize each part
-        parts = name.split()
-        formatted_parts = []
+        return items_count
 
-        for part in parts:
-            # Handle prefixes and suffixes
-            if part.lower() in ['jr', 'sr', 'ii', 'iii', 'iv']:
-                formatted_parts.append(part.upper())
-            elif part.lower() in ['dr', 'mr', 'mrs', 'ms', 'prof']:
-                formatted_parts.append(part.capitalize() + '.')
-            else:
-                # Handle names with apostrophes or hyphens
-                if "'" in part or "-" in part:
-                    subparts = re.split(r"(['-])", part)
-                    formatted_subparts = []
-                    for subpart in subparts:
-                        if subpart in ["'", "-"]:
-                            formatted_subparts.append(subpart)
-                        else:
-                            formatted_subparts.append(subpart.capitalize())
-                    formatted_parts.append(''.join(formatted_subparts))
-                else:
-                    formatted_parts.append(part.capitalize())
+    async def _ingest_run(
+        self,
+        client,
+        run: Dict[str, Any],
+        fields: List[str],
+        accept: Callable[[List[Dict[str, Any]]], Awaitable[bool]],
+        run_state: Dict[str, Any],
+        on_run: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ):
+        """
+        Tail a run's dataset from run_state["offset"], feeding normalized pages
+        to accept. run_state is updated and reported after every page. When
+        accept stops the read while the run is still going, the run is
+        aborted so it stops consuming credits.
+        Returns the final run and the number of raw items read.
+        """
+        # Stream results page by page: normalize each page and hand it
+        # off before the next one is fetched
+        tail = DatasetTail(
+            client,
+            run,
+            page_size=settings.apify_dataset_page_size,
+            poll_interval=settings.apify_dataset_poll_interval,
+            max_poll_interval=settings.apify_dataset_max_poll_interval,
+            offset=run_state["offset"]
+        )
+        items_count = 0
+        stopped_early = False
+        async with aclosing(tail.pages()) as pages:
+            async for page in pages:
+                if items_count == 0:
+                    # LOG RAW DATA FOR DEBUGGING (first item only to avoid spam)
+                    logger.info(f"Sample raw item from Apify: {page[0]}")
+                    raw_fields = set()
+                    for item in page[:5]:  # Check first 5 items
+                        raw_fields.update(item.keys())
+                    logger.info(f"Available fields in raw Apify data: {sorted(raw_fields)}")
 
-        return ' '.join(formatted_parts)
+                items_count += len(page)
+                if run_state.get("token_id") and self.token_pool:
+                    self.token_pool.record_items(run_state["token_id"], len(page))
 
-    def _format_text(self, text: str) -> str:
-        """Format general text fields (company, title, industry)"""
-        text = text.strip()
+                keep_reading = await accept(await self._process_items(page, fields))
+                run_state.update(offset=tail.offset, status=tail.run.get("status"))
+                if on_run:
+                    await on_run(run_state)
+                if not keep_reading:
+                    stopped_early = True
+                    break
 
-        if not text:
-            return ""
+        status = tail.run.get("status")
+        if stopped_early and not tail.finished and await self.abort_run(run_state["run_id"], run_state.get("token_id")):
+            status = "ABORTED"
+        run_state.update(status=status, ingested=True)
+        if on_run:
+            await on_run(run_state)
+        return tail.run, items_count
 
-        # Remove extra whitespace
-        text = ' '.join(text.split())
+    async def resume_run(
+        self,
+        run_state: Dict[str, Any],
+        fields: List[str],
+        accept: Callable[[List[Dict[str, Any]]], Awaitable[bool]],
+        on_run: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Re-attach to a run recorded by on_run (e.g. after a restart) and
+        finish ingesting its dataset from the checkpointed offset.
+        Returns the number of raw items read.
+        """
+        if not self.client and not self.token_pool:
+            raise ExternalAPIError("Apify API token not configured")
 
-        # Capitalize appropriately
-        # Keep certain words lowercase
-        lowercase_words = ['and', 'or', 'of', 'the', 'in', 'at', 'to', 'for', 'with', 'by']
+        async with self._run_slot(run_state) as (client, _):
+            run = await client.get_run(run_state["run_id"])
+            logger.info(f"Re-attaching to Apify run {run['id']} ({run.get('status')}) at dataset offset {run_state['offset']}")
+            _, items_count = await self._ingest_run(client, run, fields, accept, run_state, on_run)
+        return items_count
 
-        words = text.split()
-        formatted_words = []
+    async def abort_run(self, run_id: str, token_id: Optional[str] = None) -> bool:
+        """
+        Abort an actor run; returns False if Apify refused (e.g. it already finished).
+        token_id names the pooled token the run was started with.
+        """
+        client = self._transport_for(token_id)
+        if not client:
+            return False
+        try:
+            run = await client.abort_run(run_id)
+            logger.info(f"Aborted Apify run {run_id} - status: {run.get('status')}")
+            return True
+        except ExternalAPIError as e:
+            logger.warning(f"Could not abort Apify run {run_id}: {str(e)}")
+            return False
 
-        for i, word in enumerate(words):
-            # First word is always capitalized
-            if i == 0:
-                formatted_words.append(word.capitalize())
-            # Common abbreviations stay uppercase
-            elif word.upper() in ['CEO', 'CTO', 'CFO', 'COO', 'VP', 'SVP', 'EVP', 'HR', 'IT', 'AI', 'ML', 'API', 'SaaS', 'B2B', 'B2C']:
-                formatted_words.append(word.upper())
-            # Keep certain words lowercase
-            elif word.lower() in lowercase_words:
-                formatted_words.append(word.lower())
-            else:
-                formatted_words.append(word.capitalize())
+    def _safe_get_field(self, item: dict, field_name: str, default: str = "") -> str:
+        """Safely extract and clean field value from item"""
+        try:
+            value = item.get(field_name)
+            if value is None:
+                return default
+            # Convert to string and strip whitespace
+            return str(value).strip()
+        except (AttributeError, TypeError):
+            return default
 
-        return ' '.join(formatted_words)
+    async def _process_items(self, items: List[Dict], fields: List[str]) -> List[Dict]:
+        """Normalize one page of raw Apollo items, in worker processes when the normalization pool is on"""
+        processed = await normalization_pool.normalize(items, fields)
+        logger.info(f"Processed {len(processed)}/{len(items)} items into leads")
+        return processed
 
     def _is_valid_apollo_url(self, url: str) -> bool:
         """Check if a URL is a valid Apollo.io search URL"""
@@ -0,0 +1,188 @@
+import codecs
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class LogTailer:
+    """
+    Incrementally read an Apify run log.
+
+    Each poll asks only for the bytes past the current offset with an HTTP
+    Range header, so the cost of a poll depends on how much was logged since
+    the previous one rather than on the total log length. Decoder state and
+    the trailing partial line are carried over between chunks, so callers
+    only ever see complete lines.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, log_url: str, headers: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.log_url = log_url
+        self.headers = headers or {}
+        self.offset = 0  # Bytes of the log consumed so far
+        self.range_supported = True
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+
+    async def read_lines(self) -> List[str]:
+        """Return the complete log lines written since the previous call"""
+        headers = dict(self.headers)
+        if self.offset:
+            headers["Range"] = f"bytes={self.offset}-"
+
+        response = await self.client.get(self.log_url, headers=headers)
+        if response.status_code == 416:
+            # Range starts at the end of the log - nothing new yet
+            return []
+        response.raise_for_status()
+
+        chunk = response.content
+        if response.status_code != 206 and self.offset:
+            # Server ignored the Range header and sent the whole log
+            if self.range_supported:
+                logger.debug(f"Range requests not honoured for {self.log_url}, slicing full log")
+                self.range_supported = False
+            chunk = chunk[self.offset:]
+
+        if not chunk:
+            return []
+
+        self.offset += len(chunk)
+        text = self._partial_line + self._decoder.decode(chunk)
+        lines = text.split("\n")
+        self._partial_line = lines.pop()
+        return lines
+
+
+# Precompiled once at import. Each chunk is lower-cased once and every
+# marker is found with a literal-prefixed pattern or a plain substring scan,
+# which CPython's re runs as a fast C-level search. A single alternation
+# over all markers was measured several times slower: it loses the
+# literal-prefix search and has to try every branch at each position.
+_PAGE_PATTERN = re.compile(r"fetching page (\d+)")
+_FOUND_PATTERN = re.compile(r"found (\d+) results?")
+_URL_PATTERN = re.compile(r"processing url:?[ \t]*([^\n]+)")
+_PERCENT_PATTERN = re.compile(r"(\d+)%")
+
+# Progress percentage and message reported for each actor phase, in order
+_PHASES = [
+    (("logging into apollo", "initializing apollo"), 10, "Connecting to Apollo.io..."),
+    (("executing search", "running search"), 30, "Executing Apollo.io search..."),
+    (("extracting data", "collecting leads"), 60, "Extracting lead data..."),
+]
+_COMPLETION_MARKERS = ("scraping completed", "finished", "done", "success")
+_ERROR_MARKERS = ("error", "failed", "timeout", "blocked", "unauthorized")
+
+ESTIMATED_TOTAL_PAGES = 10  # Conservative estimate for a typical scrape
+
+
+class ApolloLogParser:
+    """
+    Stateful incremental parser for Apollo actor logs.
+
+    Lines are consumed chunk by chunk and running totals (records found,
+    highest page, error count, ...) are kept across chunks, so a result
+    count is never lost or double counted when it lands in a later chunk.
+    feed() returns a progress event dict whenever a chunk changed the state.
+    """
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.current_page = 0
+        self.records_found = 0
+        self.current_url = None
+        self.percentage = 0
+        self.message = None
+        self.completed = False
+        self.error_count = 0
+
+    def feed(self, lines: List[str]) -> Optional[Dict[str, Any]]:
+        """Consume complete log lines and return a progress event if anything changed"""
+        if not lines:
+            return None
+
+        text = "\n".join(lines)
+        lowered = text.lower()
+        before = self._state()
+
+        pages = _PAGE_PATTERN.findall(lowered)
+        if pages:
+            page = max(int(p) for p in pages)
+            if page > self.current_page:
+                self.current_page = page
+                self.percentage = max(self.percentage, min(95, int(page / ESTIMATED_TOTAL_PAGES * 100)))
+
+        # Result counts are running totals across every chunk seen so far
+        found = _FOUND_PATTERN.findall(lowered)
+        if found:
+            self.records_found += sum(int(count) for count in found)
+
+        last_url = None
+        for last_url in _URL_PATTERN.finditer(lowered):
+            pass
+        if last_url:
+            # Take the URL from the original text when case folding kept offsets intact
+            url = text[last_url.start(1):last_url.end(1)] if len(lowered) == len(text) else last_url.group(1)
+            self.current_url = url.strip()
+
+        for markers, phase_percentage, phase_message in _PHASES:
+            if any(marker in lowered for marker in markers):
+                self.percentage = max(self.percentage, phase_percentage)
+                self.message = phase_message
+
+        if any(marker in lowered for marker in _COMPLETION_MARKERS):
+            self.completed = True
+            self.percentage = 100
+            self.message = "Scraping completed successfully"
+
+        if "%" in lowered:
+            percentages = _PERCENT_PATTERN.findall(lowered)
+            if percentages:
+                self.percentage = max(self.percentage, min(100, max(int(p) for p in percentages)))
+
+        new_errors = sum(lowered.count(marker) for marker in _ERROR_MARKERS)
+        self.error_count += new_errors
+
+        if not new_errors and self._state() == before:
+            return None
+        return self._progress_event(new_errors)
+
+    def _state(self) -> tuple:
+        return (self.current_page, self.records_found, self.current_url, self.percentage, self.message, self.completed)
+
+    def _progress_event(self, new_errors: int) -> Dict[str, Any]:
+        """Build the progress dict consumed by scrape progress callbacks"""
+        elapsed_time = time.time() - self.start_time
+        progress_info: Dict[str, Any] = {"percentage": self.percentage}
+
+        if self.current_page:
+            progress_info["current_page"] = self.current_page
+        if self.records_found:
+            progress_info["records_found"] = self.records_found
+            progress_info["scraped_count"] = self.records_found
+            if elapsed_time > 0:
+                progress_info["processing_rate"] = round(self.records_found / elapsed_time * 60)  # per minute
+        if self.current_url:
+            progress_info["current_url"] = self.current_url
+        if self.message:
+            progress_info["message"] = self.message
+        if self.completed:
+            progress_info["status"] = "completed"
+        if new_errors:
+            progress_info["has_errors"] = True
+            progress_info["error_count"] = self.error_count
+
+        # Estimate remaining time once some pages have been processed
+        if self.current_page and elapsed_time > 10:
+            avg_time_per_page = elapsed_time / self.current_page
+            eta_seconds = max(0, ESTIMATED_TOTAL_PAGES - self.current_page) * avg_time_per_page
+            progress_info["estimated_time"] = f"{int(eta_seconds // 60):02d}:{int(eta_seconds % 60):02d}"
+
+        return progress_info
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.clients.apify_transport import ApifyTransport
+from app.core.config import settings
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _mask_token(token: str) -> str:
+    return f"...{token[-4:]}" if len(token) > 4 else "***"
+
+
+def token_id(token: str) -> str:
+    """Stable identifier of a token that is safe to keep in checkpoints and logs"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class ApifyClientPool:
+    """
+    Long-lived Apify transports shared by every scrape task, one per token.
+
+    Each transport keeps a keep-alive httpx connection pool (HTTP/2 when h2
+    is installed), so TLS sessions and connections are reused across jobs
+    instead of being opened and torn down per task. The HTTP client of a
+    transport with no traffic and no watched runs for idle_timeout seconds
+    is closed by a background sweeper. The transport itself stays in the
+    pool with its circuit breaker, run watcher and metrics, and reopens its
+    client on the next request, so holders of the transport and later
+    get() calls keep sharing one instance.
+
+    Entries are keyed by token_id(), and a transport unused for entry_ttl
+    seconds is closed and dropped, so tokens sent with past requests are
+    not kept for the life of the process. A holder that still uses a
+    dropped transport reopens its client; get() builds a new one.
+
+    Every response is attributed to a new or a reused connection by its
+    underlying network stream, and the counts are exposed by metrics().
+    """
+
+    def __init__(self, idle_timeout: float = 300, max_connections: int = 20, keepalive_expiry: float = 60,
+                 entry_ttl: float = 3600):
+        self.idle_timeout = idle_timeout
+        self.entry_ttl = max(entry_ttl, idle_timeout)
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.evictions = 0
+        self.expired = 0
+
+    def _new_entry(self, token: str) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "masked_token": _mask_token(token),
+            "created_at": time.time(),
+            "last_used": time.monotonic(),
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "clients_opened": 0,
+            "http_versions": {},
+        }
+        seen_streams = weakref.WeakSet()
+
+        async def on_response(response: httpx.Response):
+            entry["requests"] += 1
+            entry["last_used"] = time.monotonic()
+            entry["http_versions"][response.http_version] = entry["http_versions"].get(response.http_version, 0) + 1
+            stream = response.extensions.get("network_stream")
+            if stream is None:
+                return
+            if stream in seen_streams:
+                entry["reused_connections"] += 1
+            else:
+                seen_streams.add(stream)
+                entry["new_connections"] += 1
+
+        def client_factory() -> httpx.AsyncClient:
+            entry["clients_opened"] += 1
+            return httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, read=90.0),
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                event_hooks={"response": [on_response]}
+            )
+
+        entry["transport"] = ApifyTransport(token, client_factory=client_factory)
+        return entry
+
+    def get(self, token: str) -> ApifyTransport:
+        """Return the shared transport for token, creating it on first use"""
+        key = token_id(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._new_entry(token)
+            self._entries[key] = entry
+            logger.info(f"Opened pooled Apify client for token {_mask_token(token)} (http2={HTTP2_AVAILABLE})")
+        entry["last_used"] = time.monotonic()
+        return entry["transport"]
+
+    async def evict_idle(self) -> int:
+        """
+        Close the HTTP clients of transports idle for longer than idle_timeout
+        and drop the transports idle for longer than entry_ttl
+        """
+        now = time.monotonic()
+        evicted = 0
+        for key, entry in list(self._entries.items()):
+            transport = entry["transport"]
+            watching = transport._run_watcher is not None and transport._run_watcher.watching
+            idle = now - entry["last_used"]
+            if watching or idle < self.idle_timeout:
+                continue
+            if idle >= self.entry_ttl:
+                del self._entries[key]
+                await transport.close()
+                self.expired += 1
+                logger.info(f"Dropped unused Apify transport for token {entry['masked_token']}")
+                continue
+            if transport.client.is_closed:
+                continue
+            await transport.close_idle_client()
+            evicted += 1
+            logger.info(f"Closed idle Apify HTTP client for token {entry['masked_token']}")
+        self.evictions += evicted
+        return evicted
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning(f"Apify client pool sweep failed: {str(e)}")
+
+    def start(self):
+        """Start the idle sweeper on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        """Stop the sweeper and close every pooled transport"""
+        if self._sweeper and not self._sweeper.done():
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+        for entry in self._entries.values():
+            await entry["transport"].close()
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection reuse statistics per token and in total"""
+        now = time.monotonic()
+        clients = []
+        for entry in self._entries.values():
+            connections = entry["new_connections"] + entry["reused_connections"]
+            clients.append({
+                "token": entry["masked_token"],
+                "requests": entry["requests"],
+                "new_connections": entry["new_connections"],
+                "reused_connections": entry["reused_connections"],
+                "reuse_ratio": round(entry["reused_connections"] / connections, 3) if connections else 0.0,
+                "clients_opened": entry["clients_opened"],
+                "client_open": not entry["transport"].client.is_closed,
+                "http_versions": dict(entry["http_versions"]),
+                "circuit": entry["transport"].breaker.stats(),
+                "idle_seconds": round(now - entry["last_used"], 1),
+            })
+        return {
+            "http2_available": HTTP2_AVAILABLE,
+            "idle_timeout": self.idle_timeout,
+            "pooled_clients": len(clients),
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "requests": sum(c["requests"] for c in clients),
+            "new_connections": sum(c["new_connections"] for c in clients),
+            "reused_connections": sum(c["reused_connections"] for c in clients),
+            "clients": clients,
+        }
+
+
+# Global pool instance
+apify_pool = ApifyClientPool(
+    idle_timeout=settings.apify_pool_idle_timeout,
+    max_connections=settings.apify_pool_max_connections,
+    entry_ttl=settings.apify_pool_entry_ttl
+)
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.clients.apify_pool import _mask_token, apify_pool, token_id
+from app.clients.apify_transport import ApifyTransport
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenError, ExternalAPIError
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Concurrent runs assumed for an account whose limits could not be read
+DEFAULT_MAX_CONCURRENT_RUNS = 25
+
+
+class ApifyTokenPool:
+    """
+    Spreads actor runs over several Apify tokens (accounts).
+
+    Every run holds a lease on one token while it is started and ingested.
+    A new lease goes to the token with the most concurrency headroom,
+    weighted by the share of its monthly spend limit still left and by its
+    recent failures. Both limits come from the account's /users/me/limits,
+    read at most every limits_ttl seconds; in between, the pool's own
+    leases are counted against the headroom. Tokens that are out of quota
+    or whose circuit is open are skipped, and when every usable token is at
+    its concurrency limit a lease waits for another to be released.
+    """
+
+    def __init__(self, tokens: List[str], limits_ttl: float = 60):
+        self.limits_ttl = limits_ttl
+        self._tokens: Dict[str, str] = {}
+        self._usage: Dict[str, Dict[str, Any]] = {}
+        for token in tokens:
+            token = token.strip()
+            if not token or token_id(token) in self._tokens:
+                continue
+            self._tokens[token_id(token)] = token
+            self._usage[token_id(token)] = {
+                "leases": 0,
+                "runs_started": 0,
+                "records_requested": 0,
+                "items_read": 0,
+                "max_runs": None,
+                "external_runs": 0,
+                "usage_usd": None,
+                "max_usage_usd": None,
+                "limits_read_at": None,
+                "limits_error": None,
+            }
+        self._refresh_lock = asyncio.Lock()
+        self._released = asyncio.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._tokens)
+
+    @property
+    def size(self) -> int:
+        return len(self._tokens)
+
+    def transport(self, token_id: str) -> Optional[ApifyTransport]:
+        """Shared transport of a pooled token, None if the token is not in the pool"""
+        token = self._tokens.get(token_id)
+        return apify_pool.get(token) if token else None
+
+    async def _read_limits(self, token_id: str):
+        usage = self._usage[token_id]
+        try:
+            data = await self.transport(token_id).get_limits()
+        except ExternalAPIError as e:
+            # Keep the last reading; the token is tried again after limits_ttl
+            usage["limits_error"] = str(e)
+            logger.warning(f"Could not read Apify limits for token {_mask_token(self._tokens[token_id])}: {str(e)}")
+        else:
+            limits = data.get("limits") or {}
+            current = data.get("current") or {}
+            usage["max_runs"] = limits.get("maxConcurrentActorJobs")
+            usage["max_usage_usd"] = limits.get("maxMonthlyUsageUsd")
+            usage["usage_usd"] = current.get("monthlyUsageUsd")
+            # Runs of the account that were not leased here (other services, the console)
+            usage["external_runs"] = max(0, (current.get("activeActorJobCount") or 0) - usage["leases"])
+            usage["limits_error"] = None
+        usage["limits_read_at"] = time.monotonic()
+
+    async def _refresh_stale(self):
+        async with self._refresh_lock:
+            now = time.monotonic()
+            stale = [
+                tid for tid, usage in self._usage.items()
+                if usage["limits_read_at"] is None or now - usage["limits_read_at"] >= self.limits_ttl
+            ]
+            if stale:
+                await asyncio.gather(*(self._read_limits(tid) for tid in stale))
+
+    def _headroom(self, token_id: str) -> int:
+        usage = self._usage[token_id]
+        max_runs = usage["max_runs"] or DEFAULT_MAX_CONCURRENT_RUNS
+        return max_runs - usage["external_runs"] - usage["leases"]
+
+    def _quota_left(self, token_id: str) -> float:
+        """Share of the monthly spend limit still available; 1.0 when unknown"""
+        usage = self._usage[token_id]
+        if not usage["max_usage_usd"] or usage["usage_usd"] is None:
+            return 1.0
+        return max(0.0, 1.0 - usage["usage_usd"] / usage["max_usage_usd"])
+
+    def _score(self, token_id: str) -> float:
+        breaker = self.transport(token_id).breaker
+        return self._headroom(token_id) * self._quota_left(token_id) / (1 + breaker.consecutive_failures)
+
+    async def _acquire(self) -> str:
+        while True:
+            await self._refresh_stale()
+            async with self._released:
+                circuits_open = [tid for tid in self._tokens if self.transport(tid).breaker.state == "open"]
+                usable = [tid for tid in self._tokens if tid not in circuits_open and self._quota_left(tid) > 0]
+                if not usable:
+                    if circuits_open:
+                        raise CircuitOpenError(f"Every usable Apify token in the pool has an open circuit ({len(circuits_open)}/{self.size})")
+                    raise ExternalAPIError("Every Apify token in the pool has used up its monthly limit")
+
+                best = max(usable, key=self._score)
+                if self._headroom(best) > 0:
+                    self._usage[best]["leases"] += 1
+                    return best
+
+                # Every usable account is at its concurrency limit
+                try:
+                    await asyncio.wait_for(self._released.wait(), timeout=self.limits_ttl)
+                except asyncio.TimeoutError:
+                    pass
+
+    @asynccontextmanager
+    async def lease(self, token_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Hold a run slot on the best token and yield its id. Passing token_id
+        pins the lease to that token, e.g. to re-attach to a run started on it.
+        """
+        if token_id is None:
+            token_id = await self._acquire()
+        elif token_id in self._usage:
+            self._usage[token_id]["leases"] += 1
+        else:
+            raise ExternalAPIError("Apify token is not in the token pool")
+        try:
+            yield token_id
+        finally:
+            self._usage[token_id]["leases"] -= 1
+            async with self._released:
+                self._released.notify_all()
+
+    def record_run(self, token_id: str, records: int):
+        usage = self._usage.get(token_id)
+        if usage is not None:
+            usage["runs_started"] += 1
+            usage["records_requested"] += records
+
+    def record_items(self, token_id: str, count: int):
+        usage = self._usage.get(token_id)
+        if usage is not None:
+            usage["items_read"] += count
+
+    def stats(self) -> Dict[str, Any]:
+        """Leases, limits and usage per pooled token"""
+        tokens = []
+        for tid, token in self._tokens.items():
+            usage = self._usage[tid]
+            tokens.append({
+                "token": _mask_token(token),
+                "token_id": tid,
+                "leases": usage["leases"],
+                "headroom": self._headroom(tid),
+                "quota_left": round(self._quota_left(tid), 3),
+                "usage_usd": usage["usage_usd"],
+                "max_usage_usd": usage["max_usage_usd"],
+                "max_runs": usage["max_runs"],
+                "external_runs": usage["external_runs"],
+                "runs_started": usage["runs_started"],
+                "records_requested": usage["records_requested"],
+                "items_read": usage["items_read"],
+                "circuit": self.transport(tid).breaker.state,
+                "limits_error": usage["limits_error"],
+            })
+        return {
+            "enabled": self.enabled,
+            "limits_ttl": self.limits_ttl,
+            "runs_started": sum(t["runs_started"] for t in tokens),
+            "tokens": tokens,
+        }
+
+
+# Global token pool instance (empty unless APIFY_TOKEN_POOL is set)
+apify_token_pool = ApifyTokenPool(settings.apify_token_pool.split(","), limits_ttl=settings.apify_token_limits_ttl)
@@ -0,0 +1,321 @@
+import asyncio
+import base64
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from app.core.config import settings
+from app.clients.circuit_breaker import CircuitBreaker
+from app.clients.run_watcher import RunWatcher, TERMINAL_RUN_STATUSES
+from app.core.exceptions import CircuitOpenError, ExternalAPIError
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Run events that resolve a waiting task when webhooks are enabled
+WEBHOOK_EVENT_TYPES = [
+    "ACTOR.RUN.SUCCEEDED",
+    "ACTOR.RUN.FAILED",
+    "ACTOR.RUN.ABORTED",
+    "ACTOR.RUN.TIMED_OUT",
+]
+WEBHOOK_SECRET_HEADER = "X-Apify-Webhook-Secret"
+WEBHOOK_RECEIVER_PATH = "/api/v1/webhooks/apify"
+
+# Error statuses that say the token or account is unhealthy and count against its circuit breaker
+BREAKER_FAILURE_STATUSES = {401, 402, 403, 429}
+
+
+def is_transient_error(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    Whether a failed Apify call is worth retrying: rate limiting, server
+    errors and network failures. Calls that are not idempotent (starting a
+    run) are only retried when the request cannot have been processed.
+    """
+    if not isinstance(error, ExternalAPIError) or isinstance(error, CircuitOpenError):
+        return False
+    if error.status_code == 429:
+        return True
+    if not idempotent:
+        return isinstance(error.__cause__, (httpx.ConnectError, httpx.ConnectTimeout))
+    return error.status_code is None or error.status_code >= 500
+
+
+def apify_retrying(idempotent: bool = True) -> AsyncRetrying:
+    """Retry policy for Apify calls: transient errors only, with jittered exponential backoff"""
+    return AsyncRetrying(
+        stop=stop_after_attempt(max(1, settings.apify_retry_attempts)),
+        wait=wait_random_exponential(multiplier=0.5, max=settings.apify_retry_max_wait),
+        retry=retry_if_exception(lambda error: is_transient_error(error, idempotent)),
+        before_sleep=_log_retry,
+        reraise=True
+    )
+
+
+def _log_retry(retry_state: RetryCallState):
+    logger.warning(
+        f"Retrying Apify call in {retry_state.next_action.sleep:.1f}s "
+        f"(attempt {retry_state.attempt_number} failed: {retry_state.outcome.exception()})"
+    )
+
+
+def build_run_webhooks(receiver_base_url: str, secret: str = "") -> str:
+    """Encode the ad-hoc webhook definition Apify expects in the 'webhooks' run option"""
+    webhook: Dict[str, Any] = {
+        "eventTypes": WEBHOOK_EVENT_TYPES,
+        "requestUrl": f"{receiver_base_url.rstrip('/')}{WEBHOOK_RECEIVER_PATH}",
+    }
+    if secret:
+        webhook["headersTemplate"] = json.dumps({WEBHOOK_SECRET_HEADER: secret})
+    return base64.b64encode(json.dumps([webhook]).encode("utf-8")).decode("ascii")
+
+
+def check_webhook_settings():
+    """
+    Refuse webhook configurations the receiver cannot serve safely. Events
+    are only accepted with the shared secret, and they must reach the
+    process watching the run, which rules out the worker queue.
+    """
+    if not settings.apify_webhook_base_url:
+        return
+    if not settings.apify_webhook_secret:
+        raise ExternalAPIError("APIFY_WEBHOOK_BASE_URL is set but APIFY_WEBHOOK_SECRET is empty; webhook mode needs a secret")
+    if settings.scrape_execution_mode == "worker":
+        raise ExternalAPIError("Apify webhooks cannot be used with SCRAPE_EXECUTION_MODE=worker: runs are watched by the worker, not the API process")
+
+
+class ApifyTransport:
+    """
+    Non-blocking client for the Apify REST API.
+
+    Every call goes through an ``httpx.AsyncClient`` so long actor runs never
+    block the event loop the way the synchronous ``ApifyClient`` did.
+
+    Transient failures are retried per request with jittered backoff, and
+    every call passes the token's circuit breaker, so a failing token or
+    account is refused locally instead of being hammered.
+    """
+
+    def __init__(self, token: str, base_url: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 client_factory: Optional[Callable[[], httpx.AsyncClient]] = None):
+        self.token = token
+        self.base_url = (base_url or settings.apify_api_base_url).rstrip("/")
+        self._client_factory = client_factory
+        if http_client is not None:
+            self.client = http_client
+        elif client_factory is not None:
+            self.client = client_factory()
+        else:
+            self.client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=90.0))
+        self._run_watcher: Optional[RunWatcher] = None
+        self.breaker = CircuitBreaker(
+            f"token ...{token[-4:]}",
+            failure_threshold=settings.apify_breaker_failure_threshold,
+            reset_timeout=settings.apify_breaker_reset_timeout
+        )
+
+    @property
+    def webhooks_enabled(self) -> bool:
+        return bool(settings.apify_webhook_base_url)
+
+    @property
+    def run_watcher(self) -> RunWatcher:
+        """
+        Shared watcher for every run started through this transport. It
+        long-polls, or only safety-polls when run-finished webhooks are on.
+        """
+        if self._run_watcher is None:
+            safety_poll_interval = settings.apify_webhook_safety_poll_interval if self.webhooks_enabled else None
+            self._run_watcher = RunWatcher(self.get_run, safety_poll_interval=safety_poll_interval)
+        return self._run_watcher
+
+    def http_client(self) -> httpx.AsyncClient:
+        """The HTTP client, reopened if it was closed while idle"""
+        if self.client.is_closed and self._client_factory is not None:
+            self.client = self._client_factory()
+        return self.client
+
+    async def close_idle_client(self):
+        """Close the HTTP client's connections; the next request reopens it"""
+        await self.client.aclose()
+
+    @staticmethod
+    def _actor_path(actor_id: str) -> str:
+        """Apify expects 'username~actor-name' in URL paths"""
+        return actor_id.replace("/", "~")
+
+    async def _request(self, method: str, path: str, idempotent: bool = True, guarded: bool = True,
+                       **kwargs) -> httpx.Response:
+        """
+        Send an authenticated request, retrying transient failures, and raise
+        ExternalAPIError once it fails for good. Unguarded requests bypass
+        the circuit breaker.
+        """
+        async for attempt in apify_retrying(idempotent):
+            with attempt:
+                return await self._send(method, path, guarded, **kwargs)
+
+    async def _send(self, method: str, path: str, guarded: bool, **kwargs) -> httpx.Response:
+        if guarded:
+            self.breaker.before_call()
+        headers = dict(kwargs.pop("headers", {}))
+        headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            response = await self.http_client().request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            if guarded:
+                if status_code in BREAKER_FAILURE_STATUSES or status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            raise ExternalAPIError(
+                f"Apify API {method} {path} failed with status {status_code}: {e.response.text[:200]}",
+                status_code=status_code
+            ) from e
+        except httpx.HTTPError as e:
+            if guarded:
+                self.breaker.record_failure()
+            raise ExternalAPIError(f"Apify API {method} {path} failed: {str(e)}") from e
+        if guarded:
+            self.breaker.record_success()
+        return response
+
+    async def start_run(self, actor_id: str, run_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Start an actor run without waiting for it to finish"""
+        params = None
+        if self.webhooks_enabled:
+            # Ad-hoc webhook: Apify calls our receiver when this run finishes
+            params = {"webhooks": build_run_webhooks(settings.apify_webhook_base_url, settings.apify_webhook_secret)}
+        response = await self._request(
+            "POST", f"/acts/{self._actor_path(actor_id)}/runs", idempotent=False, json=run_input, params=params
+        )
+        return response.json()["data"]
+
+    async def get_run(self, run_id: str, wait_for_finish: int = 0) -> Dict[str, Any]:
+        """
+        Get an actor run. With wait_for_finish > 0 Apify holds the request
+        open for up to that many seconds (max 60) until the run finishes.
+        """
+        params = {"waitForFinish": wait_for_finish} if wait_for_finish else None
+        response = await self._request("GET", f"/actor-runs/{run_id}", params=params)
+        return response.json()["data"]
+
+    async def abort_run(self, run_id: str) -> Dict[str, Any]:
+        """
+        Abort a running actor run; the dataset written so far is kept.
+        Aborts bypass the circuit breaker so runs can be stopped even while
+        the token's other calls are being refused.
+        """
+        response = await self._request("POST", f"/actor-runs/{run_id}/abort", guarded=False)
+        return response.json()["data"]
+
+    async def get_limits(self) -> Dict[str, Any]:
+        """Limits and current usage (spend, running actor jobs) of the token's account"""
+        response = await self._request("GET", "/users/me/limits")
+        return response.json()["data"]
+
+    async def wait_for_run(self, run_id: str) -> Dict[str, Any]:
+        """Wait for the run to reach a terminal status via the shared run watcher"""
+        return await self.run_watcher.wait(run_id)
+
+    async def call_actor(self, actor_id: str, run_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Start an actor run and wait for it to finish (async ApifyClient.actor().call())"""
+        run = await self.start_run(actor_id, run_input)
+        logger.info(f"Apify actor run started - run_id: {run['id']}, actor: {actor_id}")
+        return await self.wait_for_run(run["id"])
+
+    async def list_items(self, dataset_id: str, offset: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Fetch one page of dataset items"""
+        response = await self._request(
+            "GET",
+            f"/datasets/{dataset_id}/items",
+            params={"offset": offset, "limit": limit, "clean": "true", "format": "json"}
+        )
+        return response.json()
+
+    async def iterate_pages(self, dataset_id: str, page_size: int = 1000, offset: int = 0) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield dataset items one page at a time, starting at offset"""
+        while True:
+            page = await self.list_items(dataset_id, offset=offset, limit=page_size)
+            if page:
+                yield page
+            if len(page) < page_size:
+                break
+            offset += len(page)
+
+    async def iterate_items(self, dataset_id: str, page_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all dataset items, fetching one page at a time"""
+        async for page in self.iterate_pages(dataset_id, page_size=page_size):
+            for item in page:
+                yield item
+
+    async def close(self):
+        """Stop the run watcher and close the underlying HTTP client"""
+        if self._run_watcher:
+            await self._run_watcher.close()
+            self._run_watcher = None
+        await self.client.aclose()
+
+
+class DatasetTail:
+    """
+    Follow a run's default dataset by offset while the run is still executing.
+
+    Every available page is yielded as soon as it can be read. Completion is
+    detected by the transport's shared RunWatcher, so tailing adds no status
+    polling of its own. Dataset reads start every poll_interval seconds and
+    back off up to max_poll_interval while the dataset stays unchanged.
+    """
+
+    def __init__(self, transport: ApifyTransport, run: Dict[str, Any], page_size: int = 1000,
+                 poll_interval: float = 2, offset: int = 0, max_poll_interval: float = 15):
+        self.transport = transport
+        self.run = run
+        self.page_size = page_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.offset = offset
+
+    @property
+    def finished(self) -> bool:
+        return self.run.get("status") in TERMINAL_RUN_STATUSES
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield new dataset pages until the run has finished and the dataset is drained"""
+        dataset_id = self.run["defaultDatasetId"]
+        finished = None if self.finished else self.transport.run_watcher.watch(self.run["id"])
+        interval = self.poll_interval
+        try:
+            while True:
+                # Read the status before draining so nothing written between the
+                # final drain and the terminal status can be missed
+                drain_is_final = finished is None or finished.done()
+                if finished is not None and finished.done():
+                    self.run = finished.result()
+
+                offset_before = self.offset
+                while True:
+                    page = await self.transport.list_items(dataset_id, offset=self.offset, limit=self.page_size)
+                    if page:
+                        self.offset += len(page)
+                        yield page
+                    if len(page) < self.page_size:
+                        break
+
+                if drain_is_final:
+                    return
+
+                # Read again soon while items keep arriving, less often while idle
+                if self.offset > offset_before:
+                    interval = self.poll_interval
+                else:
+                    interval = min(self.max_poll_interval, interval * 2)
+                await asyncio.wait({finished}, timeout=interval)
+        finally:
+            if finished is not None and not finished.done():
+                finished.cancel()
@@ -0,0 +1,80 @@
+import time
+from typing import Any, Dict, Optional
+
+from app.core.exceptions import CircuitOpenError
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the Apify calls made with one token.
+
+    After failure_threshold consecutive failures the circuit opens and every
+    call is refused with CircuitOpenError, without touching the network, for
+    reset_timeout seconds. Then a single trial call is let through
+    (half-open): success closes the circuit, failure opens it again. A trial
+    that never reports back (e.g. it was cancelled) is replaced after
+    another reset_timeout.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.refused_calls = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        if state == "half_open" and (self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout):
+            self._trial_started_at = now
+            logger.info(f"Apify circuit for {self.name} half-open, sending a trial call")
+            return
+        self.refused_calls += 1
+        retry_in = max(0.0, self.reset_timeout - (now - self._opened_at))
+        raise CircuitOpenError(f"Apify circuit for {self.name} is open after repeated failures; retry in {retry_in:.0f}s")
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info(f"Apify circuit for {self.name} closed")
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        trial_failed = self._trial_started_at is not None
+        self._trial_started_at = None
+        if trial_failed or (self._opened_at is None and self.consecutive_failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.opened_count += 1
+            logger.warning(
+                f"Apify circuit for {self.name} opened after {self.consecutive_failures} consecutive failures; "
+                f"refusing calls for {self.reset_timeout:.0f}s"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_count": self.opened_count,
+            "refused_calls": self.refused_calls,
+        }
@@ -0,0 +1,134 @@
+import asyncio
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.clients.shard_planner import lead_key
+
+
+class LeadAllocator:
+    """
+    Tracks the unique leads of one scrape task against its target.
+
+    Every page goes through admit(), which drops leads already collected by
+    any URL of the task and caps the total at the target, so only
+    de-duplicated leads count as progress. satisfied is set as soon as the
+    target is met so running actor runs can be stopped.
+
+    reserve() sizes the request for the next URL as its share of what is
+    still missing: the leads not yet kept and not already expected from
+    URLs in flight, spread over the URLs left to plan, then inflated by the
+    duplicate rate observed so far plus a margin. A URL that finishes hands
+    its reservation back with release(), so the URLs after it pick up any
+    shortfall. While the URLs in flight are expected to cover the target,
+    reserve() waits for one of them to finish instead of asking for leads
+    nobody may need.
+
+    Accounting (all counts are leads):
+    - requested: leads asked from Apify across all URLs
+    - scraped: normalized leads received
+    - kept: unique leads stored on the task
+    - duplicates: leads dropped as already collected
+    - over_target: unique leads dropped because the target was already met
+    - wasted: duplicates + over_target, scraped but not kept
+    """
+
+    def __init__(self, target: int, margin: float = 0.1, known_keys: Optional[Iterable[str]] = None, kept: int = 0,
+                 urls: int = 1, accounting: Optional[Dict[str, Any]] = None):
+        self.target = target
+        self.margin = max(0.0, margin)
+        self.seen_keys = set(known_keys or ())
+        # Counters of a resumed task carry on from its checkpoint
+        accounting = accounting or {}
+        self.kept = kept
+        self.requested = accounting.get("requested", 0)
+        self.scraped = max(accounting.get("scraped", 0), kept)
+        self.duplicates = accounting.get("duplicates", 0)
+        self.over_target = accounting.get("over_target", 0)
+        # URLs still to plan and the unique leads expected from URLs in flight
+        self.urls_left = max(1, urls)
+        self.in_flight = 0
+        self._changed = asyncio.Condition()
+        self.satisfied = asyncio.Event()
+        if self.remaining <= 0:
+            self.satisfied.set()
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.target - self.kept)
+
+    @property
+    def duplicate_rate(self) -> float:
+        return self.duplicates / self.scraped if self.scraped else 0.0
+
+    def _plan(self) -> Tuple[int, int]:
+        uncovered = self.remaining - self.in_flight
+        if uncovered <= 0:
+            return 0, 0
+        share = math.ceil(uncovered / self.urls_left)
+        # Never assume more than half of what a URL returns is duplicate
+        expected_unique = max(0.5, 1.0 - self.duplicate_rate)
+        return share, math.ceil(share * (1.0 + self.margin) / expected_unique)
+
+    async def reserve(self) -> Optional[Dict[str, int]]:
+        """
+        Plan the next URL. Returns its reservation - the leads to ask Apify
+        for ("request") and the unique leads still expected from it
+        ("pending") - or None once the target is met. Pass the reservation
+        to admit() with the URL's pages and to release() when it finishes.
+        """
+        async with self._changed:
+            while not self.satisfied.is_set():
+                share, request = self._plan()
+                if request:
+                    self.urls_left = max(1, self.urls_left - 1)
+                    self.in_flight += share
+                    self.requested += request
+                    return {"request": request, "pending": share}
+                # The URLs in flight should cover the rest; see whether they do
+                await self._changed.wait()
+            return None
+
+    async def release(self, reservation: Optional[Dict[str, int]]):
+        """Hand back what a finished URL was expected to add but did not"""
+        if not reservation:
+            return
+        async with self._changed:
+            self.in_flight = max(0, self.in_flight - reservation["pending"])
+            reservation["pending"] = 0
+            self._changed.notify_all()
+
+    def admit(self, leads: List[Dict[str, Any]], reservation: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Return the leads of a page that are new and still needed"""
+        self.scraped += len(leads)
+        admitted = []
+        for lead in leads:
+            key = lead_key(lead)
+            if key is not None:
+                if key in self.seen_keys:
+                    self.duplicates += 1
+                    continue
+                self.seen_keys.add(key)
+            if len(admitted) >= self.remaining:
+                self.over_target += 1
+                continue
+            admitted.append(lead)
+        self.kept += len(admitted)
+        if reservation:
+            # Leads kept are no longer expected from the URL
+            delivered = min(len(admitted), reservation["pending"])
+            reservation["pending"] -= delivered
+            self.in_flight -= delivered
+        if self.remaining <= 0:
+            self.satisfied.set()
+        return admitted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "requested": self.requested,
+            "scraped": self.scraped,
+            "kept": self.kept,
+            "duplicates": self.duplicates,
+            "over_target": self.over_target,
+            "wasted": self.duplicates + self.over_target,
+        }
@@ -0,0 +1,445 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# An extractor turns one raw Apollo item (and its organization's values) into a field value
+Extractor = Callable[[Dict[str, Any], "Organization"], str]
+FieldPlan = Tuple[Tuple[str, Extractor], ...]
+
+# Version of the canonical lead format; part of the scrape cache key so leads
+# cached in an older format are not served
+CANONICAL_LEAD_VERSION = 2
+
+_PHONE_RE = re.compile(r'[\+]?[\d\s\-\(\)\.]{7,}')
+_NOT_PHONE_CHAR_RE = re.compile(r'[^\d+]')
+_NOT_DIGIT_RE = re.compile(r'[^\d]')
+_DOMAIN_RE = re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Host a social URL must mention to be kept
+_URL_DOMAINS = {
+    "linkedin": ("linkedin.com",),
+    "twitter": ("twitter.com", "x.com"),
+    "instagram": ("instagram.com",),
+    "facebook": ("facebook.com",),
+}
+
+
+def format_phone(phone: str) -> str:
+    """Format phone numbers with lenient validation"""
+    if not phone:
+        return ""
+    phone = str(phone).strip()
+    if not phone:
+        return ""
+
+    # First, try to extract any phone-like pattern
+    phone_pattern = _PHONE_RE.search(phone)
+    if phone_pattern:
+        phone = phone_pattern.group()
+
+    # Keep digits and +
+    cleaned = _NOT_PHONE_CHAR_RE.sub('', phone)
+    if not cleaned:
+        return ""
+
+    if cleaned.startswith('+'):
+        # International format
+        digits = _NOT_DIGIT_RE.sub('', cleaned[1:])
+        if len(digits) >= 7:
+            if len(digits) == 11 and digits.startswith('1'):  # US number with country code
+                return f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
+            if len(digits) == 10:  # US number without country code
+                return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+            return f"+{digits}"
+    else:
+        # Domestic format
+        digits = _NOT_DIGIT_RE.sub('', cleaned)
+        if len(digits) == 10:  # Standard US format
+            return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+        if len(digits) == 11 and digits.startswith('1'):  # US with leading 1
+            return f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
+        if len(digits) >= 7:  # Accept any number with 7+ digits
+            return digits
+
+    # If we can't format it nicely, return the cleaned version if it has enough digits
+    if len(cleaned.replace('+', '')) >= 7:
+        return cleaned
+    return ""
+
+
+def format_url(url: str, url_type: str) -> str:
+    """Format URLs for different platforms with lenient validation"""
+    if not url:
+        return ""
+    url = str(url).strip()
+    if not url:
+        return ""
+
+    # Basic URL cleaning
+    if url.lower().startswith(('www.', 'http://www.', 'https://www.www.')):
+        if not url.startswith('http'):
+            url = 'https://' + url
+    elif not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    domains = _URL_DOMAINS.get(url_type)
+    if domains is not None:
+        lowered = url.lower()
+        return url if any(domain in lowered for domain in domains) else ""
+
+    if url_type == "website":
+        # Very lenient - anything with a domain pattern
+        return url if _DOMAIN_RE.search(url) else ""
+
+    return url
+
+
+def _personal_phone(item: Dict[str, Any]) -> Optional[str]:
+    """Formatted phone of the person, None if the item has no personal number"""
+    # Try direct phone field first
+    phone = item.get("sanitized_phone") or item.get("phone")
+    if phone:
+        return format_phone(str(phone))
+
+    # Try phone_numbers array
+    phone_numbers = item.get("phone_numbers")
+    if phone_numbers and isinstance(phone_numbers, list):
+        first_phone = phone_numbers[0]
+        if isinstance(first_phone, dict):
+            phone_num = first_phone.get("sanitized_number") or first_phone.get("raw_number")
+            if phone_num:
+                return format_phone(str(phone_num))
+
+    return None
+
+
+class Organization(NamedTuple):
+    """Company-level lead values of an Apollo organization, already formatted"""
+    name: Optional[str]  # None without a name, so the item's organization_name is used
+    industry: str
+    twitter: str
+    facebook: str
+    website: Optional[str]  # None without a website, so the item's organization_website_url is used
+    phone: str
+
+
+# Raw organization keys the Organization values are derived from, in argument order
+_ORGANIZATION_KEYS = (
+    "name", "industry", "twitter_url", "facebook_url",
+    "website_url", "primary_domain", "phone", "sanitized_phone"
+)
+
+
+def _build_organization(name, industry, twitter_url, facebook_url,
+                        website_url, primary_domain, phone, sanitized_phone) -> Organization:
+    twitter_url = str(twitter_url or "").strip()
+    facebook_url = str(facebook_url or "").strip()
+    website = str(website_url or "").strip() or str(primary_domain or "").strip()
+    if website and not website.startswith("http"):
+        website = "https://" + website
+    org_phone = phone or sanitized_phone
+    return Organization(
+        name=str(name).strip() if name else None,
+        industry=str(industry or "").strip(),
+        twitter=format_url(twitter_url, "twitter") if twitter_url else "",
+        facebook=format_url(facebook_url, "facebook") if facebook_url else "",
+        website=format_url(website, "website") if website else None,
+        phone=format_phone(str(org_phone)) if org_phone else "",
+    )
+
+
+# Leads of one company repeat its organization record, so its formatted
+# values are memoized by the raw values, per process and bounded by
+# SCRAPE_NORMALIZE_CACHE_SIZE
+_cached_organization = lru_cache(maxsize=settings.scrape_normalize_cache_size)(_build_organization)
+
+_NO_ORGANIZATION = _build_organization(None, None, None, None, None, None, None, None)
+
+
+def organization_values(org: Dict[str, Any]) -> Organization:
+    """Formatted company-level values of a raw Apollo organization dict"""
+    if not org:
+        return _NO_ORGANIZATION
+    raw = [org.get(key) for key in _ORGANIZATION_KEYS]
+    try:
+        return _cached_organization(*raw)
+    except TypeError:
+        # An unhashable raw value cannot be a cache key
+        return _build_organization(*raw)
+
+
+def organization_cache_stats() -> Dict[str, Any]:
+    """Hit rate of the organization memo in this process"""
+    info = _cached_organization.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+# Field extractors: the Apollo-to-lead mapping of each supported field
+
+def _extract_name(item: Dict[str, Any], org: Organization) -> str:
+    return str(item.get("name") or "").strip()
+
+
+def _extract_email(item: Dict[str, Any], org: Organization) -> str:
+    return str(item.get("email") or "").strip()
+
+
+def _extract_phone(item: Dict[str, Any], org: Organization) -> str:
+    phone = _personal_phone(item)
+    return org.phone if phone is None else phone
+
+
+def _extract_location(item: Dict[str, Any], org: Organization) -> str:
+    parts = [str(item[key]) for key in ("city", "state", "country") if item.get(key)]
+    # Fall back to present_raw_address when there are no parts
+    if not parts and item.get("present_raw_address"):
+        return str(item["present_raw_address"]).strip()
+    return ", ".join(parts)
+
+
+def _extract_company(item: Dict[str, Any], org: Organization) -> str:
+    if org.name is not None:
+        return org.name
+    return str(item.get("organization_name") or "").strip()
+
+
+def _extract_title(item: Dict[str, Any], org: Organization) -> str:
+    return str(item.get("title") or "").strip()
+
+
+def _extract_industry(item: Dict[str, Any], org: Organization) -> str:
+    # Personal industry first, then company industry
+    personal_industry = str(item.get("industry") or "").strip()
+    company_industry = org.industry
+    return personal_industry or company_industry
+
+
+def _extract_linkedin(item: Dict[str, Any], org: Organization) -> str:
+    linkedin_url = str(item.get("linkedin_url") or "").strip()
+    return format_url(linkedin_url, "linkedin") if linkedin_url else ""
+
+
+def _extract_twitter(item: Dict[str, Any], org: Organization) -> str:
+    # Personal twitter first, then company twitter
+    twitter_url = str(item.get("twitter_url") or "").strip()
+    return format_url(twitter_url, "twitter") if twitter_url else org.twitter
+
+
+def _extract_instagram(item: Dict[str, Any], org: Organization) -> str:
+    # Instagram is rarely available in Apollo data, so often empty
+    instagram_url = str(item.get("instagram_url") or "").strip()
+    return format_url(instagram_url, "instagram") if instagram_url else ""
+
+
+def _extract_facebook(item: Dict[str, Any], org: Organization) -> str:
+    # Personal facebook first, then company facebook
+    facebook_url = str(item.get("facebook_url") or "").strip()
+    return format_url(facebook_url, "facebook") if facebook_url else org.facebook
+
+
+def _extract_website(item: Dict[str, Any], org: Organization) -> str:
+    # Personal website first, then the company website fields
+    personal_website = str(item.get("website") or item.get("website_url") or "").strip()
+    if personal_website:
+        return format_url(personal_website, "website")
+    if org.website is not None:
+        return org.website
+    company_website = str(item.get("organization_website_url") or "").strip()
+    if not company_website:
+        return ""
+    if not company_website.startswith("http"):
+        company_website = "https://" + company_website
+    return format_url(company_website, "website")
+
+
+def _extract_unknown(item: Dict[str, Any], org: Organization) -> str:
+    return ""
+
+
+FIELD_EXTRACTORS: Dict[str, Extractor] = {
+    "name": _extract_name,
+    "email": _extract_email,
+    "phone": _extract_phone,
+    "location": _extract_location,
+    "company": _extract_company,
+    "title": _extract_title,
+    "industry": _extract_industry,
+    "linkedin": _extract_linkedin,
+    "twitter": _extract_twitter,
+    "instagram": _extract_instagram,
+    "facebook": _extract_facebook,
+    "website": _extract_website,
+}
+
+
+@lru_cache(maxsize=64)
+def _compile(fields: Tuple[str, ...]) -> FieldPlan:
+    return tuple((field, FIELD_EXTRACTORS.get(field, _extract_unknown)) for field in fields)
+
+
+def compile_field_plan(fields: Sequence[str]) -> FieldPlan:
+    """
+    Resolve the requested fields to their extractors once; the plan is
+    reused for every item (and cached per field list across jobs).
+    Unknown fields map to an extractor that always returns "".
+    """
+    return _compile(tuple(fields))
+
+
+def _normalize_item_safely(item: Any, plan: FieldPlan, index: int) -> Optional[Dict[str, str]]:
+    """Slow path for an item that failed: isolate errors per field"""
+    try:
+        raw_org = item.get("organization", {}) or {}
+    except Exception as item_error:
+        logger.error(f"Error processing item {index + 1}: {str(item_error)}")
+        return None
+    try:
+        org = organization_values(raw_org)
+    except Exception as org_error:
+        # Fields that need the organization fail on their own below
+        logger.warning(f"Error processing organization for item {index + 1}: {str(org_error)}")
+        org = None
+
+    lead = {}
+    for field, extract in plan:
+        try:
+            lead[field] = extract(item, org)
+        except Exception as field_error:
+            logger.warning(f"Error processing field '{field}' for item {index + 1}: {str(field_error)}")
+            lead[field] = ""  # Ensure field exists even if processing fails
+    return lead
+
+
+def normalize_items(items: List[Dict[str, Any]], plan: FieldPlan) -> List[Dict[str, str]]:
+    """
+    Map raw Apollo items to leads with a compiled field plan. Items that
+    are not dicts are skipped; a field that fails to extract is left empty.
+    """
+    processed = []
+    append = processed.append
+    for index, item in enumerate(items):
+        try:
+            org = organization_values(item.get("organization") or {})
+            append({field: extract(item, org) for field, extract in plan})
+        except Exception:
+            lead = _normalize_item_safely(item, plan, index)
+            if lead is not None:
+                append(lead)
+    return processed
+
+
+def normalize_page(items: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, str]]:
+    """Canonical leads of one page or chunk of raw items; picklable entry point for worker processes"""
+    return canonicalize_leads(normalize_items(items, compile_field_plan(fields)))
+
+
+def canonicalize_leads(leads: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Canonical form of normalized leads, computed once at ingestion and
+    stored in the task: text on one line with single spaces, None as "",
+    phones in international format and leads without any value dropped.
+    Exporters only render it (see render_csv_rows).
+    """
+    canonical = []
+    for lead in leads:
+        record = {}
+        for key, value in lead.items():
+            if value is None:
+                record[key] = ""
+            elif key.lower() == 'phone' and isinstance(value, str):
+                record[key] = canonical_phone(value)
+            elif isinstance(value, str):
+                # Remove line breaks, tabs and extra whitespace
+                record[key] = ' '.join(value.split())
+            else:
+                record[key] = str(value)
+
+        # Only keep leads with at least one non-empty field
+        if any(val.strip() for val in record.values()):
+            canonical.append(record)
+
+    return canonical
+
+
+def canonical_phone(phone: str) -> str:
+    """Phone in international format when it looks valid, otherwise as given"""
+    # Leads stored before canonicalization carry the CSV text prefix
+    phone = phone.strip().lstrip("'")
+    if not phone:
+        return ""
+    if not validate_phone_format(phone):
+        return phone
+    return format_international_phone(phone)
+
+
+def render_csv_rows(leads: List[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+    """
+    CSV rendering of canonical leads: phones get a ' prefix so Excel and
+    Google Sheets keep them as text instead of numbers in scientific notation.
+    """
+    for lead in leads:
+        phone = lead.get("phone")
+        if phone:
+            lead = {**lead, "phone": "'" + phone.lstrip("'")}
+        yield lead
+
+
+def validate_phone_format(phone: str) -> bool:
+    """Validate phone number format"""
+    if not phone or not isinstance(phone, str):
+        return False
+
+    # Should have between 7-15 digits for valid international numbers
+    # 7 digits minimum for local numbers, 15 maximum per ITU-T E.164
+    digits_only = sum(1 for char in phone if char.isdigit())
+    return 7 <= digits_only <= 15
+
+
+def format_international_phone(phone: str, default_country_code: str = "+1") -> str:
+    """Format phone to international standard"""
+    if not phone:
+        return ""
+
+    # Clean the phone number but preserve + sign
+    phone = phone.strip().replace(" ", "").replace("-", "").replace("(", "").replace(")", "").replace(".", "")
+
+    # Already in international format with +
+    if phone.startswith("+"):
+        return phone
+
+    # European format with 00 prefix (e.g. 00441625505300)
+    elif phone.startswith("00"):
+        return f"+{phone[2:]}"
+
+    # US/Canada format with leading 1 (e.g. 14155551234)
+    elif len(phone) == 11 and phone.startswith("1"):
+        return f"+{phone}"
+
+    # Standard US/Canada format without country code (e.g. 4155551234)
+    elif len(phone) == 10:
+        return f"{default_country_code}{phone}"
+
+    # For other formats, try to determine if it needs a country code
+    elif len(phone) >= 7:
+        # If it looks like it might need a country code (7-10 digits), add default
+        if len(phone) <= 10:
+            return f"{default_country_code}{phone}"
+        else:
+            # Assume it already includes country code, just add +
+            return f"+{phone}"
+
+    # Return as-is if we can't determine format
+    return phone
@@ -0,0 +1,106 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.clients.lead_normalizer import normalize_page, organization_cache_stats
+from app.core.config import settings
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class NormalizationPool:
+    """
+    Opt-in process pool for the CPU-bound normalization of raw items into
+    canonical leads.
+
+    With workers > 0, normalize() splits a page into chunks of
+    chunk_size rows. The chunks run in worker processes, so large result
+    sets use several cores and never stall the event loop, and they are
+    reassembled in input order. With workers = 0 it runs inline.
+
+    Workers are spawned on first use. If the pool breaks (a worker died),
+    the page is processed inline and a fresh pool is started for the next
+    one.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 250):
+        self.workers = max(0, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pooled_rows = 0
+        self.pooled_chunks = 0
+        self.inline_rows = 0
+        self.broken_pools = 0
+        self.pool_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started lead normalization pool with {self.workers} processes")
+        return self._executor
+
+    async def _map(self, func: Callable[..., List[Dict[str, Any]]], rows: List[Dict[str, Any]], *args) -> List[Dict[str, Any]]:
+        if not self.enabled or not rows:
+            self.inline_rows += len(rows)
+            return func(rows, *args)
+
+        chunks = [rows[start:start + self.chunk_size] for start in range(0, len(rows), self.chunk_size)]
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(loop.run_in_executor(executor, func, chunk, *args) for chunk in chunks))
+        except BrokenProcessPool as e:
+            logger.warning(f"Lead normalization pool broke ({str(e)}); processing {len(rows)} rows inline")
+            self.broken_pools += 1
+            self.close()
+            self.inline_rows += len(rows)
+            return func(rows, *args)
+
+        self.pool_seconds += time.perf_counter() - started
+        self.pooled_rows += len(rows)
+        self.pooled_chunks += len(chunks)
+        return [row for chunk in results for row in chunk]
+
+    async def normalize(self, items: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, str]]:
+        """Normalize raw Apollo items into canonical leads, in order"""
+        return await self._map(normalize_page, items, tuple(fields))
+
+    def close(self):
+        """Stop the worker processes; a later call starts a new pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "chunk_size": self.chunk_size,
+            "running": self._executor is not None,
+            "pooled_rows": self.pooled_rows,
+            "pooled_chunks": self.pooled_chunks,
+            "inline_rows": self.inline_rows,
+            "broken_pools": self.broken_pools,
+            "pool_seconds": round(self.pool_seconds, 3),
+            # Worker processes keep their own memo; this is the inline one
+            "organization_cache": organization_cache_stats(),
+        }
+
+
+# Global normalization pool instance (inline unless SCRAPE_NORMALIZE_WORKERS is set)
+normalization_pool = NormalizationPool(
+    workers=settings.scrape_normalize_workers,
+    chunk_size=settings.scrape_normalize_chunk_size
+)
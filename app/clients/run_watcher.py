@@ -0,0 +1,187 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Run statuses after which an actor run will not change anymore
+TERMINAL_RUN_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT", "TIMEOUT"}
+
+# Apify holds a waitForFinish request open for at most 60 seconds
+MAX_WAIT_FOR_FINISH = 60
+
+# Watcher currently responsible for each watched run, used to route webhook events
+_watchers_by_run: Dict[str, "RunWatcher"] = {}
+
+
+def dispatch_run_event(run_id: str, run: Dict[str, Any]) -> bool:
+    """Hand a run object received from outside (e.g. a webhook) to its watcher"""
+    watcher = _watchers_by_run.get(run_id)
+    if watcher is None:
+        return False
+    return watcher.resolve(run_id, run)
+
+
+class RunWatcher:
+    """
+    Watch many Apify runs from one shared coroutine.
+
+    Each watched run has at most one waitForFinish long-poll in flight, so a
+    running actor costs about one status request per minute instead of one
+    per second, however many runs are watched. If a long-poll comes back
+    early without the run having finished (a proxy cutting the request, or
+    a server without long-poll support), the next poll for that run is
+    delayed with jittered exponential backoff; request errors back off the
+    same way.
+
+    With safety_poll_interval set (webhook mode) completion is expected to
+    arrive through resolve(), and the watcher only checks each run once when
+    it is added and then every safety_poll_interval seconds, without
+    long-polling.
+    """
+
+    def __init__(self, fetch_run: Callable[[str, int], Awaitable[Dict[str, Any]]],
+                 max_wait: int = MAX_WAIT_FOR_FINISH, max_backoff: float = 30.0,
+                 safety_poll_interval: Optional[float] = None):
+        self._fetch_run = fetch_run
+        self.max_wait = max_wait
+        self.max_backoff = max_backoff
+        self.safety_poll_interval = safety_poll_interval
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._backoff: Dict[str, float] = {}
+        self._next_poll_at: Dict[str, float] = {}
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    def watch(self, run_id: str) -> asyncio.Future:
+        """Return a future resolved with the run once it reaches a terminal status"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(run_id, []).append(future)
+        _watchers_by_run[run_id] = self
+        self._changed.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch_loop())
+        return future
+
+    @property
+    def watching(self) -> bool:
+        """True while any run is being watched"""
+        return bool(self._waiters)
+
+    async def wait(self, run_id: str) -> Dict[str, Any]:
+        """Wait until the run has finished and return it"""
+        return await self.watch(run_id)
+
+    def latest(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent run object seen for run_id while it is watched, if any"""
+        return self._latest.get(run_id)
+
+    def resolve(self, run_id: str, run: Dict[str, Any]) -> bool:
+        """Feed a run object obtained elsewhere; finishes the watch if terminal"""
+        if run_id not in self._waiters:
+            # Not watched (anymore), e.g. a poll that returned after its callers left
+            return False
+        # Webhook payloads may carry a trimmed run, so keep fields seen earlier
+        run = {**self._latest.get(run_id, {}), **run}
+        if run.get("status") not in TERMINAL_RUN_STATUSES:
+            self._latest[run_id] = run
+            return False
+        for future in self._waiters.pop(run_id, []):
+            if not future.done():
+                future.set_result(run)
+        self._forget(run_id)
+        self._changed.set()
+        return True
+
+    def _forget(self, run_id: str):
+        self._latest.pop(run_id, None)
+        self._backoff.pop(run_id, None)
+        self._next_poll_at.pop(run_id, None)
+        if _watchers_by_run.get(run_id) is self:
+            del _watchers_by_run[run_id]
+
+    def _delay(self, run_id: str) -> float:
+        """Grow the run's backoff and return the jittered delay before its next poll"""
+        backoff = min(self.max_backoff, self._backoff.get(run_id, 0.5) * 2)
+        self._backoff[run_id] = backoff
+        return backoff * random.uniform(0.5, 1.0)
+
+    async def _poll(self, run_id: str) -> Dict[str, Any]:
+        self.polls += 1
+        started = time.monotonic()
+        try:
+            run = await self._fetch_run(run_id, 0 if self.safety_poll_interval else self.max_wait)
+        except Exception as e:
+            logger.warning(f"Run watcher poll failed for {run_id}: {str(e)}")
+            self._next_poll_at[run_id] = time.monotonic() + self._delay(run_id)
+            raise
+
+        if run.get("status") not in TERMINAL_RUN_STATUSES:
+            if self.safety_poll_interval:
+                self._next_poll_at[run_id] = time.monotonic() + self.safety_poll_interval
+            elif time.monotonic() - started < self.max_wait / 2:
+                # The long-poll returned early; don't turn it into a busy loop
+                self._next_poll_at[run_id] = time.monotonic() + self._delay(run_id)
+            else:
+                self._backoff.pop(run_id, None)
+        return run
+
+    async def _watch_loop(self):
+        """Keep one long-poll in flight per watched run until none are left"""
+        in_flight: Dict[asyncio.Task, str] = {}
+        try:
+            while self._waiters or in_flight:
+                # Drop watches whose callers went away
+                for run_id in [r for r, futures in self._waiters.items() if all(f.done() for f in futures)]:
+                    self._waiters.pop(run_id, None)
+                    self._forget(run_id)
+
+                now = time.monotonic()
+                polling = set(in_flight.values())
+                for run_id in self._waiters:
+                    if run_id not in polling and self._next_poll_at.get(run_id, 0) <= now:
+                        self._next_poll_at.pop(run_id, None)
+                        in_flight[asyncio.create_task(self._poll(run_id))] = run_id
+
+                if not self._waiters and not in_flight:
+                    break
+
+                # Sleep until a poll returns, a run is added, or a backoff expires
+                self._changed.clear()
+                changed = asyncio.create_task(self._changed.wait())
+                pending_backoffs = [at for run_id, at in self._next_poll_at.items() if run_id in self._waiters]
+                timeout = max(0.0, min(pending_backoffs) - time.monotonic()) if pending_backoffs else None
+                done, _ = await asyncio.wait(
+                    set(in_flight) | {changed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                changed.cancel()
+
+                for task in done:
+                    if task is changed:
+                        continue
+                    run_id = in_flight.pop(task)
+                    if task.exception() is None:
+                        self.resolve(run_id, task.result())
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def close(self):
+        """Stop watching; pending waiters are cancelled"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for run_id, futures in self._waiters.items():
+            for future in futures:
+                future.cancel()
+            self._forget(run_id)
+        self._waiters.clear()
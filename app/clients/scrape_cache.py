@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.clients.lead_normalizer import CANONICAL_LEAD_VERSION
+from app.clients.shard_planner import canonical_search_url
+from app.core.config import settings
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class ScrapeResultCache:
+    """
+    Cache of normalized scrape results keyed by the canonical Apollo query.
+
+    The key covers the canonical search URLs, the requested fields (order
+    independent), lead_count and the canonical lead format. Entries expire
+    after ttl seconds. The most recently used entries are kept in memory,
+    bounded by max_entries with LRU eviction, and every entry is also
+    written to cache_dir as JSON so results survive restarts. The on-disk
+    store is bounded by the same max_entries, dropping the oldest files
+    first.
+
+    An entry is partial when its scrape was stopped before the query was
+    exhausted, e.g. because the caller already had enough leads. It holds
+    the leads accepted until then, a prefix of the full result.
+    """
+
+    def __init__(self, ttl: int = 21600, max_entries: int = 200, cache_dir: Optional[str] = "data/cache"):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(urls: List[str], fields: List[str], lead_count: int) -> str:
+        query = {
+            "urls": [canonical_search_url(url) for url in urls],
+            "fields": sorted(set(fields)),
+            "lead_count": lead_count,
+            "lead_format": CANONICAL_LEAD_VERSION,
+        }
+        return hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["created_at"] > self.ttl
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(key).with_suffix(".tmp")
+        # Leads are personal data: owner-readable only, like checkpoints
+        tmp_path.unlink(missing_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(tmp_path, self._path(key))
+
+        # Keep the on-disk store bounded, oldest entries first
+        files = sorted(self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for stale in files[:max(0, len(files) - self.max_entries)]:
+            stale.unlink(missing_ok=True)
+
+    def _delete_disk(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key (leads, partial), or None on a miss or expired entry"""
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                self._entries.pop(key, None)
+                if self.cache_dir:
+                    await asyncio.to_thread(self._delete_disk, key)
+            self.misses += 1
+            return None
+
+        self._remember(key, entry)
+        self.hits += 1
+        return {"leads": entry["leads"], "partial": entry.get("partial", False)}
+
+    async def set(self, key: str, leads: List[Dict[str, Any]], partial: bool = False):
+        """Store the leads of a completed scrape, or of one stopped early with partial"""
+        entry = {"created_at": time.time(), "leads": leads, "partial": partial}
+        self._remember(key, entry)
+        if self.cache_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, entry)
+            except OSError as e:
+                logger.warning(f"Failed to persist cache entry {key}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries_in_memory": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "cache_dir": str(self.cache_dir) if self.cache_dir else None,
+        }
+
+
+# Global cache instance
+scrape_cache = ScrapeResultCache(
+    ttl=settings.scrape_cache_ttl,
+    max_entries=settings.scrape_cache_max_entries,
+    cache_dir=settings.scrape_cache_dir or None
+)
@@ -0,0 +1,188 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Apollo shows 25 people per search page and stops paginating after page 100
+APOLLO_PAGE_SIZE = 25
+APOLLO_MAX_PAGES = 100
+APOLLO_MAX_RESULTS_PER_SEARCH = APOLLO_PAGE_SIZE * APOLLO_MAX_PAGES
+
+EMPLOYEE_RANGE_PARAM = "organizationNumEmployeesRanges[]"
+
+# Apollo's company size buckets - disjoint and together covering every size
+EMPLOYEE_RANGES = [
+    "1,10", "11,20", "21,50", "51,100", "101,200", "201,500",
+    "501,1000", "1001,2000", "2001,5000", "5001,10000", "10001,"
+]
+
+
+def _split_search_url(url: str) -> Tuple[str, List[str]]:
+    """
+    Split an Apollo URL into its base and raw 'key=value' query parts.
+
+    Apollo keeps the search in the hash fragment (#/people?...). Parts are
+    kept verbatim so the original encoding survives the round trip.
+    """
+    if "?" not in url:
+        return url, []
+    base, query = url.split("?", 1)
+    return base, [part for part in query.split("&") if part]
+
+
+def _join_search_url(base: str, parts: List[str]) -> str:
+    return f"{base}?{'&'.join(parts)}" if parts else base
+
+
+def _param_name(part: str) -> str:
+    return part.split("=", 1)[0]
+
+
+def _with_page(url: str, page: int) -> str:
+    """Return url with its page parameter set to page"""
+    base, parts = _split_search_url(url)
+    parts = [part for part in parts if _param_name(part) != "page"]
+    parts.append(f"page={page}")
+    return _join_search_url(base, parts)
+
+
+def _start_page(url: str) -> int:
+    _, parts = _split_search_url(url)
+    for part in parts:
+        if _param_name(part) == "page":
+            try:
+                return max(1, int(part.split("=", 1)[1]))
+            except (IndexError, ValueError):
+                break
+    return 1
+
+
+def split_by_employee_ranges(url: str) -> List[str]:
+    """
+    Split one Apollo search into disjoint searches, one per company size range.
+
+    If the search already filters on several size ranges each shard keeps one
+    of them; otherwise every standard range becomes its own search. People at
+    companies without a known size are not covered by any range.
+    """
+    base, parts = _split_search_url(url)
+    existing = [part for part in parts if _param_name(part) == EMPLOYEE_RANGE_PARAM]
+    if len(existing) == 1:
+        # Already narrowed to a single range - nothing to split on
+        return [url]
+
+    others = [part for part in parts if _param_name(part) != EMPLOYEE_RANGE_PARAM]
+    ranges = existing or [f"{EMPLOYEE_RANGE_PARAM}={quote(size_range)}" for size_range in EMPLOYEE_RANGES]
+    return [_join_search_url(base, others + [size_range]) for size_range in ranges]
+
+
+def search_capacity(url: str) -> int:
+    """Most records Apollo paginates through for one search, from its start page on"""
+    return (APOLLO_MAX_PAGES - _start_page(url) + 1) * APOLLO_PAGE_SIZE
+
+
+def split_by_pages(url: str, lead_count: int, max_records_per_run: int) -> List[Dict[str, Any]]:
+    """Split one search into consecutive page ranges of at most max_records_per_run records"""
+    pages_per_shard = max(1, max_records_per_run // APOLLO_PAGE_SIZE)
+    first_page = _start_page(url)
+    last_page = APOLLO_MAX_PAGES
+    lead_count = min(lead_count, search_capacity(url))
+
+    shards = []
+    page = first_page
+    remaining = lead_count
+    while remaining > 0 and page <= last_page:
+        records = min(remaining, pages_per_shard * APOLLO_PAGE_SIZE, max_records_per_run)
+        shards.append({
+            "url": _with_page(url, page),
+            "records": records,
+            "label": f"pages {page}-{page + math.ceil(records / APOLLO_PAGE_SIZE) - 1}"
+        })
+        remaining -= records
+        page += pages_per_shard
+    return shards
+
+
+def plan_shards(url: str, lead_count: int, max_records_per_run: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Plan the actor runs needed to collect lead_count leads from one Apollo search.
+
+    Jobs that fit in a single run are returned unchanged. Larger jobs are
+    split into page ranges; jobs beyond what one Apollo search can paginate
+    through are first split into company size facets, and each facet is then
+    split into page ranges. Facets that cannot take an even share pass the
+    rest on to the others; if all of them together cannot reach lead_count
+    the plan covers what is reachable and says so in a warning. Every shard
+    is a dict with the run's url, the records to request and a label for
+    logging.
+    """
+    if lead_count <= max_records_per_run:
+        return [{"url": url, "records": lead_count, "label": "full search"}]
+
+    if lead_count <= APOLLO_MAX_RESULTS_PER_SEARCH:
+        searches = [url]
+    else:
+        searches = split_by_employee_ranges(url)
+
+    # Facet sizes are unknown up front, so the budget is spread evenly; a
+    # search capped below its share hands the shortfall to the ones after it
+    budgets = {}
+    remaining = lead_count
+    by_capacity = sorted(searches, key=search_capacity)
+    for index, search_url in enumerate(by_capacity):
+        budgets[search_url] = min(search_capacity(search_url), math.ceil(remaining / (len(by_capacity) - index)))
+        remaining -= budgets[search_url]
+
+    planned = lead_count - max(remaining, 0)
+    if planned < lead_count:
+        logger.warning(
+            f"Only {planned} of {lead_count} leads are reachable: {len(searches)} searches "
+            f"of at most {APOLLO_MAX_RESULTS_PER_SEARCH} results each"
+        )
+
+    shards = []
+    for search_url in searches:
+        for shard in split_by_pages(search_url, budgets[search_url], max_records_per_run):
+            if len(searches) > 1:
+                size_range = search_url.rsplit(f"{EMPLOYEE_RANGE_PARAM}=", 1)[-1].split("&", 1)[0]
+                shard["label"] = f"employees {unquote(size_range)}, {shard['label']}"
+            shards.append(shard)
+
+    logger.info(f"Planned {len(shards)} shards for {planned} leads ({len(searches)} searches)")
+    return shards
+
+
+def canonical_search_url(url: str) -> str:
+    """
+    Canonical form of an Apollo search URL for use as a cache key.
+
+    Scheme and host are lower-cased, trailing slashes dropped, query values
+    percent-decoded and parameters sorted, so the same search written with a
+    different parameter order or encoding maps to the same string.
+    """
+    base, parts = _split_search_url(url.strip())
+    if "://" in base:
+        scheme, rest = base.split("://", 1)
+        host, sep, path = rest.partition("/")
+        base = f"{scheme.lower()}://{host.lower()}{sep}{path}"
+    base = base.rstrip("/")
+    canonical_parts = sorted(unquote(part.replace("+", " ")) for part in parts)
+    return _join_search_url(base, canonical_parts)
+
+
+def lead_key(lead: Dict[str, Any]) -> Optional[str]:
+    """Identity of a normalized lead for de-duplication across runs"""
+    email = str(lead.get("email") or "").strip().lower()
+    if email:
+        return f"email:{email}"
+    linkedin = str(lead.get("linkedin") or "").strip().lower().rstrip("/")
+    if linkedin:
+        return f"linkedin:{linkedin}"
+    name = str(lead.get("name") or "").strip().lower()
+    if name:
+        return f"name:{name}|{str(lead.get('company') or '').strip().lower()}"
+    return None
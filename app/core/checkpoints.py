@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import TaskStoreError
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class CheckpointStore:
+    """
+    Durable per-task checkpoints for scrape jobs.
+
+    Each task has two files in the checkpoint directory:
+    - {task_id}.json: task parameters, progress and the state of every
+      Apify run (run id, dataset id, dataset offset, status), rewritten
+      atomically on every save
+    - {task_id}.leads.jsonl: leads ingested so far, appended page by page
+
+    Leads are appended before the run offsets that produced them are saved,
+    so after a crash the leads file may hold a page past the recorded
+    offset but never miss one; resumed tasks de-duplicate on load.
+    Files are created owner-readable only because they contain the
+    task's Apify token.
+    """
+
+    def __init__(self, directory: str = "data/checkpoints"):
+        self.directory = Path(directory)
+
+    def _meta_path(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.json"
+
+    def _leads_path(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.leads.jsonl"
+
+    def _write(self, task_id: str, checkpoint: Dict[str, Any], new_leads: List[Dict[str, Any]]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if new_leads:
+            fd = os.open(self._leads_path(task_id), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            with os.fdopen(fd, "a", encoding="utf-8") as leads_file:
+                leads_file.write("".join(json.dumps(lead) + "\n" for lead in new_leads))
+
+        tmp_path = self._meta_path(task_id).with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as meta_file:
+            json.dump(checkpoint, meta_file)
+        os.replace(tmp_path, self._meta_path(task_id))
+
+    def _read_leads(self, task_id: str) -> List[Dict[str, Any]]:
+        leads = []
+        try:
+            with open(self._leads_path(task_id), "r", encoding="utf-8") as leads_file:
+                for line in leads_file:
+                    try:
+                        leads.append(json.loads(line))
+                    except ValueError:
+                        # Torn final line from a crash mid-append
+                        break
+        except FileNotFoundError:
+            pass
+        return leads
+
+    def _load_all(self) -> List[Dict[str, Any]]:
+        checkpoints = []
+        if not self.directory.exists():
+            return checkpoints
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as meta_file:
+                    checkpoint = json.load(meta_file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable checkpoint {meta_path.name}: {str(e)}")
+                continue
+            checkpoint["leads"] = self._read_leads(checkpoint["task_id"])
+            checkpoints.append(checkpoint)
+        return checkpoints
+
+    def _load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(task_id), "r", encoding="utf-8") as meta_file:
+                checkpoint = json.load(meta_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable checkpoint for task {task_id}: {str(e)}")
+            return None
+        checkpoint["leads"] = self._read_leads(task_id)
+        return checkpoint
+
+    def _delete(self, task_id: str):
+        self._meta_path(task_id).unlink(missing_ok=True)
+        self._leads_path(task_id).unlink(missing_ok=True)
+
+    async def save(self, task_id: str, checkpoint: Dict[str, Any], new_leads: Optional[List[Dict[str, Any]]] = None):
+        """Append new_leads and replace the task's checkpoint"""
+        try:
+            await asyncio.to_thread(self._write, task_id, checkpoint, new_leads or [])
+        except OSError as e:
+            raise TaskStoreError(f"Failed to write checkpoint for task {task_id}: {str(e)}") from e
+
+    async def load_all(self) -> List[Dict[str, Any]]:
+        """Every stored checkpoint, each with its ingested leads under 'leads'"""
+        return await asyncio.to_thread(self._load_all)
+
+    async def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """The stored checkpoint of one task, or None if it has none"""
+        return await asyncio.to_thread(self._load, task_id)
+
+    async def delete(self, task_id: str):
+        """Remove a task's checkpoint once it no longer needs resuming"""
+        try:
+            await asyncio.to_thread(self._delete, task_id)
+        except OSError as e:
+            logger.warning(f"Failed to delete checkpoint for task {task_id}: {str(e)}")
+
+
+class TaskCheckpoint:
+    """
+    Running checkpoint of one scrape task.
+
+    Leads and run states are collected in memory and written by flush().
+    Flushes are serialized, and a failed write is logged instead of
+    failing the scrape. With checkpoints disabled every call is a no-op.
+    """
+
+    def __init__(self, store: CheckpointStore, task_id: str, params: Dict[str, Any],
+                 enabled: bool = True, runs: Optional[Dict[str, Any]] = None, urls_done: Optional[List[int]] = None):
+        self.store = store
+        self.task_id = task_id
+        self.enabled = enabled
+        self.state: Dict[str, Any] = {
+            "task_id": task_id,
+            **params,
+            "runs": runs or {},
+            "urls_done": urls_done or [],
+        }
+        self._unsaved_leads: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def runs(self) -> Dict[str, Dict[str, Any]]:
+        return self.state["runs"]
+
+    def add_leads(self, leads: List[Dict[str, Any]]):
+        if self.enabled:
+            self._unsaved_leads.extend(leads)
+
+    async def record_run(self, run_state: Dict[str, Any], url_index: int):
+        """Store the latest state of one Apify run and flush"""
+        self.runs[run_state["run_id"]] = {**run_state, "url_index": url_index}
+        await self.flush()
+
+    async def mark_url_done(self, url_index: int):
+        if url_index not in self.state["urls_done"]:
+            self.state["urls_done"].append(url_index)
+        await self.flush()
+
+    async def flush(self):
+        if not self.enabled:
+            return
+        async with self._lock:
+            new_leads, self._unsaved_leads = self._unsaved_leads, []
+            # Snapshot so the writer thread never sees the state mid-update
+            snapshot = {
+                **self.state,
+                "runs": {run_id: dict(run) for run_id, run in self.runs.items()},
+                "urls_done": list(self.state["urls_done"]),
+            }
+            try:
+                await self.store.save(self.task_id, snapshot, new_leads)
+            except TaskStoreError as e:
+                # Keep the leads for the next attempt; the scrape itself goes on
+                self._unsaved_leads = new_leads + self._unsaved_leads
+                logger.warning(str(e))
+
+    async def delete(self):
+        if self.enabled:
+            async with self._lock:
+                await self.store.delete(self.task_id)
+
+
+# Global checkpoint store instance
+checkpoint_store = CheckpointStore(settings.scrape_checkpoint_dir)
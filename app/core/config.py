@@ -8,6 +8,7 @@ import re
 class Settings(BaseSettings):
     # API Configuration
     apify_api_token: str = ""
+    apify_api_base_url: str = "https://api.apify.com/v2"
     notion_token: str = ""  # Users must provide their own token
     notion_database_id: str = ""  # Users must provide their own database ID
 
@@ -25,6 +26,55 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
 
+    # Scraping
+    scrape_max_concurrent_jobs: int = 4  # Scrape jobs running at once; the rest wait in the queue
+    scrape_max_jobs_per_token: int = 2  # Scrape jobs running at once per Apify token
+    scrape_url_concurrency: int = 3  # Apify actor runs started in parallel per task
+    scrape_allocation_margin: float = 0.1  # Extra fraction requested per URL on top of its share of the unique leads still missing
+    apify_dataset_page_size: int = 1000  # Dataset items fetched and normalized per request
+    scrape_normalize_workers: int = 0  # Processes normalizing and cleaning leads off the event loop; 0 keeps it inline
+    scrape_normalize_chunk_size: int = 250  # Rows per chunk handed to a normalization process
+    scrape_normalize_cache_size: int = 4096  # Distinct organizations whose formatted values are memoized per process; 0 disables
+    apify_dataset_poll_interval: int = 2  # Seconds between dataset reads while a run is RUNNING
+    apify_dataset_max_poll_interval: int = 15  # Dataset reads back off to this while no new items arrive
+    apify_max_records_per_run: int = 1000  # Record cap of the Apollo actor; larger jobs are sharded
+    apify_shard_concurrency: int = 4  # Shard runs started in parallel for one Apollo URL
+    apify_pool_idle_timeout: int = 300  # Seconds before the HTTP connections of an unused pooled Apify client are closed
+    apify_pool_max_connections: int = 20  # Keep-alive connections per pooled Apify client
+    apify_pool_entry_ttl: int = 3600  # Seconds before an unused token's pooled Apify client is dropped altogether
+    apify_retry_attempts: int = 3  # Attempts per Apify request, and per shard run after request retries
+    apify_retry_max_wait: float = 20  # Upper bound of the jittered backoff between attempts, in seconds
+    apify_breaker_failure_threshold: int = 5  # Consecutive failed Apify calls per token that open the circuit
+    apify_breaker_reset_timeout: float = 30  # Seconds an open circuit refuses calls before a trial call
+    apify_token_pool: str = ""  # Comma-separated Apify tokens; runs of requests with use_token_pool are spread over these accounts
+    apify_token_limits_ttl: float = 60  # Seconds an account's quota and concurrency reading is reused
+
+    # Scrape result cache
+    scrape_cache_enabled: bool = False  # Opt-in: identical queries are then served leads up to scrape_cache_ttl old
+    scrape_cache_ttl: int = 21600  # Seconds a cached result stays valid (6 hours)
+    scrape_cache_max_entries: int = 200  # Cached queries kept in memory and on disk
+    scrape_cache_dir: str = "data/cache"  # On-disk backing store; empty keeps the cache in memory only
+
+    # Run checkpoints (re-attach to live Apify runs after a restart)
+    scrape_checkpoints_enabled: bool = True
+    scrape_checkpoint_dir: str = "data/checkpoints"
+
+    # Task store ("memory" for a single worker, "sqlite" to share task state between uvicorn workers)
+    task_store_backend: str = "memory"
+    task_store_path: str = "data/tasks.db"
+    task_store_cancel_poll_interval: float = 2  # Seconds between checks for cancels sent to another worker
+    task_lease_seconds: int = 60  # A running task or claimed job whose owner stops renewing its lease is taken over after this long
+
+    # Scrape execution ("inline" runs jobs in the API process, "worker" hands them to python -m app.worker)
+    scrape_execution_mode: str = "inline"
+    scrape_job_queue_path: str = "data/jobs.db"
+    scrape_worker_poll_interval: float = 1  # Seconds an idle worker waits before polling the job queue again
+
+    # Apify webhooks (opt-in: leave the base URL empty to keep long-polling run status)
+    apify_webhook_base_url: str = ""  # Public base URL of this service, e.g. https://scraper.example.com
+    apify_webhook_secret: str = ""  # Sent back by Apify in X-Apify-Webhook-Secret and checked by the receiver
+    apify_webhook_safety_poll_interval: int = 120  # Seconds between fallback status checks in webhook mode
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
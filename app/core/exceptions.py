@@ -1,8 +1,17 @@
 # File: app/core/exceptions.py
 # Purpose: Custom exception classes for structured error handling
+from typing import Optional
 
 class ExternalAPIError(Exception):
     """Raised when external API calls fail (Apify, OpenAI, etc.)"""
+
+    def __init__(self, message: str = "", status_code: Optional[int] = None):
+        super().__init__(message)
+        # HTTP status of the failed call, None when no response was received
+        self.status_code = status_code
+
+class CircuitOpenError(ExternalAPIError):
+    """Raised when calls are refused because a circuit breaker is open"""
     pass
 
 class ExportError(Exception):
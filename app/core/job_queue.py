@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import TaskStoreError
+from app.core.scheduler import PRIORITY_RANKS
+from app.core.task_store import owner_alive
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class ScrapeJobQueue:
+    """
+    Durable queue of scrape jobs for separate worker processes.
+
+    Jobs are rows in a local SQLite database (WAL mode), so API processes
+    can enqueue and any number of worker processes on the host can claim.
+    A job stays in the queue while a worker runs it and is removed by
+    complete(). A claim is a lease the worker renews while it runs the job;
+    once a lease runs out the job is handed out again, so a crashed
+    worker's jobs are picked up (and resumed from their checkpoints) by the
+    next worker that polls. The database is
+    opened lazily and created owner-readable only because job payloads
+    contain Apify tokens.
+    """
+
+    def __init__(self, path: str = "data/jobs.db"):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            if not os.path.exists(self.path):
+                os.close(os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o600))
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, task_id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL, "
+                "priority INTEGER NOT NULL, enqueued_at REAL NOT NULL, worker_id TEXT, claimed_at REAL, "
+                "lease_expires REAL)"
+            )
+            # Queues created while claims were worker pids: their claims lapse
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("worker_id", "TEXT"), ("lease_expires", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, operation, *args):
+        def locked():
+            with self._lock:
+                return operation(self._connect(), *args)
+        try:
+            return await asyncio.to_thread(locked)
+        except sqlite3.Error as e:
+            raise TaskStoreError(f"Job queue operation failed: {str(e)}") from e
+
+    @staticmethod
+    def _enqueue(conn: sqlite3.Connection, task_id: str, payload: Dict[str, Any], priority: str):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (task_id, payload, priority, enqueued_at) VALUES (?, ?, ?, ?)",
+                (task_id, json.dumps(payload), PRIORITY_RANKS.get(priority, 1), time.time())
+            )
+
+    @staticmethod
+    def _claim(conn: sqlite3.Connection, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT seq, task_id, payload, worker_id, lease_expires FROM jobs ORDER BY priority, seq"
+            ).fetchall()
+            for seq, task_id, payload, owner, lease_expires in rows:
+                if owner_alive(owner, lease_expires):
+                    continue
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET worker_id = ?, claimed_at = ?, lease_expires = ? WHERE seq = ?",
+                    (worker_id, now, now + lease_seconds, seq)
+                )
+                return {"task_id": task_id, "reclaimed": owner is not None, **json.loads(payload)}
+        return None
+
+    @staticmethod
+    def _renew(conn: sqlite3.Connection, worker_id: str, lease_seconds: float) -> int:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE worker_id = ?", (time.time() + lease_seconds, worker_id)
+            ).rowcount
+
+    @staticmethod
+    def _release(conn: sqlite3.Connection, worker_id: str) -> int:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return conn.execute("UPDATE jobs SET lease_expires = 0 WHERE worker_id = ?", (worker_id,)).rowcount
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, task_id: str, queued_only: bool) -> bool:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            query = "DELETE FROM jobs WHERE task_id = ?" + (" AND worker_id IS NULL" if queued_only else "")
+            return conn.execute(query, (task_id,)).rowcount > 0
+
+    @staticmethod
+    def _position(conn: sqlite3.Connection, task_id: str) -> Optional[int]:
+        row = conn.execute(
+            "SELECT seq, priority FROM jobs WHERE task_id = ? AND worker_id IS NULL", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE worker_id IS NULL AND (priority < ? OR (priority = ? AND seq < ?))",
+            (row[1], row[1], row[0])
+        ).fetchone()[0]
+        return ahead + 1
+
+    @staticmethod
+    def _wait_time(conn: sqlite3.Connection, task_id: str) -> Optional[float]:
+        row = conn.execute("SELECT enqueued_at, claimed_at FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        return round((row[1] or time.time()) - row[0], 1)
+
+    @staticmethod
+    def _stats(conn: sqlite3.Connection) -> Dict[str, Any]:
+        queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE worker_id IS NULL").fetchone()[0]
+        claims: List[tuple] = conn.execute(
+            "SELECT worker_id, lease_expires FROM jobs WHERE worker_id IS NOT NULL"
+        ).fetchall()
+        return {
+            "queued": queued,
+            "claimed": len(claims),
+            "workers": len({owner for owner, _ in claims}),
+            "orphaned": sum(1 for owner, lease_expires in claims if not owner_alive(owner, lease_expires)),
+        }
+
+    async def enqueue(self, task_id: str, payload: Dict[str, Any], priority: str = "normal"):
+        """Add a job; payload holds the scrape parameters"""
+        await self._run(self._enqueue, task_id, payload, priority)
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Take the next job in priority order, or None if nothing is waiting"""
+        return await self._run(self._claim, worker_id, settings.task_lease_seconds)
+
+    async def renew(self, worker_id: str) -> int:
+        """Extend the leases of every job worker_id holds; returns how many it holds"""
+        return await self._run(self._renew, worker_id, settings.task_lease_seconds)
+
+    async def release(self, worker_id: str) -> int:
+        """End the leases of worker_id's jobs so the next worker to poll takes them over"""
+        return await self._run(self._release, worker_id)
+
+    async def complete(self, task_id: str):
+        """Remove a job that has finished, failed or been cancelled"""
+        await self._run(self._delete, task_id, False)
+
+    async def cancel(self, task_id: str) -> bool:
+        """Remove a job no worker has claimed yet; False if it is not waiting"""
+        return await self._run(self._delete, task_id, True)
+
+    async def position(self, task_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, None once a worker has claimed it"""
+        return await self._run(self._position, task_id)
+
+    async def wait_time(self, task_id: str) -> Optional[float]:
+        return await self._run(self._wait_time, task_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self._run(self._stats)
+
+    async def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global job queue instance
+scrape_job_queue = ScrapeJobQueue(settings.scrape_job_queue_path)
@@ -0,0 +1,153 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Company-level fields whose values repeat across many leads of a task
+SHARED_VALUE_FIELDS = frozenset({"company", "industry", "location", "title", "website"})
+
+# Leads per sealed segment
+SEGMENT_ROWS = 1024
+
+# Cell of a field the lead does not have
+_MISSING = object()
+
+
+class LeadTable:
+    """
+    Compact storage for the leads of one task.
+
+    Leads are kept column by column instead of as one dict per lead
+    repeating every key. New leads collect in an open segment of plain
+    lists; every SEGMENT_ROWS leads the segment is sealed and each of its
+    columns encoded:
+    - company-level fields (SHARED_VALUE_FIELDS) as an array of codes into
+      a pool of distinct values, so a company name shared by a thousand
+      leads is stored once
+    - other text fields as one string holding the segment's values back to
+      back plus an array of offsets, instead of a string object per value
+    - columns with missing or non-string values stay plain lists
+
+    Leads go in and come out as plain dicts, keys in the order the fields
+    first appeared (the requested field order for canonical leads); rows
+    are rebuilt on every read.
+    """
+
+    __slots__ = ("_fields", "_segments", "_open", "_shared_codes", "_shared_values", "_length")
+
+    def __init__(self, leads: Iterable[Dict[str, Any]] = ()):
+        self._fields: List[str] = []
+        self._segments: List[Dict[str, Tuple]] = []
+        self._open: Dict[str, List[Any]] = {}
+        self._shared_codes: Dict[str, int] = {}
+        self._shared_values: List[str] = []
+        self._length = 0
+        self.extend(leads)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    @property
+    def _open_rows(self) -> int:
+        return self._length - len(self._segments) * SEGMENT_ROWS
+
+    def append(self, lead: Dict[str, Any]):
+        self.extend((lead,))
+
+    def extend(self, leads: Iterable[Dict[str, Any]]):
+        for lead in leads:
+            open_rows = self._open_rows
+            for field, value in lead.items():
+                column = self._open.get(field)
+                if column is None:
+                    if field not in self._fields:
+                        self._fields.append(field)
+                    # Leads stored before the field first appeared do not have it
+                    column = self._open[field] = [_MISSING] * open_rows
+                column.append(value)
+            open_rows += 1
+            # Pad the fields this lead does not have
+            for column in self._open.values():
+                if len(column) < open_rows:
+                    column.append(_MISSING)
+            self._length += 1
+            if open_rows == SEGMENT_ROWS:
+                self._seal()
+
+    def _encode(self, field: str, values: List[Any]) -> Tuple:
+        if not all(type(value) is str for value in values):
+            return ("list", values)
+        if field in SHARED_VALUE_FIELDS:
+            codes = array("I")
+            for value in values:
+                code = self._shared_codes.get(value)
+                if code is None:
+                    code = self._shared_codes[value] = len(self._shared_values)
+                    self._shared_values.append(value)
+                codes.append(code)
+            return ("shared", codes)
+        offsets = array("I", [0])
+        end = 0
+        for value in values:
+            end += len(value)
+            offsets.append(end)
+        return ("text", "".join(values), offsets)
+
+    def _seal(self):
+        self._segments.append({field: self._encode(field, values) for field, values in self._open.items()})
+        self._open = {}
+
+    def _decode(self, column: Tuple) -> List[Any]:
+        kind = column[0]
+        if kind == "shared":
+            shared_values = self._shared_values
+            return [shared_values[code] for code in column[1]]
+        if kind == "text":
+            text, offsets = column[1], column[2]
+            return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return column[1]
+
+    def _cell(self, column: Tuple, index: int) -> Any:
+        kind = column[0]
+        if kind == "shared":
+            return self._shared_values[column[1][index]]
+        if kind == "text":
+            return column[1][column[2][index]:column[2][index + 1]]
+        return column[1][index]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """The lead at index as a new dict"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("lead index out of range")
+        segment_index, offset = divmod(index, SEGMENT_ROWS)
+        if segment_index < len(self._segments):
+            segment = self._segments[segment_index]
+            cells = ((field, self._cell(segment[field], offset)) for field in self._fields if field in segment)
+        else:
+            cells = ((field, self._open[field][offset]) for field in self._fields if field in self._open)
+        return {field: value for field, value in cells if value is not _MISSING}
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self.row(index)
+
+    def _iter_block(self, columns: Dict[str, List[Any]], rows: int) -> Iterator[Dict[str, Any]]:
+        fields = [field for field in self._fields if field in columns]
+        if not fields:
+            yield from ({} for _ in range(rows))
+            return
+        for values in zip(*(columns[field] for field in fields)):
+            yield {field: value for field, value in zip(fields, values) if value is not _MISSING}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for segment in self._segments:
+            columns = {field: self._decode(column) for field, column in segment.items()}
+            yield from self._iter_block(columns, SEGMENT_ROWS)
+        yield from self._iter_block(self._open, self._open_rows)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Every lead as a list of new dicts, in insertion order"""
+        return list(self)
+
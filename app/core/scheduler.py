@@ -0,0 +1,134 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+# Dispatch rank of each priority, lower runs first
+PRIORITY_RANKS = {"high": 0, "normal": 1, "low": 2}
+
+
+class ScrapeScheduler:
+    """
+    Admission control for scrape jobs.
+
+    Submitted jobs wait in a queue until both a global slot and a slot for
+    their Apify token are free. Among the jobs allowed to start, the highest
+    priority wins; within a priority the token that has been served least
+    goes first, so one user submitting a burst cannot starve the others;
+    remaining ties go to the oldest job. Queue sizes are small, so the next
+    job is picked with a linear scan rather than an indexed heap.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = 4, max_jobs_per_token: int = 2):
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.max_jobs_per_token = max(1, max_jobs_per_token)
+        self._queue: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._running_per_token: Dict[str, int] = {}
+        self._served_per_token: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _order_key(self, job: Dict[str, Any]):
+        return (PRIORITY_RANKS.get(job["priority"], 1), self._served_per_token.get(job["token"], 0), job["seq"])
+
+    def submit(self, task_id: str, token: str, run: Callable[[], Awaitable[Any]], priority: str = "normal"):
+        """Queue a job; run() is awaited once the job is admitted"""
+        self._queue[task_id] = {
+            "task_id": task_id,
+            "token": token,
+            "run": run,
+            "priority": priority if priority in PRIORITY_RANKS else "normal",
+            "seq": next(self._sequence),
+            "enqueued_at": time.time(),
+            "started_at": None,
+        }
+        logger.info(f"Queued scrape job {task_id} (priority {priority}, {len(self._queue)} queued, {len(self._running)} running)")
+        self._dispatch()
+
+    def cancel(self, task_id: str) -> bool:
+        """Remove a job that has not started yet; False if it is not queued"""
+        return self._queue.pop(task_id, None) is not None
+
+    def _dispatch(self):
+        while self._queue and len(self._running) < self.max_concurrent_jobs:
+            admissible = [
+                job for job in self._queue.values()
+                if self._running_per_token.get(job["token"], 0) < self.max_jobs_per_token
+            ]
+            if not admissible:
+                return
+            job = min(admissible, key=self._order_key)
+            del self._queue[job["task_id"]]
+
+            job["started_at"] = time.time()
+            self._running[job["task_id"]] = job
+            self._running_per_token[job["token"]] = self._running_per_token.get(job["token"], 0) + 1
+            self._served_per_token[job["token"]] = self._served_per_token.get(job["token"], 0) + 1
+            self._tasks[job["task_id"]] = asyncio.create_task(self._run(job))
+            logger.info(f"Started scrape job {job['task_id']} after {job['started_at'] - job['enqueued_at']:.1f}s in queue")
+
+    async def _run(self, job: Dict[str, Any]):
+        try:
+            await job["run"]()
+        except Exception as e:
+            logger.error(f"Scrape job {job['task_id']} raised: {str(e)}", exc_info=True)
+        finally:
+            self._running.pop(job["task_id"], None)
+            self._tasks.pop(job["task_id"], None)
+            self._running_per_token[job["token"]] -= 1
+            if not self._running_per_token[job["token"]]:
+                del self._running_per_token[job["token"]]
+            self._dispatch()
+
+    def idle_slots(self) -> int:
+        """Jobs that could be accepted without any of them waiting"""
+        return max(0, self.max_concurrent_jobs - len(self._running) - len(self._queue))
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """1-based position in dispatch order, None once the job has started"""
+        if task_id not in self._queue:
+            return None
+        ordered = sorted(self._queue.values(), key=self._order_key)
+        return next(index for index, job in enumerate(ordered, start=1) if job["task_id"] == task_id)
+
+    def wait_time(self, task_id: str) -> Optional[float]:
+        """Seconds the job spent (or has spent so far) in the queue"""
+        job = self._queue.get(task_id) or self._running.get(task_id)
+        if job is None:
+            return None
+        return round((job["started_at"] or time.time()) - job["enqueued_at"], 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "max_jobs_per_token": self.max_jobs_per_token,
+            "queued": len(self._queue),
+            "running": len(self._running),
+            "running_per_token": len(self._running_per_token),
+            "queue": [
+                {"task_id": job["task_id"], "priority": job["priority"], "waiting": round(time.time() - job["enqueued_at"], 1)}
+                for job in sorted(self._queue.values(), key=self._order_key)
+            ],
+        }
+
+    async def close(self):
+        """Cancel running jobs and drop the queue"""
+        self._queue.clear()
+        tasks: List[asyncio.Task] = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global scheduler instance
+scrape_scheduler = ScrapeScheduler(
+    max_concurrent_jobs=settings.scrape_max_concurrent_jobs,
+    max_jobs_per_token=settings.scrape_max_jobs_per_token
+)
@@ -0,0 +1,356 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import TaskStoreError
+from app.core.lead_table import LeadTable
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+# Identifies this process as the owner of tasks and jobs. Unlike a pid it
+# is never reused, e.g. by a restarted container's server getting pid 1 again
+INSTANCE_ID = uuid.uuid4().hex
+
+
+def lease_fields() -> Dict[str, Any]:
+    """Owner fields claiming a task for this process for settings.task_lease_seconds"""
+    return {"worker_id": INSTANCE_ID, "lease_expires": time.time() + settings.task_lease_seconds}
+
+
+def owner_alive(owner: Optional[str], lease_expires: Optional[float]) -> bool:
+    """Whether the owner of a task or job still holds it: this process, or one renewing its lease"""
+    if not owner:
+        return False
+    if owner == INSTANCE_ID:
+        return True
+    return (lease_expires or 0) > time.time()
+
+
+class TaskStore(ABC):
+    """
+    Storage for scrape task state shared by every API process.
+
+    A task is a dict of status fields plus its "data" list of leads. Leads
+    are appended page by page with append_data() so a growing result set is
+    never rewritten as a whole. Backends raise TaskStoreError on failure.
+
+    Tasks record the instance that owns their job in "worker_id", with a
+    lease in "lease_expires" that the owner renews while it runs the job.
+    """
+
+    # Whether other processes see the same tasks
+    shared = False
+
+    @abstractmethod
+    async def create(self, task_id: str, task: Dict[str, Any]) -> None:
+        """Store a new task, replacing any task with the same id"""
+
+    @abstractmethod
+    async def get(self, task_id: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a copy of the task, or None if it does not exist"""
+
+    @abstractmethod
+    async def claim(self, task_id: str, task: Dict[str, Any]) -> bool:
+        """
+        Create the task unless it exists and its owner still holds its lease.
+        Returns whether this process now owns the task.
+        """
+
+    @abstractmethod
+    async def update(self, task_id: str, fields: Dict[str, Any]) -> None:
+        """Merge fields into the task; a "data" key replaces the stored leads"""
+
+    @abstractmethod
+    async def increment(self, task_id: str, field: str, amount: int = 1) -> int:
+        """Atomically add amount to a numeric field and return the new value"""
+
+    @abstractmethod
+    async def append_data(self, task_id: str, leads: List[Dict[str, Any]],
+                          fields: Optional[Dict[str, Any]] = None) -> None:
+        """Append leads to the task and merge fields in the same write"""
+
+    @abstractmethod
+    async def delete(self, task_id: str) -> None:
+        """Remove the task and its leads"""
+
+    @abstractmethod
+    async def list_tasks(self) -> Dict[str, Dict[str, Any]]:
+        """Every task's fields without its leads, with data_length added"""
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryTaskStore(TaskStore):
+    """
+    Process-local store; only correct with a single API worker. Leads are
+    kept in a compact LeadTable per task and returned as lists of dicts.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+
+    def _require(self, task_id: str) -> Dict[str, Any]:
+        task = self._tasks.get(task_id)
+        if task is None:
+            raise TaskStoreError(f"Task {task_id} not found")
+        return task
+
+    async def create(self, task_id: str, task: Dict[str, Any]) -> None:
+        task = dict(task)
+        if task.get("data") is not None:
+            task["data"] = LeadTable(task["data"])
+        self._tasks[task_id] = task
+
+    async def claim(self, task_id: str, task: Dict[str, Any]) -> bool:
+        current = self._tasks.get(task_id)
+        if current is not None and owner_alive(current.get("worker_id"), current.get("lease_expires")):
+            return False
+        await self.create(task_id, task)
+        return True
+
+    async def get(self, task_id: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        copy = dict(task)
+        data = task.get("data")
+        if include_data:
+            copy["data"] = data.rows() if data is not None else None
+        else:
+            copy.pop("data", None)
+            copy["data_length"] = len(data or [])
+        return copy
+
+    async def update(self, task_id: str, fields: Dict[str, Any]) -> None:
+        task = self._require(task_id)
+        task.update(fields)
+        if fields.get("data") is not None:
+            task["data"] = LeadTable(fields["data"])
+
+    async def increment(self, task_id: str, field: str, amount: int = 1) -> int:
+        task = self._require(task_id)
+        task[field] = (task.get(field) or 0) + amount
+        return task[field]
+
+    async def append_data(self, task_id: str, leads: List[Dict[str, Any]],
+                          fields: Optional[Dict[str, Any]] = None) -> None:
+        task = self._require(task_id)
+        if task.get("data") is None:
+            task["data"] = LeadTable()
+        task["data"].extend(leads)
+        task.update(fields or {})
+
+    async def delete(self, task_id: str) -> None:
+        self._tasks.pop(task_id, None)
+
+    async def list_tasks(self) -> Dict[str, Dict[str, Any]]:
+        return {task_id: await self.get(task_id, include_data=False) for task_id in list(self._tasks)}
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Task store in a local SQLite database in WAL mode, shared by every
+    uvicorn worker on the host. Task fields are kept as one JSON document per
+    task and leads as one row each, so appending a page is a plain insert.
+    Read-modify-write updates run in IMMEDIATE transactions, which
+    serializes writers across processes.
+    """
+
+    shared = True
+
+    def __init__(self, path: str = "data/tasks.db"):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id TEXT PRIMARY KEY, fields TEXT NOT NULL, has_data INTEGER NOT NULL DEFAULT 0, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_leads ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, task_id TEXT NOT NULL, lead TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS task_leads_task ON task_leads (task_id, seq)")
+        except sqlite3.Error as e:
+            raise TaskStoreError(f"Failed to open task store {path}: {str(e)}") from e
+        logger.info(f"SQLite task store opened at {path}")
+
+    async def _run(self, operation, *args):
+        def locked():
+            with self._lock:
+                return operation(*args)
+        try:
+            return await asyncio.to_thread(locked)
+        except sqlite3.Error as e:
+            raise TaskStoreError(f"Task store operation failed: {str(e)}") from e
+
+    def _read_fields(self, task_id: str):
+        row = self._conn.execute("SELECT fields, has_data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        if row is None:
+            raise TaskStoreError(f"Task {task_id} not found")
+        return json.loads(row[0]), bool(row[1])
+
+    def _replace_leads(self, task_id: str, leads: List[Dict[str, Any]]):
+        self._conn.execute("DELETE FROM task_leads WHERE task_id = ?", (task_id,))
+        self._conn.executemany(
+            "INSERT INTO task_leads (task_id, lead) VALUES (?, ?)",
+            [(task_id, json.dumps(lead)) for lead in leads]
+        )
+
+    def _create_rows(self, task_id: str, task: Dict[str, Any]):
+        fields = dict(task)
+        data = fields.pop("data", None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, fields, has_data, updated_at) VALUES (?, ?, ?, ?)",
+            (task_id, json.dumps(fields), int(data is not None), time.time())
+        )
+        self._replace_leads(task_id, data or [])
+
+    def _create(self, task_id: str, task: Dict[str, Any]):
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._create_rows(task_id, task)
+
+    def _claim(self, task_id: str, task: Dict[str, Any]) -> bool:
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT fields FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is not None:
+                current = json.loads(row[0])
+                if owner_alive(current.get("worker_id"), current.get("lease_expires")):
+                    return False
+            self._create_rows(task_id, task)
+            return True
+
+    def _get(self, task_id: str, include_data: bool) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT fields, has_data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        task = json.loads(row[0])
+        if include_data:
+            task["data"] = [
+                json.loads(lead) for (lead,) in self._conn.execute(
+                    "SELECT lead FROM task_leads WHERE task_id = ? ORDER BY seq", (task_id,)
+                )
+            ] if row[1] else None
+        else:
+            task["data_length"] = self._conn.execute(
+                "SELECT COUNT(*) FROM task_leads WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+        return task
+
+    def _update(self, task_id: str, fields: Dict[str, Any]):
+        fields = dict(fields)
+        has_data_update = "data" in fields
+        data = fields.pop("data", None)
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            current, has_data = self._read_fields(task_id)
+            current.update(fields)
+            if has_data_update:
+                has_data = data is not None
+                self._replace_leads(task_id, data or [])
+            self._conn.execute(
+                "UPDATE tasks SET fields = ?, has_data = ?, updated_at = ? WHERE task_id = ?",
+                (json.dumps(current), int(has_data), time.time(), task_id)
+            )
+
+    def _increment(self, task_id: str, field: str, amount: int) -> int:
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            current, _ = self._read_fields(task_id)
+            current[field] = (current.get(field) or 0) + amount
+            self._conn.execute(
+                "UPDATE tasks SET fields = ?, updated_at = ? WHERE task_id = ?",
+                (json.dumps(current), time.time(), task_id)
+            )
+            return current[field]
+
+    def _append_data(self, task_id: str, leads: List[Dict[str, Any]], fields: Dict[str, Any]):
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            current, _ = self._read_fields(task_id)
+            current.update(fields)
+            self._conn.executemany(
+                "INSERT INTO task_leads (task_id, lead) VALUES (?, ?)",
+                [(task_id, json.dumps(lead)) for lead in leads]
+            )
+            self._conn.execute(
+                "UPDATE tasks SET fields = ?, has_data = 1, updated_at = ? WHERE task_id = ?",
+                (json.dumps(current), time.time(), task_id)
+            )
+
+    def _delete(self, task_id: str):
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM task_leads WHERE task_id = ?", (task_id,))
+            self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def _list_tasks(self) -> Dict[str, Dict[str, Any]]:
+        counts = dict(self._conn.execute("SELECT task_id, COUNT(*) FROM task_leads GROUP BY task_id"))
+        tasks = {}
+        for task_id, fields in self._conn.execute("SELECT task_id, fields FROM tasks ORDER BY updated_at"):
+            task = json.loads(fields)
+            task["data_length"] = counts.get(task_id, 0)
+            tasks[task_id] = task
+        return tasks
+
+    async def create(self, task_id: str, task: Dict[str, Any]) -> None:
+        await self._run(self._create, task_id, task)
+
+    async def get(self, task_id: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, task_id, include_data)
+
+    async def update(self, task_id: str, fields: Dict[str, Any]) -> None:
+        await self._run(self._update, task_id, fields)
+
+    async def increment(self, task_id: str, field: str, amount: int = 1) -> int:
+        return await self._run(self._increment, task_id, field, amount)
+
+    async def claim(self, task_id: str, task: Dict[str, Any]) -> bool:
+        return await self._run(self._claim, task_id, task)
+
+    async def append_data(self, task_id: str, leads: List[Dict[str, Any]],
+                          fields: Optional[Dict[str, Any]] = None) -> None:
+        await self._run(self._append_data, task_id, leads, fields or {})
+
+    async def delete(self, task_id: str) -> None:
+        await self._run(self._delete, task_id)
+
+    async def list_tasks(self) -> Dict[str, Dict[str, Any]]:
+        return await self._run(self._list_tasks)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_task_store() -> TaskStore:
+    """Build the task store selected by settings.task_store_backend"""
+    backend = settings.task_store_backend.lower()
+    if backend == "sqlite":
+        return SQLiteTaskStore(settings.task_store_path)
+    if backend != "memory":
+        raise TaskStoreError(f"Unknown task store backend: {settings.task_store_backend}")
+    return InMemoryTaskStore()
+
+
+# Global task store instance
+task_store = create_task_store()
@@ -19,7 +19,13 @@ from app.core.config import settings
 from app.utils.logging_config import setup_logging
 from app.core.security import RateLimitMiddleware, SecurityHeadersMiddleware
 from app.core.exceptions import ExternalAPIError, ExportError, AIAgentError, TaskStoreError
-from app.api.routes import router as api_router
+from app.api.routes import router as api_router, resume_checkpointed_scrapes
+from app.clients.apify_pool import apify_pool
+from app.clients.apify_transport import check_webhook_settings
+from app.clients.normalization_pool import normalization_pool
+from app.core.scheduler import scrape_scheduler
+from app.core.job_queue import scrape_job_queue
+from app.core.task_store import task_store
 
 # Setup logging
 logger = setup_logging()
@@ -230,10 +236,24 @@ async def health_check():
 @app.on_event("startup")
 async def startup_event():
     logger.info("Application startup")
+    check_webhook_settings()
+    apify_pool.start()
+    if settings.scrape_execution_mode == "worker":
+        # Jobs (and their resumption after a crash) belong to python -m app.worker
+        if not task_store.shared:
+            raise TaskStoreError("Worker execution mode needs a shared task store, set TASK_STORE_BACKEND=sqlite")
+        logger.info("Scrape jobs are queued for worker processes")
+    else:
+        await resume_checkpointed_scrapes()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutdown")
+    await scrape_scheduler.close()
+    await apify_pool.close()
+    normalization_pool.close()
+    await scrape_job_queue.close()
+    await task_store.close()
 
 if __name__ == "__main__":
     logger.info("Starting application server")
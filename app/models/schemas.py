@@ -17,6 +17,11 @@ class FieldType(str, Enum):
     FACEBOOK = "facebook"
     WEBSITE = "website"
 
+class JobPriority(str, Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
 class ScrapeRequest(BaseModel):
     urls: List[str] = Field(..., min_length=1, max_length=10)
     lead_count: int = Field(default=100, ge=1, le=50000)
@@ -35,6 +40,9 @@ class ScrapeRequest(BaseModel):
         FieldType.WEBSITE
     ])
     apify_token: str = Field(..., min_length=1)
+    priority: JobPriority = JobPriority.NORMAL
+    # Run on the accounts of APIFY_TOKEN_POOL instead of the apify_token account
+    use_token_pool: bool = False
     
     @validator('urls')
     def validate_urls(cls, v):
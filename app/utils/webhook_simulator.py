@@ -0,0 +1,79 @@
+"""
+Local stand-in for Apify's run-finished webhooks.
+
+Sends the same payload Apify's default webhook template produces to the
+receiver at /api/v1/webhooks/apify, so webhook mode can be exercised
+without a public URL or a real actor run:
+
+    python -m app.utils.webhook_simulator <run_id> --status SUCCEEDED --url http://localhost:5000
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.clients.apify_transport import WEBHOOK_RECEIVER_PATH, WEBHOOK_SECRET_HEADER
+from app.core.config import settings
+
+# Run status reported by each simulated event type
+STATUS_EVENT_TYPES = {
+    "SUCCEEDED": "ACTOR.RUN.SUCCEEDED",
+    "FAILED": "ACTOR.RUN.FAILED",
+    "ABORTED": "ACTOR.RUN.ABORTED",
+    "TIMED-OUT": "ACTOR.RUN.TIMED_OUT",
+}
+
+
+def build_run_event(run: Dict[str, Any], event_type: Optional[str] = None) -> Dict[str, Any]:
+    """Build a payload shaped like Apify's default webhook payload template"""
+    event_type = event_type or STATUS_EVENT_TYPES.get(run.get("status"), "ACTOR.RUN.SUCCEEDED")
+    return {
+        "userId": run.get("userId", "local-simulator"),
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "eventType": event_type,
+        "eventData": {"actorId": run.get("actId"), "actorRunId": run["id"]},
+        "resource": run,
+    }
+
+
+async def send_run_event(receiver_base_url: str, run: Dict[str, Any], event_type: Optional[str] = None,
+                         secret: Optional[str] = None) -> Dict[str, Any]:
+    """POST a simulated run event to the receiver and return its JSON response"""
+    secret = settings.apify_webhook_secret if secret is None else secret
+    headers = {WEBHOOK_SECRET_HEADER: secret} if secret else {}
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.post(
+            f"{receiver_base_url.rstrip('/')}{WEBHOOK_RECEIVER_PATH}",
+            json=build_run_event(run, event_type),
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a simulated Apify run-finished webhook")
+    parser.add_argument("run_id", help="Apify run id the scraper is waiting on")
+    parser.add_argument("--status", default="SUCCEEDED", choices=sorted(STATUS_EVENT_TYPES))
+    parser.add_argument("--dataset-id", help="defaultDatasetId to include in the run resource")
+    parser.add_argument("--url", default="http://localhost:5000", help="Base URL of the scraper API")
+    parser.add_argument("--secret", help="Webhook secret (defaults to APIFY_WEBHOOK_SECRET)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before sending")
+    args = parser.parse_args()
+
+    run: Dict[str, Any] = {"id": args.run_id, "status": args.status}
+    if args.dataset_id:
+        run["defaultDatasetId"] = args.dataset_id
+
+    async def send():
+        if args.delay:
+            await asyncio.sleep(args.delay)
+        return await send_run_event(args.url, run, secret=args.secret)
+
+    print(asyncio.run(send()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Scrape worker process.
+
+Claims scrape jobs from the durable job queue and runs them with the same
+pipeline the API runs inline, writing progress and leads to the shared
+task store. Start any number of workers next to the API processes, all
+configured with SCRAPE_EXECUTION_MODE=worker and TASK_STORE_BACKEND=sqlite:
+
+    python -m app.worker --max-jobs 4
+"""
+import argparse
+import asyncio
+import os
+import signal
+from typing import Any, Dict
+
+from app.api.routes import scrape_leads_background
+from app.clients.apify_pool import apify_pool
+from app.clients.apify_transport import check_webhook_settings
+from app.clients.normalization_pool import normalization_pool
+from app.core.checkpoints import checkpoint_store
+from app.core.config import settings
+from app.core.exceptions import TaskStoreError
+from app.core.job_queue import scrape_job_queue
+from app.core.scheduler import scrape_scheduler
+from app.core.task_store import INSTANCE_ID, lease_fields, task_store
+from app.utils.logging_config import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class ScrapeWorker:
+    """
+    Pulls jobs from the job queue while the local scheduler has free slots.
+
+    The scheduler still enforces the per-token cap inside the worker, and
+    the leases on its claimed jobs are renewed in the background. On
+    shutdown, running jobs are cancelled with their checkpoints kept and
+    their leases ended, so the next worker to poll resumes them.
+    """
+
+    def __init__(self, poll_interval: float = 1):
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+
+    async def _start_job(self, job: Dict[str, Any]):
+        task_id = job["task_id"]
+        resume_from = await checkpoint_store.load(task_id) if job["reclaimed"] else None
+        try:
+            await task_store.update(task_id, {**lease_fields(), **({"resumed": True} if resume_from else {})})
+        except TaskStoreError as e:
+            logger.warning(f"Dropping job {task_id}: {str(e)}")
+            await scrape_job_queue.complete(task_id)
+            return
+
+        async def run():
+            try:
+                await scrape_leads_background(
+                    task_id,
+                    job["urls"],
+                    job["lead_count"],
+                    job["fields"],
+                    job["apify_token"],
+                    resume_from=resume_from,
+                    use_token_pool=job.get("use_token_pool", False)
+                )
+            except asyncio.CancelledError:
+                # Worker shutdown: leave the job claimed for the next worker
+                raise
+            except Exception as e:
+                logger.error(f"Scrape job {task_id} raised: {str(e)}", exc_info=True)
+            await scrape_job_queue.complete(task_id)
+
+        logger.info(f"Worker {os.getpid()} claimed job {task_id}" + (" (resuming from checkpoint)" if resume_from else ""))
+        scrape_scheduler.submit(task_id, job["apify_token"], run, priority="high" if resume_from else job.get("priority", "normal"))
+
+    async def _renew_leases(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.task_lease_seconds / 3)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await scrape_job_queue.renew(INSTANCE_ID)
+            except TaskStoreError as e:
+                logger.warning(f"Failed to renew job leases: {str(e)}")
+
+    async def run(self):
+        if not task_store.shared:
+            raise TaskStoreError("Scrape workers need a shared task store, set TASK_STORE_BACKEND=sqlite")
+        check_webhook_settings()
+
+        apify_pool.start()
+        logger.info(f"Scrape worker {os.getpid()} started (max {scrape_scheduler.max_concurrent_jobs} concurrent jobs)")
+        lease_keeper = asyncio.create_task(self._renew_leases())
+        try:
+            while not self._stopping.is_set():
+                job = None
+                if scrape_scheduler.idle_slots():
+                    try:
+                        job = await scrape_job_queue.claim(INSTANCE_ID)
+                    except TaskStoreError as e:
+                        logger.warning(str(e))
+                if job:
+                    await self._start_job(job)
+                    continue
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            logger.info(f"Scrape worker {os.getpid()} stopping")
+            await scrape_scheduler.close()
+            lease_keeper.cancel()
+            try:
+                await scrape_job_queue.release(INSTANCE_ID)
+            except TaskStoreError as e:
+                logger.warning(f"Failed to release job leases: {str(e)}")
+            await apify_pool.close()
+            normalization_pool.close()
+            await scrape_job_queue.close()
+            await task_store.close()
+
+    def stop(self):
+        self._stopping.set()
+
+
+async def _run_worker(poll_interval: float):
+    worker = ScrapeWorker(poll_interval)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scrape jobs from the durable job queue")
+    parser.add_argument("--max-jobs", type=int, default=settings.scrape_max_concurrent_jobs,
+                        help="Scrape jobs this worker runs at once")
+    parser.add_argument("--poll-interval", type=float, default=settings.scrape_worker_poll_interval,
+                        help="Seconds to wait before polling an empty queue again")
+    args = parser.parse_args()
+
+    scrape_scheduler.max_concurrent_jobs = max(1, args.max_jobs)
+    asyncio.run(_run_worker(args.poll_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the leads an in-memory task holds.
+
+Normalizes synthetic Apollo items into canonical leads page by page and
+measures, with tracemalloc, what keeping them costs as the previous list of
+dicts against a LeadTable. Reading every lead back is timed as well, since
+status and export requests materialize the rows.
+
+Usage: python benchmarks/bench_lead_storage.py
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.clients.lead_normalizer import normalize_page  # noqa: E402
+from app.core.lead_table import LeadTable  # noqa: E402
+from bench_normalization import FIELDS, synthetic_items  # noqa: E402
+
+
+def pages_of_leads(count: int, page_size: int = 1000) -> list:
+    items = synthetic_items(count)
+    return [
+        normalize_page(items[start:start + page_size], tuple(FIELDS))
+        for start in range(0, count, page_size)
+    ]
+
+
+def measure(pages: list, store) -> tuple:
+    """Store fresh copies of the pages; returns (stored object, bytes held)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for page in pages:
+        # Copy the strings so every page arrives as newly built objects, as from the normalizer
+        store.extend([{key: "".join(value) for key, value in lead.items()} for lead in page])
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return store, held
+
+
+def bench(count: int) -> None:
+    pages = pages_of_leads(count)
+
+    leads, list_bytes = measure(pages, [])
+    table, table_bytes = measure(pages, LeadTable())
+
+    start = time.perf_counter()
+    rows = table.rows()
+    read_seconds = time.perf_counter() - start
+    assert rows == leads
+
+    print(
+        f"{count:>7,} leads: "
+        f"list of dicts {list_bytes / 2**20:7.1f} MiB ({list_bytes / count:6.0f} B/lead), "
+        f"LeadTable {table_bytes / 2**20:7.1f} MiB ({table_bytes / count:6.0f} B/lead, "
+        f"{list_bytes / table_bytes:.1f}x smaller), rows() {read_seconds * 1000:7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    for count in (10_000, 50_000, 200_000):
+        bench(count)
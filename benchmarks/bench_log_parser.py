@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for ApolloLogParser on large synthetic Apollo actor logs.
+
+Feeds the log in poll-sized chunks, the way ApolloClient consumes it, and
+compares against the previous per-chunk approach (several re.findall calls
+plus repeated lower() scans on every chunk).
+
+Usage: python benchmarks/bench_log_parser.py
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.clients.apify_logs import ApolloLogParser  # noqa: E402
+
+LINE_TEMPLATES = [
+    "2024-01-01T00:00:00.000Z INFO  Fetching page {page}",
+    "2024-01-01T00:00:00.000Z INFO  Found {count} results",
+    "2024-01-01T00:00:00.000Z INFO  Processing URL: https://app.apollo.io/#/people?page={page}",
+    "2024-01-01T00:00:00.000Z DEBUG Request queue size {count}, handled {page} requests",
+    "2024-01-01T00:00:00.000Z INFO  Extracting data for person {count} of page {page}",
+    "2024-01-01T00:00:00.000Z WARN  Request timeout, retrying ({count})",
+]
+
+
+def synthetic_log(line_count: int) -> list:
+    rng = random.Random(42)
+    return [
+        rng.choice(LINE_TEMPLATES).format(page=i // 500 + 1, count=rng.randint(1, 25))
+        for i in range(line_count)
+    ]
+
+
+def legacy_parse(log_content: str) -> dict:
+    """The per-chunk parsing previously done by _parse_apollo_log_progress"""
+    info = {}
+    pages = re.findall(r'Fetching page (\d+)', log_content, re.IGNORECASE)
+    if pages:
+        info['current_page'] = max(int(p) for p in pages)
+    found = re.findall(r'Found (\d+) results?', log_content, re.IGNORECASE)
+    if found:
+        info['records_found'] = sum(int(c) for c in found)
+    urls = re.findall(r'Processing URL:?\s*(.+)', log_content, re.IGNORECASE)
+    if urls:
+        info['current_url'] = urls[-1].strip()
+    for phrase in ['logging into apollo', 'initializing apollo', 'executing search', 'running search',
+                   'extracting data', 'collecting leads']:
+        if phrase in log_content.lower():
+            info['phase'] = phrase
+    if any(p in log_content.lower() for p in ['scraping completed', 'finished', 'done', 'success']):
+        info['status'] = 'completed'
+    if any(p in log_content.lower() for p in ['error', 'failed', 'timeout', 'blocked', 'unauthorized']):
+        info['has_errors'] = True
+    pct = re.findall(r'(\d+)%', log_content)
+    if pct:
+        info['percentage'] = max(int(p) for p in pct)
+    return info
+
+
+def bench(line_count: int, chunk_lines: int = 200) -> None:
+    lines = synthetic_log(line_count)
+    chunks = [lines[i:i + chunk_lines] for i in range(0, len(lines), chunk_lines)]
+    size_mb = sum(len(line) + 1 for line in lines) / 1_000_000
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        legacy_parse("\n".join(chunk))
+    legacy_seconds = time.perf_counter() - start
+
+    parser = ApolloLogParser(time.time())
+    start = time.perf_counter()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser_seconds = time.perf_counter() - start
+
+    print(
+        f"{line_count:>9,} lines ({size_mb:6.1f} MB): "
+        f"legacy {legacy_seconds * 1000:8.1f} ms, "
+        f"ApolloLogParser {parser_seconds * 1000:8.1f} ms "
+        f"({line_count / parser_seconds:,.0f} lines/s, {legacy_seconds / parser_seconds:.1f}x), "
+        f"records_found={parser.records_found}"
+    )
+
+
+if __name__ == "__main__":
+    for count in (10_000, 100_000, 1_000_000):
+        bench(count)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Apollo-to-lead normalization on synthetic Apollo items.
+
+Compares the compiled field plan (lead_normalizer.normalize_items) against
+the previous per-item approach: an if/elif chain walked for every field of
+every item, with debug f-strings holding the raw item built even though
+debug output is discarded.
+
+It then normalizes the same number of items spread over fewer or more
+companies, with and without the memo of organization values, and finally
+runs the largest set through NormalizationPool, inline and with worker
+processes, while a ticker coroutine measures how long the event loop is
+stalled.
+
+Usage: python benchmarks/bench_normalization.py [--workers N]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.clients import lead_normalizer  # noqa: E402
+from app.clients.lead_normalizer import (  # noqa: E402
+    compile_field_plan,
+    format_url,
+    normalize_items,
+    organization_cache_stats,
+)
+from app.clients.normalization_pool import NormalizationPool  # noqa: E402
+
+FIELDS = [
+    "name", "email", "phone", "company", "title", "location",
+    "industry", "linkedin", "twitter", "instagram", "facebook", "website"
+]
+
+logger = logging.getLogger("bench_normalization")
+logger.setLevel(logging.INFO)
+
+
+def synthetic_items(count: int, companies: int = 500) -> list:
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        org_id = rng.randint(1, companies)
+        items.append({
+            "id": f"p{i}",
+            "name": f"person {i} o'neil",
+            "email": f"person{i}@company{org_id}.com",
+            "title": rng.choice(["vp of sales", "ceo and founder", "head of marketing", "software engineer"]),
+            "city": "austin", "state": "texas", "country": "united states",
+            "linkedin_url": f"http://www.linkedin.com/in/person{i}",
+            "twitter_url": rng.choice(["", f"https://twitter.com/p{i}"]),
+            "phone_numbers": [{"sanitized_number": f"+1415555{i % 10000:04d}"}] if i % 3 else [],
+            "employment_history": [{"organization_name": f"company {org_id}", "title": "engineer"}] * 3,
+            "organization": {
+                "id": f"o{org_id}",
+                "name": f"company {org_id}",
+                "industry": "information technology and services",
+                "website_url": f"http://www.company{org_id}.com",
+                "twitter_url": f"https://twitter.com/company{org_id}",
+                "facebook_url": f"https://facebook.com/company{org_id}",
+                "phone": "+1 415-555-0100",
+                "keywords": ["saas", "b2b", "sales"] * 5,
+            },
+        })
+    return items
+
+
+def legacy_process_items(items: list, requested_fields: list) -> list:
+    """The per-item field dispatch previously done by _process_items"""
+    processed = []
+    for i, item in enumerate(items):
+        logger.debug(f"Processing raw item {i+1}: {item}")
+        proc_item = {}
+        company_data = item.get("organization", {}) or {}
+        logger.debug(f"Company data found: {company_data}")
+        for field in requested_fields:
+            value = ""
+            if field == "name":
+                value = str(item.get("name") or "").strip()
+            elif field == "email":
+                value = str(item.get("email") or "").strip()
+            elif field == "phone":
+                value = lead_normalizer._extract_phone(item, lead_normalizer.organization_values(company_data))
+            elif field == "location":
+                parts = []
+                if item.get("city"):
+                    parts.append(str(item["city"]))
+                if item.get("state"):
+                    parts.append(str(item["state"]))
+                if item.get("country"):
+                    parts.append(str(item["country"]))
+                if not parts and item.get("present_raw_address"):
+                    value = str(item["present_raw_address"]).strip()
+                else:
+                    value = ", ".join(parts)
+            elif field == "company":
+                value = str(company_data.get("name") or item.get("organization_name") or "").strip()
+            elif field == "title":
+                value = str(item.get("title") or "").strip()
+            elif field == "industry":
+                value = str(item.get("industry") or "").strip() or str(company_data.get("industry") or "").strip()
+            elif field in ("linkedin", "twitter", "instagram", "facebook"):
+                url = str(item.get(f"{field}_url") or "").strip()
+                if not url and field in ("twitter", "facebook"):
+                    url = str(company_data.get(f"{field}_url") or "").strip()
+                if url:
+                    value = format_url(url, field)
+                    logger.debug(f"Using {field} for {item.get('name', 'Unknown')}: {value}")
+            elif field == "website":
+                website = str(item.get("website") or item.get("website_url") or "").strip()
+                if not website:
+                    website = str(company_data.get("website_url") or "").strip()
+                if website:
+                    value = format_url(website, "website")
+                    logger.debug(f"Using website for {item.get('name', 'Unknown')}: {value}")
+            proc_item[field] = value
+            logger.debug(f"Processed {field}: '{value}'")
+        processed.append(proc_item)
+        logger.debug(f"Processed lead {i+1}: {proc_item}")
+    return processed
+
+
+def bench(count: int) -> None:
+    items = synthetic_items(count)
+
+    start = time.perf_counter()
+    legacy_process_items(items, FIELDS)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    plan = compile_field_plan(FIELDS)
+    leads = normalize_items(items, plan)
+    plan_seconds = time.perf_counter() - start
+
+    print(
+        f"{count:>7,} items: "
+        f"legacy {legacy_seconds * 1000:8.1f} ms ({count / legacy_seconds:>9,.0f} items/s), "
+        f"field plan {plan_seconds * 1000:8.1f} ms ({count / plan_seconds:>9,.0f} items/s, "
+        f"{legacy_seconds / plan_seconds:.1f}x), leads={len(leads)}"
+    )
+
+
+def bench_duplication(count: int) -> None:
+    plan = compile_field_plan(FIELDS)
+    memoized = lead_normalizer._cached_organization
+    unmemoized = lru_cache(maxsize=0)(lead_normalizer._build_organization)
+
+    for companies in (count, count // 10, count // 100, count // 1000):
+        items = synthetic_items(count, companies)
+
+        lead_normalizer._cached_organization = unmemoized
+        start = time.perf_counter()
+        normalize_items(items, plan)
+        plain_seconds = time.perf_counter() - start
+
+        lead_normalizer._cached_organization = memoized
+        memoized.cache_clear()
+        start = time.perf_counter()
+        normalize_items(items, plan)
+        memo_seconds = time.perf_counter() - start
+        cache = organization_cache_stats()
+
+        print(
+            f"{count:>7,} items, {count // companies:>5} leads/company: "
+            f"no memo {plain_seconds * 1000:8.1f} ms, memo {memo_seconds * 1000:8.1f} ms "
+            f"({plain_seconds / memo_seconds:.2f}x, hit rate {cache['hit_rate']:.3f})"
+        )
+
+
+async def _normalize_with_ticker(pool: NormalizationPool, pages: list) -> tuple:
+    """Normalize pages one after another; returns (seconds, worst event loop stall in seconds)"""
+    worst_stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst_stall
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst_stall = max(worst_stall, time.perf_counter() - before - 0.001)
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for page in pages:
+        await pool.normalize(page, FIELDS)
+        # Ingestion awaits the next dataset read between pages
+        await asyncio.sleep(0)
+    seconds = time.perf_counter() - start
+    done = True
+    await ticking
+    return seconds, worst_stall
+
+
+def bench_pool(count: int, workers: int, page_size: int = 1000) -> None:
+    items = synthetic_items(count)
+    pages = [items[start:start + page_size] for start in range(0, count, page_size)]
+
+    for label, pool in (("inline", NormalizationPool(0)), (f"{workers} processes", NormalizationPool(workers))):
+        if pool.enabled:
+            # Spawn the workers before timing
+            asyncio.run(pool.normalize(pages[0], FIELDS))
+        seconds, worst_stall = asyncio.run(_normalize_with_ticker(pool, pages))
+        pool.close()
+        print(
+            f"{count:>7,} items in {len(pages)} pages, {label:>12}: {seconds * 1000:8.1f} ms "
+            f"({count / seconds:>9,.0f} items/s), worst event loop stall {worst_stall * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processes for the NormalizationPool run")
+    args = parser.parse_args()
+
+    for count in (1_000, 10_000, 50_000):
+        bench(count)
+    bench_duplication(50_000)
+    bench_pool(50_000, args.workers)
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.clients.apify_pool import ApifyClientPool, token_id
+
+
+def test_unused_transports_are_closed_then_dropped():
+    pool = ApifyClientPool(idle_timeout=10, entry_ttl=100)
+
+    async def scenario():
+        transport = pool.get("user-token-1234")
+        same = pool.get("user-token-1234")
+        # Raw tokens are not kept as keys
+        keys = set(pool._entries)
+
+        pool._entries[token_id("user-token-1234")]["last_used"] -= 50
+        await pool.evict_idle()
+        closed_but_kept = transport.client.is_closed and len(pool._entries) == 1
+
+        pool._entries[token_id("user-token-1234")]["last_used"] -= 100
+        await pool.evict_idle()
+        dropped = not pool._entries
+
+        # A holder of the dropped transport can still use it
+        reopened = not transport.http_client().is_closed
+        fresh = pool.get("user-token-1234")
+        await transport.close()
+        await pool.close()
+        return transport is same, keys, closed_but_kept, dropped, reopened, fresh is not transport
+
+    shared, keys, closed_but_kept, dropped, reopened, fresh = asyncio.run(scenario())
+
+    assert shared
+    assert keys == {token_id("user-token-1234")}
+    assert closed_but_kept
+    assert dropped and pool.expired == 1
+    assert reopened and fresh
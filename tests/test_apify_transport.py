@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import httpx
+
+from app.clients.apify_client import ApifyApolloClient
+from app.clients.apify_transport import ApifyTransport
+from app.core.config import settings
+
+RUN_SECONDS = 1.0
+ITEMS = 45
+
+
+class FakeApify:
+    """Local stand-in for the Apify endpoints one actor run uses, with network latency"""
+
+    def __init__(self):
+        self.started_at = None
+        self.requests = []
+
+    def _status(self) -> str:
+        return "SUCCEEDED" if time.monotonic() - self.started_at >= RUN_SECONDS else "RUNNING"
+
+    def _run(self) -> dict:
+        return {"id": "run1", "status": self._status(), "defaultDatasetId": "ds1"}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        await asyncio.sleep(0.02)
+        path = request.url.path
+        if path.endswith("/runs") and request.method == "POST":
+            self.started_at = time.monotonic()
+            return httpx.Response(201, json={"data": self._run()})
+        if path.startswith("/v2/actor-runs/"):
+            wait = float(request.url.params.get("waitForFinish", 0))
+            # Long-poll: hold the request until the run finishes or the wait is over
+            deadline = time.monotonic() + wait
+            while self._status() == "RUNNING" and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"data": self._run()})
+        if path == "/v2/datasets/ds1/items":
+            # Items appear over the run's lifetime
+            written = ITEMS if self._status() == "SUCCEEDED" else int(ITEMS * (time.monotonic() - self.started_at) / RUN_SECONDS)
+            offset = int(request.url.params["offset"])
+            limit = int(request.url.params["limit"])
+            items = [
+                {"id": f"p{i}", "name": f"person {i}", "email": f"person{i}@example.com"}
+                for i in range(offset, min(written, offset + limit))
+            ]
+            return httpx.Response(200, json=items)
+        if path == "/v2/users/me/limits":
+            return httpx.Response(200, json={"data": {"limits": {}, "current": {}}})
+        return httpx.Response(404, json={"error": path})
+
+
+def test_event_loop_stays_responsive_during_run(monkeypatch):
+    monkeypatch.setattr(settings, "scrape_cache_enabled", False)
+    monkeypatch.setattr(settings, "apify_dataset_page_size", 10)
+    monkeypatch.setattr(settings, "apify_dataset_poll_interval", 0.1)
+    monkeypatch.setattr(settings, "apify_dataset_max_poll_interval", 0.2)
+    fake = FakeApify()
+
+    async def scenario():
+        transport = ApifyTransport(
+            "test-token",
+            base_url="https://api.apify.test/v2",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+        )
+        client = ApifyApolloClient(apify_token="test-token")
+        client.client = transport
+
+        ticks = 0
+        worst_stall = 0.0
+        done = False
+
+        async def ticker():
+            nonlocal ticks, worst_stall
+            while not done:
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                worst_stall = max(worst_stall, time.perf_counter() - before - 0.01)
+                ticks += 1
+
+        pages = []
+
+        async def on_page(leads):
+            pages.append(len(leads))
+
+        ticking = asyncio.create_task(ticker())
+        scrape = asyncio.create_task(client.scrape_apollo_leads(
+            ["https://app.apollo.io/#/people?personTitles[]=ceo"], lead_count=ITEMS, fields=["name", "email"], on_page=on_page
+        ))
+        # Another request on the same transport completes while the run is polled
+        await asyncio.sleep(0.3)
+        limits = await transport.get_limits()
+        concurrent_done_while_running = not scrape.done()
+        result = await scrape
+        done = True
+        await ticking
+        await transport.close()
+        return result, pages, limits, concurrent_done_while_running, ticks, worst_stall
+
+    result, pages, limits, concurrent_done_while_running, ticks, worst_stall = asyncio.run(scenario())
+
+    assert result["status"] == "success"
+    assert sum(pages) == ITEMS
+    # Pages were handed over while the run was still going, not in one batch at the end
+    assert len(pages) > 1
+    assert concurrent_done_while_running and limits == {"limits": {}, "current": {}}
+    # The timer kept firing through the run: about one tick every 10 ms
+    assert ticks >= RUN_SECONDS / 0.01 / 2
+    assert worst_stall < 0.1
+    assert "/v2/actor-runs/run1" in fake.requests
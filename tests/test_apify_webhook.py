@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import router
+from app.clients.apify_transport import WEBHOOK_RECEIVER_PATH, WEBHOOK_SECRET_HEADER, check_webhook_settings
+from app.clients.run_watcher import RunWatcher
+from app.core.config import settings
+from app.core.exceptions import ExternalAPIError
+from app.utils.webhook_simulator import build_run_event
+
+SECRET = "test-webhook-secret"
+
+
+@pytest.fixture
+def webhook_mode(monkeypatch):
+    monkeypatch.setattr(settings, "apify_webhook_base_url", "https://scraper.example.com")
+    monkeypatch.setattr(settings, "apify_webhook_secret", SECRET)
+    monkeypatch.setattr(settings, "scrape_execution_mode", "inline")
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    return app
+
+
+async def _send_event(run_id: str, headers: dict):
+    """Watch run_id, post a SUCCEEDED event for it; returns (response, whether the watch finished)"""
+    async def still_running(run_id: str, wait: int):
+        return {"id": run_id, "status": "RUNNING"}
+
+    watcher = RunWatcher(still_running, safety_poll_interval=3600)
+    waiting = watcher.watch(run_id)
+    try:
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                WEBHOOK_RECEIVER_PATH,
+                json=build_run_event({"id": run_id, "status": "SUCCEEDED", "defaultDatasetId": "ds1"}),
+                headers=headers
+            )
+        await asyncio.sleep(0)
+        return response, waiting.done() and not waiting.cancelled()
+    finally:
+        await watcher.close()
+
+
+def test_signed_event_resolves_watched_run(webhook_mode):
+    response, finished = asyncio.run(_send_event("run-signed", {WEBHOOK_SECRET_HEADER: SECRET}))
+    assert response.status_code == 200
+    assert response.json()["resolved"] is True
+    assert finished
+
+
+@pytest.mark.parametrize("headers", [{}, {WEBHOOK_SECRET_HEADER: "forged"}])
+def test_unsigned_or_forged_event_is_rejected(webhook_mode, headers):
+    response, finished = asyncio.run(_send_event("run-forged", headers))
+    assert response.status_code == 401
+    assert not finished
+
+
+def test_receiver_is_not_served_without_webhook_mode(monkeypatch):
+    monkeypatch.setattr(settings, "apify_webhook_base_url", "")
+    monkeypatch.setattr(settings, "apify_webhook_secret", "")
+    response, finished = asyncio.run(_send_event("run-disabled", {}))
+    assert response.status_code == 404
+    assert not finished
+
+
+def test_webhook_mode_requires_secret_and_inline_execution(webhook_mode, monkeypatch):
+    check_webhook_settings()
+
+    monkeypatch.setattr(settings, "scrape_execution_mode", "worker")
+    with pytest.raises(ExternalAPIError):
+        check_webhook_settings()
+
+    monkeypatch.setattr(settings, "scrape_execution_mode", "inline")
+    monkeypatch.setattr(settings, "apify_webhook_secret", "")
+    with pytest.raises(ExternalAPIError):
+        check_webhook_settings()
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.core.task_store import InMemoryTaskStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = InMemoryTaskStore()
+    monkeypatch.setattr(routes, "task_store", store)
+    return store
+
+
+async def _coalesced_job(store):
+    """A running leader task with one coalesced subscriber"""
+    await store.create("leader", {**routes._new_task_entry(1, "key"), "status": "running"})
+    await store.create("subscriber", {"coalesced_with": "leader"})
+    await store.increment("leader", "subscribers")
+
+
+def test_repeated_cancel_of_leader_keeps_the_shared_job(store):
+    async def scenario():
+        await _coalesced_job(store)
+        first = await routes.cancel_scrape("leader")
+        with pytest.raises(HTTPException) as repeated:
+            await routes.cancel_scrape("leader")
+        return first, repeated.value, await store.get("leader", include_data=False)
+
+    first, repeated, leader = asyncio.run(scenario())
+
+    assert first["status"] == "detached"
+    assert repeated.status_code == 409
+    # The subscriber still depends on the job
+    assert leader["subscribers"] == 1
+    assert leader["status"] == "running"
+    assert not leader.get("cancel_requested")
+
+
+def test_repeated_cancel_of_subscriber_is_refused(store):
+    async def scenario():
+        await _coalesced_job(store)
+        first = await routes.cancel_scrape("subscriber")
+        with pytest.raises(HTTPException) as repeated:
+            await routes.cancel_scrape("subscriber")
+        return first, repeated.value, await store.get("leader", include_data=False)
+
+    first, repeated, leader = asyncio.run(scenario())
+
+    assert first["status"] == "cancelled"
+    assert repeated.status_code == 409
+    assert leader["subscribers"] == 1
+    assert leader["status"] == "running"
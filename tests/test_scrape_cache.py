@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import httpx
+
+from app.clients import apify_client
+from app.clients.apify_client import ApifyApolloClient
+from app.clients.apify_transport import ApifyTransport
+from app.clients.scrape_cache import ScrapeResultCache
+from app.core.config import settings
+
+URL = "https://app.apollo.io/#/people?personTitles[]=ceo"
+SEARCH_SIZE = 150
+
+
+class FakeApify:
+    """Apify stand-in whose runs finish at once and return the top of one search"""
+
+    def __init__(self):
+        self.requested = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/runs") and request.method == "POST":
+            self.requested.append(json.loads(request.content)["totalRecords"])
+            run = {"id": f"run{len(self.requested)}", "status": "SUCCEEDED", "defaultDatasetId": f"ds{len(self.requested)}"}
+            return httpx.Response(201, json={"data": run})
+        if path.startswith("/v2/actor-runs/"):
+            run_id = path.rsplit("/", 1)[-1]
+            return httpx.Response(200, json={"data": {"id": run_id, "status": "SUCCEEDED", "defaultDatasetId": run_id.replace("run", "ds")}})
+        if path.startswith("/v2/datasets/"):
+            # Every run of the search starts from its first result
+            written = min(self.requested[-1], SEARCH_SIZE)
+            offset = int(request.url.params["offset"])
+            limit = int(request.url.params["limit"])
+            items = [
+                {"id": f"p{i}", "name": f"person {i}", "email": f"person{i}@example.com"}
+                for i in range(offset, min(written, offset + limit))
+            ]
+            return httpx.Response(200, json=items)
+        return httpx.Response(404, json={"error": path})
+
+
+def test_partial_hit_is_completed_past_the_cached_prefix(monkeypatch):
+    cache = ScrapeResultCache(cache_dir=None)
+    monkeypatch.setattr(apify_client, "scrape_cache", cache)
+    monkeypatch.setattr(settings, "scrape_cache_enabled", True)
+    monkeypatch.setattr(settings, "apify_dataset_page_size", 10)
+    fake = FakeApify()
+
+    async def scrape(stop_after: int):
+        client = ApifyApolloClient(apify_token="test-token")
+        client.client = ApifyTransport(
+            "test-token",
+            base_url="https://api.apify.test/v2",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+        )
+        received = []
+
+        async def on_page(leads):
+            received.extend(leads)
+            return len(received) < stop_after
+
+        result = await client.scrape_apollo_leads([URL], lead_count=100, fields=["name", "email"], on_page=on_page)
+        await client.client.close()
+        return result, received
+
+    async def scenario():
+        # The first caller stops after 30 leads, leaving a partial entry
+        await scrape(stop_after=30)
+        return await scrape(stop_after=1000)
+
+    result, received = asyncio.run(scenario())
+
+    assert result["total_scraped"] == 100
+    assert len(received) == 100
+    assert len({lead["email"] for lead in received}) == 100
+    # The rerun asked for the served prefix on top of the missing leads
+    assert fake.requested[-1] == 100
+    cached = asyncio.run(cache.get(cache.make_key([URL], ["name", "email"], 100)))
+    assert cached["partial"] is False and len(cached["leads"]) == 100
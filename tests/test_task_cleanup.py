@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.api.middleware import TaskCleanupMiddleware
+from app.core import task_store as task_store_module
+from app.core.task_store import InMemoryTaskStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = InMemoryTaskStore()
+    monkeypatch.setattr(routes, "task_store", store)
+    monkeypatch.setattr(task_store_module, "task_store", store)
+    return store
+
+
+def test_subscriber_is_cleaned_up_with_its_leader(store):
+    async def scenario():
+        await store.create("leader", {**routes._new_task_entry(1, "key"), "status": "completed"})
+        await store.create("subscriber", {"coalesced_with": "leader", "status": "coalesced", "created_at": 0})
+        await TaskCleanupMiddleware(app=None)._cleanup_old_tasks()
+        return await store.list_tasks()
+
+    assert asyncio.run(scenario()) == {}
+
+
+def test_subscriber_of_removed_leader_is_gone_not_an_error(store):
+    async def scenario():
+        await store.create("subscriber", {"coalesced_with": "leader", "status": "coalesced", "created_at": 0})
+        with pytest.raises(HTTPException) as status:
+            await routes.get_scrape_status("subscriber")
+        with pytest.raises(HTTPException) as export:
+            await routes.export_json("subscriber")
+        return status.value, export.value
+
+    status, export = asyncio.run(scenario())
+
+    assert status.status_code == 410
+    assert export.status_code == 404
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.job_queue import ScrapeJobQueue
+from app.core.task_store import INSTANCE_ID, SQLiteTaskStore, TaskStore
+
+
+def test_incomplete_store_fails_when_created():
+    class ReadOnlyStore(TaskStore):
+        async def get(self, task_id, include_data=True):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore()
+
+
+def test_claim_takes_over_a_task_once_its_lease_runs_out(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+
+    async def scenario():
+        # Owned by a process of an earlier boot, which may have had this very pid
+        await store.create("held", {"status": "running", "worker_id": "earlier-boot", "lease_expires": time.time() + 60})
+        await store.create("lapsed", {"status": "running", "worker_id": "earlier-boot", "lease_expires": time.time() - 1})
+        held = await store.claim("held", {"status": "pending"})
+        lapsed = await store.claim("lapsed", {"status": "pending", "worker_id": INSTANCE_ID})
+        return held, lapsed, await store.get("lapsed", include_data=False)
+
+    held, lapsed, task = asyncio.run(scenario())
+    asyncio.run(store.close())
+
+    assert not held
+    assert lapsed and task["worker_id"] == INSTANCE_ID
+
+
+def test_jobs_of_a_lapsed_worker_are_reclaimed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "task_lease_seconds", 60)
+    queue = ScrapeJobQueue(str(tmp_path / "jobs.db"))
+
+    async def scenario():
+        await queue.enqueue("job", {"urls": []})
+        first = await queue.claim("worker-a")
+        taken_while_held = await queue.claim("worker-b")
+        # worker-a stops renewing: its last renewal has run out
+        monkeypatch.setattr(settings, "task_lease_seconds", -1)
+        await queue.renew("worker-a")
+        stats = await queue.stats()
+        reclaimed = await queue.claim("worker-b")
+        await queue.close()
+        return first, taken_while_held, reclaimed, stats
+
+    first, taken_while_held, reclaimed, stats = asyncio.run(scenario())
+
+    assert first["task_id"] == "job" and not first["reclaimed"]
+    assert taken_while_held is None
+    assert reclaimed["task_id"] == "job" and reclaimed["reclaimed"]
+    assert stats["claimed"] == 1 and stats["orphaned"] == 1